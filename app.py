@@ -3,12 +3,17 @@ import os
 
 from flask import Flask, render_template, request, jsonify, redirect, url_for, flash, session, make_response
 from flask_login import LoginManager, login_user, logout_user, login_required, current_user
-from flask_socketio import SocketIO, emit
+from flask_socketio import SocketIO, emit, join_room
 import json
 import random
+import tempfile
+import threading
+import time
 from json import JSONEncoder
 from datetime import datetime
+from functools import wraps
 import sys
+import numpy as np
 
 # Load environment variables first
 from dotenv import load_dotenv
@@ -26,15 +31,23 @@ import json as json_lib
 # Add the project root to Python path
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
-from models.user import user_manager, User
-from models.ml_models import ml_manager
+from models.user import DEFAULT_IMPORT_PASSWORD, user_manager, User
+from models.numpy_inference import MODEL_NAMES, inference_engine
+from models.model_registry import model_registry
+from models.training_jobs import TRAINABLE_MODELS, training_jobs
+from models import energy_analytics
 from utils.data_generator import RenewableEnergyDataGenerator, get_current_data, get_historical_data
+from utils.timeseries_store import timeseries_store
+from utils.chart_cache import chart_cache
+from utils.daily_metrics import daily_metrics, metrics_from_data
+from utils.rollups import rollup_store
+from utils.intent_router import IntentRouter, tokenize
+from utils.response_cache import ResponseCache
+from utils.downsampling import DEFAULT_POINT_BUDGET, downsample_frame
+from utils.offload import BlockingPool, password_pool
+from utils.micro_batcher import MicroBatcher
+from utils.shared_state import MULTI_WORKER, shared_state, SQLitePubSubManager
 from utils.alert_system import alert_manager, alert_analyzer, AlertSeverity
-import plotly.graph_objs as go
-import plotly.utils
-from plotly.subplots import make_subplots
-import pandas as pd
-import numpy as np
 
 # Initialize Flask app
 app = Flask(__name__)
@@ -48,14 +61,108 @@ login_manager.init_app(app)
 login_manager.login_view = 'login'
 login_manager.login_message = 'Please log in to access the energy monitoring dashboard.'
 
-socketio = SocketIO(app, cors_allowed_origins="*", json=json)
+# With several gunicorn workers, emits are relayed to every worker through a message
+# queue: SOCKETIO_MESSAGE_QUEUE=sqlite for a single host, or a redis:// / kombu URL.
+# A single worker needs no queue, so the sqlite one is skipped there.
+SOCKETIO_MESSAGE_QUEUE = os.environ.get('SOCKETIO_MESSAGE_QUEUE')
+if SOCKETIO_MESSAGE_QUEUE == 'sqlite' and not MULTI_WORKER:
+    SOCKETIO_MESSAGE_QUEUE = None
+if SOCKETIO_MESSAGE_QUEUE == 'sqlite':
+    socketio = SocketIO(app, cors_allowed_origins="*", json=json,
+                        client_manager=SQLitePubSubManager(json=json))
+else:
+    socketio = SocketIO(app, cors_allowed_origins="*", json=json, message_queue=SOCKETIO_MESSAGE_QUEUE)
 
 # Initialize data generator
 data_generator = RenewableEnergyDataGenerator()
 
-# Grid connection status
-grid_connected = True
-current_data_cache = {}
+# Seed for generated history of dates the time-series store does not cover
+HISTORICAL_SEED = int(os.environ.get('HISTORICAL_SEED', 42))
+
+# Keep the shared time-series store advancing one minute at a time
+timeseries_store.start_producer(socketio.start_background_task, socketio.sleep)
+
+# Heavy subsystems (torch and sklearn behind models.ml_models, plotly, pandas) are
+# imported on first use so a fresh worker binds its port and answers /api/health fast.
+WARM_UP_ON_START = os.environ.get('WARM_UP_ON_START', 'true').lower() == 'true'
+WARM_UP_DELAY_SECONDS = float(os.environ.get('WARM_UP_DELAY_SECONDS', 5))
+warmup_pool = BlockingPool('warmup', max_workers=1)
+
+def get_ml_manager():
+    """The shared ML manager; the first call imports torch and sklearn and loads the models"""
+    from models.ml_models import ml_manager
+    return ml_manager
+
+def has_fault_model():
+    """Whether a trained fault detector is available to either backend"""
+    return inference_engine.has('fault_detector') or get_ml_manager().is_fitted('fault_detector')
+
+def predict_fault_probability_batch(readings):
+    """Fault probabilities for independent readings, from the exported NumPy model or torch"""
+    if inference_engine.has('fault_detector'):
+        return inference_engine.predict('fault_detector', readings)
+    return get_ml_manager().predict_fault_probability_batch(readings)
+
+# Concurrent single predictions from different requests share one forward pass
+fault_batcher = MicroBatcher(
+    predict_fault_probability_batch,
+    max_batch_size=int(os.environ.get('ML_MICRO_BATCH_SIZE', 256)),
+    max_wait_seconds=float(os.environ.get('ML_MICRO_BATCH_WAIT_MS', 1)) / 1000
+)
+
+def predict_fault_probability(current_data):
+    """Fault probability for one reading, coalesced with concurrent requests"""
+    return fault_batcher.predict(current_data)
+
+def import_heavy_modules():
+    start = time.time()
+    get_ml_manager()
+    import pandas
+    import plotly.graph_objs
+    import plotly.utils
+    print(f"Warm-up: ML models and plotting libraries loaded in {time.time() - start:.1f}s")
+
+def warm_up():
+    """Background task: load the heavy modules on a native thread once the server is up"""
+    socketio.sleep(WARM_UP_DELAY_SECONDS)
+    try:
+        warmup_pool.call(import_heavy_modules)
+    except Exception as e:
+        print(f"Warm-up failed: {e}")
+
+if WARM_UP_ON_START:
+    socketio.start_background_task(warm_up)
+
+# Grid connection status and the last reading live in shared state so every worker agrees
+def is_grid_connected():
+    return shared_state.get('grid_connected', True)
+
+def get_cached_reading():
+    """Last reading seen while connected, served while the grid is disconnected"""
+    return shared_state.get('last_reading', {})
+
+last_cached_reading = None
+
+def cache_reading(current_data):
+    """Store the reading for disconnected periods, skipping the write when it has not changed"""
+    global last_cached_reading
+    reading = serialize_reading(current_data)
+    if reading != last_cached_reading:
+        shared_state.set('last_reading', reading)
+        last_cached_reading = reading
+
+def serialize_reading(current_data):
+    """Copy of a reading with its timestamp as an ISO string"""
+    serializable_data = current_data.copy()
+    timestamp = serializable_data.get('timestamp')
+    if timestamp is not None:
+        serializable_data['timestamp'] = timestamp.isoformat() if hasattr(timestamp, 'isoformat') else str(timestamp)
+    return serializable_data
+
+@app.context_processor
+def inject_socketio_options():
+    # Polling needs sticky sessions, which gunicorn cannot route across workers
+    return {'socketio_options': {'transports': ['websocket']} if MULTI_WORKER else {}}
 
 @login_manager.user_loader
 def load_user(user_id):
@@ -95,6 +202,11 @@ def login():
         password = request.form['password']
         
         user = user_manager.authenticate_user(username_or_email, password)
+        if user and user.password_reset_required:
+            # Imported accounts still on the shared default password pick their own first
+            session['password_reset_user_id'] = user.id
+            flash('Please choose a new password to finish signing in.', 'info')
+            return redirect(url_for('reset_password'))
         if user:
             login_user(user)
             next_page = request.args.get('next')
@@ -105,6 +217,33 @@ def login():
     
     return render_template('login.html')
 
+@app.route('/reset-password', methods=['GET', 'POST'])
+def reset_password():
+    """New password for an account flagged password_reset_required, after it logged in with the old one"""
+    user_id = session.get('password_reset_user_id')
+    user = user_manager.get_user(user_id) if user_id else None
+    if not user:
+        return redirect(url_for('login'))
+    
+    if request.method == 'POST':
+        password = request.form['password']
+        confirm_password = request.form['confirm_password']
+        
+        if password != confirm_password:
+            flash('Passwords do not match', 'error')
+            return render_template('reset_password.html')
+        if password == DEFAULT_IMPORT_PASSWORD:
+            flash('Please choose a password other than the default one', 'error')
+            return render_template('reset_password.html')
+        
+        user = user_manager.set_password(user.id, password)
+        session.pop('password_reset_user_id', None)
+        login_user(user)
+        flash(f'Password updated. Welcome, {user.full_name or user.username}!', 'success')
+        return redirect(url_for('dashboard'))
+    
+    return render_template('reset_password.html')
+
 @app.route('/logout')
 @login_required
 def logout():
@@ -126,9 +265,8 @@ def dashboard():
     recent_alerts = alert_manager.get_alerts(user_id=current_user.id, limit=5)
     alert_summary = alert_manager.get_alert_summary(user_id=current_user.id)
     
-    # Get historical data for analysis
-    historical_data = get_historical_data(hours=24)
-    daily_averages = data_generator.get_daily_averages(historical_data)
+    # Daily averages over the last 24 hours from the rollups
+    daily_averages = rollup_store.daily_averages(*rollup_store.recent(24))
     
     # Analyze current data for alerts
     alert_analyzer.analyze_and_create_alerts(current_data, user_id=current_user.id)
@@ -150,16 +288,30 @@ def health_check():
         'port_binding': 'OK'
     }), 200
 
+@app.route('/api/system/metrics')
+@login_required
+def system_metrics():
+    """Queue depth of the worker pools, cache counters and chatbot intent counts"""
+    return jsonify({
+        'password_pool': password_pool.stats(),
+        'chart_cache': chart_cache.stats(),
+        'fault_batcher': fault_batcher.stats(),
+        'chatbot_intents': chatbot_router.stats(),
+        'chatbot_cache': chatbot_cache.stats(),
+        'chatbot_pool': chatbot_pool.stats(),
+        'timestamp': datetime.now().isoformat()
+    })
+
 @app.route('/api/current-data')
 @login_required
 def api_current_data():
-    global grid_connected, current_data_cache
+    grid_connected = is_grid_connected()
     
     if grid_connected:
         current_data = get_current_data()
         
         # Cache the current data
-        current_data_cache = current_data.copy()
+        cache_reading(current_data)
         
         # Analyze for alerts
         alerts_created = alert_analyzer.analyze_and_create_alerts(current_data, user_id=current_user.id)
@@ -173,31 +325,38 @@ def api_current_data():
     else:
         # Return last known data when disconnected
         return jsonify({
-            'data': current_data_cache if current_data_cache else {},
+            'data': get_cached_reading(),
             'timestamp': datetime.now().isoformat(),
             'new_alerts': 0,
             'grid_connected': grid_connected,
             'message': 'Grid disconnected - showing last known data'
         })
 
+def request_hours(default=24):
+    """The ?hours= window of a request, from one hour up to what the store holds"""
+    hours = request.args.get('hours', default, type=int)
+    return min(max(1, hours), timeseries_store.capacity // 60)
+
 @app.route('/api/historical-data')
 @login_required
 def api_historical_data():
-    hours = request.args.get('hours', 24, type=int)
+    hours = request_hours()
     data = get_historical_data(hours=hours)
     return jsonify(data)
 
 @app.route('/api/solar-analysis')
 @login_required
 def api_solar_analysis():
-    hours = request.args.get('hours', 24, type=int)
-    historical_data = get_historical_data(hours=hours)
+    hours = request_hours()
+    # Columnar history: faults are found with array masks and only matches become dicts
+    history = timeseries_store.last(hours * 60)
     
     # Prepare data for sun intensity vs power generation analysis
     analysis_data = []
-    faults = data_generator.detect_solar_faults(historical_data)
+    faults = data_generator.detect_solar_faults(history)
     
-    for record in historical_data[-100:]:  # Last 100 records
+    recent = RenewableEnergyDataGenerator.arrays_to_records({key: values[-100:] for key, values in history.items()})
+    for record in recent:  # Last 100 records
         analysis_data.append({
             'timestamp': record['timestamp'].isoformat() if hasattr(record['timestamp'], 'isoformat') else str(record['timestamp']),
             'sun_intensity': record['sun_intensity'],
@@ -222,11 +381,11 @@ def api_solar_analysis():
 @app.route('/api/energy-trading')
 @login_required
 def api_energy_trading():
-    hours = request.args.get('hours', 24, type=int)
-    historical_data = get_historical_data(hours=hours)
+    hours = request_hours()
+    history = timeseries_store.last(hours * 60)
     
-    trading_analysis = data_generator.analyze_energy_trading(historical_data)
-    optimal_times = ml_manager.predict_optimal_trading_times(historical_data)
+    trading_analysis = data_generator.analyze_energy_trading(history)
+    optimal_times = energy_analytics.trading_times_from_hours(rollup_store.group(*rollup_store.recent(hours), 'hour'))
     
     return jsonify({
         'trading_opportunities': [{
@@ -243,12 +402,11 @@ def api_energy_trading():
 @login_required
 def api_ml_predictions():
     current_data = get_current_data()
-    historical_data = get_historical_data(hours=24)
     
     try:
         # Get ML predictions
-        fault_probability = ml_manager.predict_fault_probability(current_data)
-        performance_analysis = ml_manager.analyze_performance_efficiency(historical_data)
+        fault_probability = predict_fault_probability(current_data)
+        performance_analysis = energy_analytics.performance_from_summary(rollup_store.summary(*rollup_store.recent(24)))
         
         return jsonify({
             'fault_probability': fault_probability,
@@ -263,6 +421,123 @@ def api_ml_predictions():
             'recommendations': []
         })
 
+@app.route('/api/ml-predictions/batch', methods=['POST'])
+@login_required
+def api_ml_predictions_batch():
+    """Fault probabilities for many readings (e.g. one per site) in one forward pass"""
+    readings = (request.get_json(silent=True) or {}).get('readings')
+    if not isinstance(readings, list) or not readings:
+        return jsonify({'success': False, 'error': 'Provide a non-empty "readings" list'}), 400
+    if len(readings) > inference_engine.max_batch_size:
+        return jsonify({
+            'success': False,
+            'error': f'At most {inference_engine.max_batch_size} readings per request'
+        }), 413
+    if not has_fault_model():
+        return jsonify({'success': False, 'error': 'No trained fault detection model is available'}), 503
+    
+    try:
+        probabilities = predict_fault_probability_batch(readings)
+        return jsonify({'success': True, 'fault_probabilities': [float(p) for p in probabilities]})
+    except (KeyError, TypeError, ValueError) as e:
+        return jsonify({'success': False, 'error': f'Invalid reading: {e}'}), 400
+
+def admin_required(view):
+    """Restrict an API route to admin accounts"""
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        if not current_user.is_admin:
+            return jsonify({'success': False, 'error': 'Admin access required'}), 403
+        return view(*args, **kwargs)
+    return wrapper
+
+@app.route('/api/ml/train', methods=['POST'])
+@login_required
+@admin_required
+def api_ml_train():
+    """Retrain models on recent history in a background process"""
+    data = request.get_json(silent=True) or {}
+    models = data.get('models') or list(TRAINABLE_MODELS)
+    unknown = [name for name in models if name not in TRAINABLE_MODELS]
+    if unknown:
+        return jsonify({'success': False, 'error': f'Cannot train: {", ".join(map(str, unknown))}'}), 400
+    
+    try:
+        hours = int(data.get('hours', 7 * 24))
+        options = {key: int(data[key]) for key in ('epochs', 'batch_size', 'patience') if key in data}
+    except (TypeError, ValueError):
+        return jsonify({'success': False, 'error': 'hours, epochs, batch_size and patience must be integers'}), 400
+    
+    history = timeseries_store.last(hours * 60)
+    if len(history['timestamp']) < 100:
+        return jsonify({'success': False, 'error': 'Not enough history to train on'}), 400
+    
+    job_id = training_jobs.start(models, history, options)
+    if job_id is None:
+        return jsonify({'success': False, 'error': 'A training job is already running'}), 409
+    return jsonify({'success': True, 'job_id': job_id, 'status': 'queued'}), 202
+
+@app.route('/api/ml/train')
+@login_required
+@admin_required
+def api_ml_train_jobs():
+    return jsonify({'jobs': training_jobs.list_jobs()})
+
+@app.route('/api/ml/train/<job_id>')
+@login_required
+@admin_required
+def api_ml_train_status(job_id):
+    """Progress of a training job; serving switches to its models once it completes"""
+    job = training_jobs.status(job_id)
+    if not job:
+        return jsonify({'success': False, 'error': 'Training job not found'}), 404
+    if training_jobs.take_completed(job_id):
+        refresh_models()
+        job['serving_versions'] = inference_engine.versions
+    return jsonify(job)
+
+def refresh_models():
+    """Pick up registry activations now instead of at the next periodic check"""
+    inference_engine.refresh(force=True)
+    if 'models.ml_models' in sys.modules:
+        get_ml_manager().refresh(force=True)
+
+@app.route('/api/ml/models')
+@login_required
+def api_ml_models():
+    """Registry versions with their metadata, and the versions this worker serves"""
+    return jsonify({
+        'models': model_registry.describe(MODEL_NAMES),
+        'serving_versions': inference_engine.versions
+    })
+
+@app.route('/api/ml/models/<name>/activate', methods=['POST'])
+@login_required
+@admin_required
+def api_ml_activate_model(name):
+    if name not in MODEL_NAMES:
+        return jsonify({'success': False, 'error': 'Unknown model'}), 404
+    try:
+        version = int((request.get_json(silent=True) or {}).get('version'))
+        model_registry.activate(name, version, validate=inference_engine.validate)
+    except (TypeError, ValueError) as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+    refresh_models()
+    return jsonify({'success': True, 'model': name, 'version': version})
+
+@app.route('/api/ml/models/<name>/rollback', methods=['POST'])
+@login_required
+@admin_required
+def api_ml_rollback_model(name):
+    if name not in MODEL_NAMES:
+        return jsonify({'success': False, 'error': 'Unknown model'}), 404
+    try:
+        version = model_registry.rollback(name, validate=inference_engine.validate)
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 409
+    refresh_models()
+    return jsonify({'success': True, 'model': name, 'version': version})
+
 @app.route('/api/alerts')
 @login_required
 def api_alerts():
@@ -302,23 +577,62 @@ def api_mark_alert_read(alert_id):
     return jsonify({'success': success})
 
 # Chart generation routes
+def cached_chart(chart_name):
+    """Serve a chart route from chart_cache, rebuilding at most once per minute bucket"""
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            hours = request_hours()
+            key = chart_cache.make_key(chart_name, hours, current_user.grid_id)
+            body = chart_cache.get_or_build(key, lambda: view(*args, **kwargs))
+            if not isinstance(body, str):
+                return body
+            response = make_response(body)
+            response.headers['Cache-Control'] = f'private, max-age={chart_cache.seconds_left_in_bucket()}'
+            return response
+        return wrapper
+    return decorator
+
+def get_chart_frame(hours, columns):
+    """Chart data for the last `hours`: raw minutes, or a rollup min/max envelope once the point budget is coarser"""
+    import pandas as pd
+    
+    start, stop = rollup_store.recent(hours)
+    level, buckets = rollup_store.query(start, stop - 1, hours * 60 // DEFAULT_POINT_BUDGET)
+    if buckets is None:
+        return pd.DataFrame({'timestamp': pd.to_datetime([]), **{column: [] for column in columns}})
+    if level == 'minute':
+        df = pd.DataFrame({'timestamp': pd.to_datetime(buckets['timestamp'])})
+        for column in columns:
+            df[column] = buckets[f'{column}_mean']
+        return df
+    
+    # Bucket means would flatten the spikes and dips LTTB is there to keep, so each
+    # bucket becomes two rows: its minimum and maximum, in the order they occurred
+    minutes = next(rollup.minutes for rollup in rollup_store.levels if rollup.name == level)
+    middle = buckets['timestamp'] + np.timedelta64(minutes // 2, 'm')
+    df = pd.DataFrame({'timestamp': pd.to_datetime(np.column_stack([buckets['timestamp'], middle]).ravel())})
+    for column in columns:
+        lows, highs = buckets[f'{column}_min'], buckets[f'{column}_max']
+        max_first = buckets[f'{column}_max_at'] < middle
+        df[column] = np.column_stack([np.where(max_first, highs, lows), np.where(max_first, lows, highs)]).ravel()
+    return df
+
 @app.route('/api/charts/power-overview')
 @login_required
+@cached_chart('power-overview')
 def api_chart_power_overview():
-    hours = request.args.get('hours', 24, type=int)
-    historical_data = get_historical_data(hours=hours)
+    import plotly.graph_objs as go
+    import plotly.utils
+    import pandas as pd
+    
+    hours = request_hours()
     
     # Prepare data for chart
-    df = pd.DataFrame(historical_data)
-    df['timestamp'] = pd.to_datetime(df['timestamp'])
+    df = get_chart_frame(hours, ['solar_power', 'wind_power', 'total_generation', 'consumption'])
     
-    # Smart sampling based on time range
-    if hours <= 6:
-        df_sampled = df.iloc[::5]  # Every 5 minutes for detailed view
-    elif hours <= 24:
-        df_sampled = df.iloc[::10]  # Every 10 minutes
-    else:
-        df_sampled = df.iloc[::30]  # Every 30 minutes for longer periods
+    # Fixed point budget with LTTB so peaks and fault dips survive any time range
+    df_sampled = downsample_frame(df, 'timestamp', ['solar_power', 'wind_power', 'total_generation', 'consumption'])
     
     fig = go.Figure()
     
@@ -519,8 +833,13 @@ def api_chart_power_overview():
 
 @app.route('/api/charts/sun-intensity-correlation')
 @login_required
+@cached_chart('sun-intensity-correlation')
 def api_chart_sun_intensity():
-    hours = request.args.get('hours', 24, type=int)
+    import plotly.graph_objs as go
+    import plotly.utils
+    import pandas as pd
+    
+    hours = request_hours()
     historical_data = get_historical_data(hours=hours)
     
     # Filter for meaningful daylight data
@@ -532,13 +851,8 @@ def api_chart_sun_intensity():
     df = pd.DataFrame(daylight_data)
     df['timestamp'] = pd.to_datetime(df['timestamp'])
     
-    # Smart sampling based on time range
-    if hours <= 6:
-        df_sampled = df.iloc[::5]  # Every 5 minutes for detailed view
-    elif hours <= 24:
-        df_sampled = df.iloc[::10]  # Every 10 minutes
-    else:
-        df_sampled = df.iloc[::30]  # Every 30 minutes for longer periods
+    # Fixed point budget with LTTB so efficiency drops survive any time range
+    df_sampled = downsample_frame(df, 'timestamp', ['sun_intensity', 'solar_power'])
     
     # Calculate efficiency and machine health indicators
     df_sampled = df_sampled.copy()
@@ -741,20 +1055,18 @@ def api_chart_sun_intensity():
 
 @app.route('/api/charts/storage-status')
 @login_required
+@cached_chart('storage-status')
 def api_chart_storage():
-    hours = request.args.get('hours', 24, type=int)
-    historical_data = get_historical_data(hours=hours)
+    import plotly.graph_objs as go
+    import plotly.utils
+    import pandas as pd
     
-    df = pd.DataFrame(historical_data)
-    df['timestamp'] = pd.to_datetime(df['timestamp'])
+    hours = request_hours()
     
-    # Smart sampling based on time range
-    if hours <= 6:
-        df_sampled = df.iloc[::8]   # Every 8 minutes for detailed view
-    elif hours <= 24:
-        df_sampled = df.iloc[::15]  # Every 15 minutes
-    else:
-        df_sampled = df.iloc[::30]  # Every 30 minutes for longer periods
+    df = get_chart_frame(hours, ['storage_percentage', 'net_power', 'grid_export', 'grid_import'])
+    
+    # Fixed point budget with LTTB so battery lows and grid spikes survive any time range
+    df_sampled = downsample_frame(df, 'timestamp', ['storage_percentage', 'net_power', 'grid_export', 'grid_import'])
     
     fig = go.Figure()
     
@@ -940,71 +1252,133 @@ def user_management_page():
     return render_template('user_management.html')
 
 # WebSocket events for real-time updates
+# One background task builds a snapshot per tick and broadcasts it to a Socket.IO
+# room per grid, so per-tick work does not grow with the number of open dashboards.
+# New-alert counts are per user and go to a room per user as alerts_update.
+# Every worker runs the loop, but only the holder of the broadcast lease ticks; the
+# client registry and latest payload live in shared state.
+BROADCAST_INTERVAL_SECONDS = int(os.environ.get('BROADCAST_INTERVAL_SECONDS', 60))
+broadcast_lock = threading.Lock()
+broadcast_task_started = False
+
+def build_realtime_snapshot():
+    """Build the live reading shared by every connected dashboard for this tick"""
+    if not is_grid_connected():
+        # Use last known data when disconnected
+        current_data = get_cached_reading() or get_current_data()
+        current_data['timestamp'] = datetime.now()
+        return current_data
+    
+    current_data = get_current_data()
+    current_data['timestamp'] = datetime.now()
+    
+    # Add small random fluctuations (±2-5%) to simulate real sensor readings
+    base_solar = current_data.get('solar_power', 0)
+    base_wind = current_data.get('wind_power', 0)
+    base_consumption = current_data.get('consumption', 0)
+    if base_solar > 0:
+        current_data['solar_power'] = max(0, base_solar * random.uniform(0.95, 1.05))
+    if base_wind > 0:
+        current_data['wind_power'] = max(0, base_wind * random.uniform(0.92, 1.08))
+    if base_consumption > 0:
+        current_data['consumption'] = max(800, base_consumption * random.uniform(0.98, 1.02))
+    
+    # Recalculate dependent values
+    current_data['total_generation'] = current_data['solar_power'] + current_data['wind_power']
+    current_data['net_power'] = current_data['total_generation'] - current_data['consumption']
+    
+    # Battery simulation with more realistic behavior
+    storage_change = (current_data['net_power'] / 10000) * 5  # Rough charge/discharge rate
+    current_storage = current_data.get('storage_percentage', 50)
+    new_storage = max(0, min(100, current_storage + storage_change + random.uniform(-0.2, 0.2)))
+    current_data['storage_percentage'] = round(new_storage, 1)
+    current_data['storage_kwh'] = round((new_storage / 100) * 50, 1)  # Assuming 50kWh capacity
+    
+    # Store current data for when disconnected
+    cache_reading(current_data)
+    return current_data
+
+def build_update_payload(current_data, new_alerts=0):
+    """Serialize a snapshot into the data_update event payload"""
+    return {
+        'data': serialize_reading(current_data),
+        'timestamp': datetime.now().isoformat(),
+        'new_alerts': new_alerts,
+        'grid_connected': is_grid_connected()
+    }
+
+def get_latest_broadcast():
+    """Most recent broadcast payload from any worker, or a fresh one"""
+    return shared_state.get('latest_broadcast') or build_update_payload(build_realtime_snapshot())
+
+def user_room(user_id):
+    """Socket.IO room holding every connection of one user"""
+    return f'user:{user_id}'
+
+def broadcast_tick():
+    """Compute one snapshot and push it to every grid room with connected clients"""
+    current_data = build_realtime_snapshot()
+    latest_broadcast = build_update_payload(current_data)
+    shared_state.set('latest_broadcast', latest_broadcast)
+    
+    # Group connected users by grid so each user's alerts are analyzed once per tick
+    grids = {}
+    for grid_id, user_id in shared_state.clients():
+        grids.setdefault(grid_id, set()).add(user_id)
+    
+    for grid_id, user_ids in grids.items():
+        socketio.emit('data_update', latest_broadcast, to=grid_id)
+        if not latest_broadcast['grid_connected']:
+            continue
+        # Alert counts are per user, so they go to each user's own room
+        for user_id in user_ids:
+            new_alerts = len(alert_analyzer.analyze_and_create_alerts(current_data, user_id=user_id))
+            if new_alerts:
+                socketio.emit('alerts_update', {'new_alerts': new_alerts}, to=user_room(user_id))
+
+def broadcast_loop():
+    """Background task: broadcast a fresh snapshot every BROADCAST_INTERVAL_SECONDS"""
+    while True:
+        try:
+            # The lease outlives a missed tick, so leadership only moves if its holder stops
+            if (shared_state.has_clients()
+                    and shared_state.try_acquire_lease('broadcast', BROADCAST_INTERVAL_SECONDS * 3)):
+                broadcast_tick()
+        except Exception as e:
+            print(f"Real-time broadcast error: {e}")
+        socketio.sleep(BROADCAST_INTERVAL_SECONDS)
+
+def ensure_broadcast_task():
+    """Start the broadcast loop the first time a client connects"""
+    global broadcast_task_started
+    with broadcast_lock:
+        if broadcast_task_started:
+            return
+        broadcast_task_started = True
+    socketio.start_background_task(broadcast_loop)
+
 @socketio.on('connect')
 @login_required
 def handle_connect():
     print(f'User {current_user.username} connected to WebSocket')
+    join_room(current_user.grid_id)
+    join_room(user_room(current_user.id))
+    shared_state.add_client(request.sid, current_user.grid_id, current_user.id)
+    ensure_broadcast_task()
     emit('status', {'msg': 'Connected to real-time energy monitoring'})
+    
+    # Send the latest snapshot right away instead of waiting for the next tick
+    emit('data_update', get_latest_broadcast())
+
+@socketio.on('disconnect')
+def handle_disconnect():
+    shared_state.remove_client(request.sid)
 
 @socketio.on('request_data_update')
 @login_required
 def handle_data_request():
-    global grid_connected, current_data_cache
-    
-    if grid_connected:
-        # Generate fresh current data with enhanced randomness
-        current_data = get_current_data()
-        
-        # Add some real-time variation to make it feel more alive
-        current_data['timestamp'] = datetime.now()
-        
-        # Enhanced random variations for demonstration
-        base_solar = current_data.get('solar_power', 0)
-        base_wind = current_data.get('wind_power', 0)
-        base_consumption = current_data.get('consumption', 0)
-        
-        # Add small random fluctuations (±2-5%) to simulate real sensor readings
-        if base_solar > 0:
-            current_data['solar_power'] = max(0, base_solar * random.uniform(0.95, 1.05))
-        if base_wind > 0:
-            current_data['wind_power'] = max(0, base_wind * random.uniform(0.92, 1.08))
-        if base_consumption > 0:
-            current_data['consumption'] = max(800, base_consumption * random.uniform(0.98, 1.02))
-        
-        # Recalculate dependent values
-        current_data['total_generation'] = current_data['solar_power'] + current_data['wind_power']
-        current_data['net_power'] = current_data['total_generation'] - current_data['consumption']
-        
-        # Battery simulation with more realistic behavior
-        storage_change = (current_data['net_power'] / 10000) * 5  # Rough charge/discharge rate
-        current_storage = current_data.get('storage_percentage', 50)
-        new_storage = max(0, min(100, current_storage + storage_change + random.uniform(-0.2, 0.2)))
-        current_data['storage_percentage'] = round(new_storage, 1)
-        current_data['storage_kwh'] = round((new_storage / 100) * 50, 1)  # Assuming 50kWh capacity
-        
-        # Check for new alerts with enhanced analysis
-        alerts_created = alert_analyzer.analyze_and_create_alerts(current_data, user_id=current_user.id)
-        
-        # Store current data for when disconnected
-        current_data_cache = current_data.copy()
-    else:
-        # Use last known data when disconnected
-        current_data = current_data_cache if current_data_cache else get_current_data()
-        current_data['timestamp'] = datetime.now()
-        alerts_created = []
-    
-    # Convert datetime objects to strings for JSON serialization
-    serializable_data = current_data.copy()
-    if 'timestamp' in serializable_data:
-        timestamp = serializable_data['timestamp']
-        serializable_data['timestamp'] = timestamp.isoformat() if hasattr(timestamp, 'isoformat') else str(timestamp)
-    
-    emit('data_update', {
-        'data': serializable_data,
-        'timestamp': datetime.now().isoformat(),
-        'new_alerts': len(alerts_created),
-        'grid_connected': grid_connected
-    })
+    """Manual refresh: resend the latest broadcast snapshot to this client only"""
+    emit('data_update', get_latest_broadcast())
 
 def generate_recommendations(current_data, performance_analysis):
     """Generate recommendations based on current data and performance analysis"""
@@ -1142,25 +1516,40 @@ def api_import_users():
         # Get overwrite preference
         overwrite_existing = request.form.get('overwrite_existing', 'false').lower() == 'true'
         
-        # Read file content
-        file_content = file.read().decode('utf-8')
-        
-        # Determine file type and import
+        # Determine file type
         if file.filename.lower().endswith('.csv'):
-            result = user_manager.import_users_from_csv(file_content, overwrite_existing)
+            file_format = 'csv'
         elif file.filename.lower().endswith('.json'):
-            result = user_manager.import_users_from_json(file_content, overwrite_existing)
+            file_format = 'json'
         else:
             return jsonify({
                 'success': False, 
                 'error': 'Invalid file type. Only CSV and JSON files are supported.'
             })
         
-        return jsonify(result)
+        # Spool the upload to disk and import it in the background; clients poll the job
+        fd, upload_path = tempfile.mkstemp(prefix='ecoshakti_import_', suffix=f'.{file_format}')
+        with os.fdopen(fd, 'wb') as f:
+            file.save(f)
+        
+        job = user_manager.start_import_job(
+            upload_path, file_format, overwrite_existing,
+            socketio.start_background_task, socketio.sleep
+        )
+        return jsonify({'success': True, 'job_id': job.id, 'status': job.status}), 202
         
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)})
 
+@app.route('/api/users/import/<job_id>')
+@login_required
+def api_import_status(job_id):
+    """Progress of a background user import"""
+    job = user_manager.get_import_job(job_id)
+    if not job:
+        return jsonify({'success': False, 'error': 'Import job not found'}), 404
+    return jsonify(job.to_dict())
+
 @app.route('/api/users/delete/<user_id>', methods=['DELETE'])
 @login_required
 def api_delete_user(user_id):
@@ -1247,7 +1636,7 @@ def api_get_profile():
 @login_required
 def api_grid_status():
     """Get current grid connection status"""
-    global grid_connected
+    grid_connected = is_grid_connected()
     return jsonify({
         'success': True,
         'connected': grid_connected,
@@ -1257,12 +1646,12 @@ def api_grid_status():
 @app.route('/api/grid/toggle', methods=['POST'])
 @login_required
 def api_grid_toggle():
-    """Toggle grid connection status"""
-    global grid_connected
+    """Toggle grid connection status for every worker"""
     try:
         data = request.get_json()
-        new_status = data.get('connect', not grid_connected)
+        new_status = data.get('connect', not is_grid_connected())
         grid_connected = bool(new_status)
+        shared_state.set('grid_connected', grid_connected)
         
         return jsonify({
             'success': True,
@@ -1288,12 +1677,15 @@ def api_chatbot_ask():
                 'error': 'Please provide a question'
             })
         
-        # Process the question and generate response
-        response = process_chatbot_question(question, current_user.id)
+        # Classify once, then process the question and generate response
+        match = chatbot_router.classify(question)
+        response = answer_chatbot_question(question, match.intent)
         
         return jsonify({
             'success': True,
             'response': response,
+            'intent': match.intent,
+            'matched_keyword': match.keyword,
             'timestamp': datetime.now().isoformat()
         })
         
@@ -1313,47 +1705,93 @@ def internal_error(error):
     return render_template('error.html', error_code=500, error_message="Internal server error"), 500
 
 # Chatbot helper functions
-def process_chatbot_question(question, user_id):
+# Chatbot intents in priority order: energy topics first, then general conversation
+CHATBOT_INTENTS = [
+    ('consumption', ['consumption', 'usage', 'used', 'consume', 'consumed', 'consuming', 'energy', 'power', 'kwh', 'watt', 'watts']),
+    ('storage', ['storage', 'battery', 'batteries', 'stored', 'charge', 'charging', 'discharge', 'discharging']),
+    ('generation', ['generation', 'generate', 'generated', 'generating', 'produce', 'produced', 'production', 'solar', 'wind', 'renewable']),
+    ('efficiency', ['efficiency', 'efficient', 'performance', 'status', 'grid', 'health', 'machine', 'fault', 'diagnosis', 'diagnose']),
+    ('trading', ['trading', 'trade', 'export', 'import', 'sell', 'selling', 'buy', 'buying', 'revenue', 'cost']),
+    ('weather', ['weather', 'sun', 'sunny', 'sunlight', 'wind speed', 'intensity', 'temperature']),
+    ('alerts', ['alert', 'warning', 'problem', 'error']),
+    ('comparison', ['compare', 'compared', 'comparison', 'vs', 'versus', 'difference']),
+    ('greeting', ['hello', 'hi', 'hey', 'good morning', 'good afternoon', 'good evening']),
+    ('help', ['help', 'assist', 'support', 'what can you do', 'commands']),
+    ('time', ['time', 'date', 'today', 'now', 'current', 'what day', 'what time']),
+    ('math', ['calculate', 'math', 'plus', 'minus', 'multiply', 'divide', 'equation']),
+    ('technology', ['explain', 'what is', 'how does', 'technology', 'ai', 'artificial intelligence', 'machine learning']),
+    ('thanks', ['thank', 'thanks', 'appreciate', 'good job', 'well done', 'awesome']),
+    ('about', ['who are you', 'what are you', 'about you', 'your name']),
+    ('joke', ['joke', 'funny', 'laugh', 'entertainment', 'fun'])
+]
+
+chatbot_router = IntentRouter(
+    CHATBOT_INTENTS,
+    # Arithmetic needs an operator between numbers, not just a '-' anywhere in the text
+    patterns={'math': r'\d+(?:\.\d+)?\s*[+\-*/]\s*\d+(?:\.\d+)?'}
+)
+
+technology_topics = IntentRouter([
+    ('ai', ['ai', 'artificial intelligence']),
+    ('renewable', ['renewable energy', 'solar', 'wind energy'])
+])
+
+# Grid-data answers are the same for everyone on a grid within a minute, so they are
+# cached per (grid, intent, question, minute) and computed on the chatbot pool
+CHATBOT_CACHED_INTENTS = {'consumption', 'storage', 'generation', 'efficiency', 'trading', 'weather', 'comparison'}
+chatbot_cache = ResponseCache(ttl_seconds=int(os.environ.get('CHATBOT_CACHE_TTL_SECONDS', 60)))
+chatbot_pool = BlockingPool('chatbot', max_workers=int(os.environ.get('CHATBOT_THREADS', 2)))
+
+def answer_chatbot_question(question, intent):
+    """Response for the current user, from the cache for grid-data intents"""
+    user_id = current_user.id
+    if intent not in CHATBOT_CACHED_INTENTS:
+        return process_chatbot_question(question, user_id, intent)
+    
+    key = (current_user.grid_id, intent, ' '.join(tokenize(question)), chatbot_cache.current_bucket())
+    return chatbot_cache.get_or_compute(
+        key, lambda: chatbot_pool.call(process_chatbot_question, question, user_id, intent)
+    )
+
+def process_chatbot_question(question, user_id, intent=None):
     """Process user question and generate intelligent response based on grid data"""
     question_lower = question.lower()
     
-    # Get current and historical data
+    # Current reading and cached daily aggregates (today so far, and yesterday)
     current_data = get_current_data()
-    today_data = get_historical_data(hours=24)
-    yesterday_data = get_historical_data_for_date(datetime.now() - timedelta(days=1))
+    today_metrics = get_daily_metrics(datetime.now())
+    yesterday_metrics = get_daily_metrics(datetime.now() - timedelta(days=1))
     
-    # Calculate aggregated metrics
-    today_metrics = calculate_daily_metrics(today_data)
-    yesterday_metrics = calculate_daily_metrics(yesterday_data) if yesterday_data else {}
+    # Route with the compiled intent index (one pass, whole-word keywords, priority order)
+    intent = intent or chatbot_router.classify(question).intent
     
-    # Check for grid/energy-related questions first
-    if any(word in question_lower for word in ['consumption', 'usage', 'used', 'consume', 'energy', 'power', 'kwh', 'watts']):
+    if intent == 'consumption':
         return handle_consumption_questions(question_lower, current_data, today_metrics, yesterday_metrics)
     
-    elif any(word in question_lower for word in ['storage', 'battery', 'stored', 'charge', 'discharge']):
+    elif intent == 'storage':
         return handle_storage_questions(question_lower, current_data, today_metrics, yesterday_metrics)
     
-    elif any(word in question_lower for word in ['generation', 'generated', 'produce', 'solar', 'wind', 'renewable']):
+    elif intent == 'generation':
         return handle_generation_questions(question_lower, current_data, today_metrics, yesterday_metrics)
     
-    elif any(word in question_lower for word in ['efficiency', 'performance', 'status', 'grid', 'health', 'machine', 'fault', 'diagnosis']):
+    elif intent == 'efficiency':
         return handle_efficiency_questions(question_lower, current_data, today_metrics)
     
-    elif any(word in question_lower for word in ['trading', 'export', 'import', 'sell', 'buy', 'revenue', 'cost']):
+    elif intent == 'trading':
         return handle_trading_questions(question_lower, current_data, today_metrics, yesterday_metrics)
     
-    elif any(word in question_lower for word in ['weather', 'sun', 'wind speed', 'intensity', 'temperature']):
+    elif intent == 'weather':
         return handle_weather_questions(question_lower, current_data, today_metrics)
     
-    elif any(word in question_lower for word in ['alert', 'warning', 'problem', 'fault', 'error']):
+    elif intent == 'alerts':
         return handle_alert_questions(question_lower, user_id)
     
-    elif any(word in question_lower for word in ['compare', 'comparison', 'vs', 'versus', 'difference']):
+    elif intent == 'comparison':
         return handle_comparison_questions(question_lower, today_metrics, yesterday_metrics)
     
     # Handle general non-energy questions
     else:
-        return handle_general_non_energy_questions(question_lower, current_data, today_metrics)
+        return handle_general_non_energy_questions(question_lower, current_data, today_metrics, intent)
 
 def handle_consumption_questions(question, current_data, today_metrics, yesterday_metrics):
     """Handle questions about energy consumption"""
@@ -1361,7 +1799,7 @@ def handle_consumption_questions(question, current_data, today_metrics, yesterda
         consumption = today_metrics.get('total_consumption', 0)
         return f"📊 **Today's Energy Consumption**: {consumption:.2f} kWh\n\n" + \
                f"Current usage rate: {current_data.get('consumption', 0):,.0f} W\n" + \
-               f"Average hourly consumption: {consumption/24:.2f} kWh\n" + \
+               f"Average hourly consumption: {consumption/max(today_metrics.get('hours', 24), 1):.2f} kWh\n" + \
                f"Peak consumption: {today_metrics.get('peak_consumption', 0):,.0f} W"
     
     elif 'yesterday' in question:
@@ -1654,12 +2092,13 @@ def handle_general_questions(question, current_data, today_metrics):
            f"• Total consumed: {today_metrics.get('total_consumption', 0):.2f} kWh\n" + \
            f"• Energy independence: {(today_metrics.get('total_generation', 0) / today_metrics.get('total_consumption', 1) * 100) if today_metrics.get('total_consumption', 0) > 0 else 0:.1f}%"
 
-def handle_general_non_energy_questions(question, current_data, today_metrics):
+def handle_general_non_energy_questions(question, current_data, today_metrics, intent=None):
     """Handle general non-energy questions with intelligent responses"""
     question_lower = question.lower()
+    intent = intent or chatbot_router.classify(question).intent
     
     # Greeting patterns
-    if any(word in question_lower for word in ['hello', 'hi', 'hey', 'good morning', 'good afternoon', 'good evening']):
+    if intent == 'greeting':
         return "👋 **Hello there!** I'm your intelligent Grid AI Assistant!\n\n" + \
                f"I'm here to help you with:\n" + \
                f"🔋 Energy & grid management questions\n" + \
@@ -1669,7 +2108,7 @@ def handle_general_non_energy_questions(question, current_data, today_metrics):
                f"**Quick Tip:** Try asking me about your energy consumption, battery status, or just say 'help' for more options!"
     
     # Help and assistance
-    elif any(word in question_lower for word in ['help', 'assist', 'support', 'what can you do', 'commands']):
+    elif intent == 'help':
         return "🆘 **I'm here to help!** Here's what I can assist you with:\n\n" + \
                f"🔋 **Energy Questions:**\n" + \
                f"• 'What's my consumption today?'\n" + \
@@ -1685,7 +2124,7 @@ def handle_general_non_energy_questions(question, current_data, today_metrics):
                f"Just ask me anything! I'll do my best to help! 🤖"
     
     # Time and date questions
-    elif any(word in question_lower for word in ['time', 'date', 'today', 'now', 'current', 'what day', 'what time']):
+    elif intent == 'time':
         now = datetime.now()
         return f"🕐 **Current Time & Date Information:**\n\n" + \
                f"📅 Date: {now.strftime('%A, %B %d, %Y')}\n" + \
@@ -1695,7 +2134,7 @@ def handle_general_non_energy_questions(question, current_data, today_metrics):
                f"💡 **Bonus:** Your grid has been active for {(now.hour * 60 + now.minute)} minutes today!"
     
     # Math and calculations
-    elif any(word in question_lower for word in ['calculate', 'math', 'plus', 'minus', 'multiply', 'divide', '+', '-', '*', '/', 'equation']):
+    elif intent == 'math':
         # Simple math detection
         import re
         math_pattern = r'(\d+(?:\.\d+)?)\s*([+\-*/])\s*(\d+(?:\.\d+)?)'
@@ -1728,17 +2167,10 @@ def handle_general_non_energy_questions(question, current_data, today_metrics):
                    f"• 'What's 50 * 2?'\n\n" + \
                    f"I can also relate numbers to your energy system for better context!"
     
-    # Weather (general, not grid-related)
-    elif 'weather' in question_lower and not any(word in question_lower for word in ['solar', 'generation', 'power', 'intensity']):
-        return "🌤️ **Weather Discussion:**\n\n" + \
-               f"I don't have access to real weather data, but I can see how weather affects your renewable energy system!\n\n" + \
-               f"🌞 **Current sun intensity:** {current_data.get('sun_intensity', 0):.1f}%\n" + \
-               f"💨 **Wind conditions:** {current_data.get('wind_speed', 0):.1f} m/s\n\n" + \
-               f"For detailed weather forecasts, I recommend checking your local weather service. Meanwhile, I can help you understand how weather impacts your energy generation!"
-    
     # Technology explanations
-    elif any(word in question_lower for word in ['explain', 'what is', 'how does', 'technology', 'ai', 'artificial intelligence', 'machine learning']):
-        if any(word in question_lower for word in ['ai', 'artificial intelligence']):
+    elif intent == 'technology':
+        topic = technology_topics.match(question_lower)
+        if topic and topic.intent == 'ai':
             return "🤖 **About Artificial Intelligence:**\n\n" + \
                    f"AI is technology that enables machines to perform tasks that typically require human intelligence!\n\n" + \
                    f"🧠 **In this system, I use AI for:**\n" + \
@@ -1748,7 +2180,7 @@ def handle_general_non_energy_questions(question, current_data, today_metrics):
                    f"• Detecting system anomalies\n\n" + \
                    f"💡 **Fun fact:** I process your grid data in real-time to give you personalized insights!"
         
-        elif any(word in question_lower for word in ['renewable energy', 'solar', 'wind energy']):
+        elif topic and topic.intent == 'renewable':
             return "🌱 **Renewable Energy Explained:**\n\n" + \
                    f"Renewable energy comes from natural sources that replenish themselves!\n\n" + \
                    f"☀️ **Solar Power:** Converts sunlight into electricity using photovoltaic panels\n" + \
@@ -1767,7 +2199,7 @@ def handle_general_non_energy_questions(question, current_data, today_metrics):
                    f"What specific technology would you like to learn about?"
     
     # Appreciation and thanks
-    elif any(word in question_lower for word in ['thank', 'thanks', 'appreciate', 'good job', 'well done', 'awesome']):
+    elif intent == 'thanks':
         return "😊 **You're very welcome!**\n\n" + \
                f"I'm glad I could help! It's my pleasure to assist you with your renewable energy system and answer your questions.\n\n" + \
                f"🔋 **Current system status:** Everything looks good!\n" + \
@@ -1775,7 +2207,7 @@ def handle_general_non_energy_questions(question, current_data, today_metrics):
                f"Feel free to ask me anything else! 🤖✨"
     
     # Who are you / about
-    elif any(word in question_lower for word in ['who are you', 'what are you', 'about you', 'your name']):
+    elif intent == 'about':
         return "🤖 **About Me - Your Grid AI Assistant:**\n\n" + \
                f"I'm an intelligent AI assistant specifically designed for renewable energy systems!\n\n" + \
                f"🎯 **My Purpose:**\n" + \
@@ -1791,7 +2223,7 @@ def handle_general_non_energy_questions(question, current_data, today_metrics):
                f"💚 I'm here to make your renewable energy experience better!"
     
     # Fun and entertainment
-    elif any(word in question_lower for word in ['joke', 'funny', 'laugh', 'entertainment', 'fun']):
+    elif intent == 'joke':
         jokes = [
             "Why don't solar panels ever get tired? Because they're always charged up! ⚡😄",
             "What did the wind turbine say to the solar panel? 'You're really bright!' ☀️💨",
@@ -1825,46 +2257,32 @@ def calculate_daily_metrics(data_points):
     if not data_points:
         return {}
     
-    df = pd.DataFrame(data_points)
-    
-    return {
-        'total_consumption': (df['consumption'].sum() / 1000) / 60,  # Convert to kWh
-        'total_generation': ((df['solar_power'] + df['wind_power']).sum() / 1000) / 60,
-        'total_solar_generation': (df['solar_power'].sum() / 1000) / 60,
-        'total_wind_generation': (df['wind_power'].sum() / 1000) / 60,
-        'total_grid_export': (df['grid_export'].sum() / 1000) / 60,
-        'total_grid_import': (df['grid_import'].sum() / 1000) / 60,
-        'avg_consumption': df['consumption'].mean(),
-        'avg_generation': (df['solar_power'] + df['wind_power']).mean(),
-        'avg_storage': df['storage_percentage'].mean(),
-        'max_storage': df['storage_percentage'].max(),
-        'min_storage': df['storage_percentage'].min(),
-        'peak_consumption': df['consumption'].max(),
-        'peak_generation': (df['solar_power'] + df['wind_power']).max()
-    }
+    return metrics_from_data(data_points)
+
+def get_daily_metrics(day):
+    """Daily metrics for a date from the cache; past days the store no longer covers are generated once"""
+    metrics = daily_metrics.get(day)
+    if metrics is None:
+        if day.date() >= datetime.now().date():
+            return {}
+        metrics = daily_metrics.put(day, metrics_from_data(get_historical_arrays_for_date(day)))
+    return metrics
 
 def get_historical_data_for_date(target_date):
     """Get historical data for a specific date"""
     try:
-        # For demo purposes, generate data for the target date
-        # In a real system, this would query actual historical data
-        start_time = target_date.replace(hour=0, minute=0, second=0, microsecond=0)
-        end_time = start_time + timedelta(hours=24)
-        
-        data_points = []
-        current_time = start_time
-        
-        while current_time < end_time:
-            # Generate historical data point
-            data_point = data_generator.generate_historical_point(current_time)
-            data_points.append(data_point)
-            current_time += timedelta(minutes=1)
-        
-        return data_points
+        return RenewableEnergyDataGenerator.arrays_to_records(get_historical_arrays_for_date(target_date))
     except Exception as e:
         print(f"Error getting historical data for date: {e}")
         return []
 
+def get_historical_arrays_for_date(target_date):
+    """Columnar minute data for a date; seeded, so a date always gets the same series"""
+    # For demo purposes, generate data for the target date
+    # In a real system, this would query actual historical data
+    start_time = target_date.replace(hour=0, minute=0, second=0, microsecond=0)
+    return data_generator.generate_historical_range(start_time, start_time + timedelta(days=1), seed=HISTORICAL_SEED)
+
 def initialize_app():
     """Initialize the application for production deployment"""
     print("Initializing EcoShakti monitoring system...")
@@ -1873,7 +2291,7 @@ def initialize_app():
     # Only initialize essential components
     try:
         # Just verify data generator works
-        test_data = data_generator.generate_data_point()
+        test_data = get_current_data()
         print(f"Data generator working: {test_data.get('timestamp', 'OK')}")
         print("EcoShakti basic initialization complete!")
     except Exception as e:
@@ -0,0 +1,16 @@
+#!/usr/bin/env python3
+"""
+Publish models trained before the registry existed (ml_models/*.pth) as registry versions
+"""
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from models.ml_models import ml_manager
+
+if __name__ == '__main__':
+    published = ml_manager.publish_models()
+    if published:
+        print(f"Published: {', '.join(published)}")
+    else:
+        print("No unpublished trained models (already in the registry, or scalers are not fitted)")
@@ -8,7 +8,11 @@ bind = f"0.0.0.0:{port}"
 backlog = 2048
 
 # Worker processes - Use sync worker to avoid eventlet issues
-workers = 1
+# More than one worker needs shared Socket.IO delivery (SOCKETIO_MESSAGE_QUEUE=sqlite or a
+# redis:// URL). Gunicorn has no sticky sessions, so clients then connect websocket-only.
+# Workers share grid state, the last reading, broadcasts and the time-series history,
+# which one worker at a time produces into the shared SQLite file (SHARED_STATE_PATH).
+workers = int(os.environ.get('WEB_CONCURRENCY', 1))
 worker_class = "gevent"  # Use gevent instead of eventlet for better compatibility
 worker_connections = 1000
 timeout = 30
@@ -0,0 +1,67 @@
+# Torch-free analytics, shared by the ML manager and the serving routes. Both work on
+# rollup stats (utils.rollups), so the routes can answer from precomputed buckets while
+# callers holding raw readings get the same results from their minutes.
+
+import numpy as np
+
+from utils.rollups import finalize, group_stats, minute_stats, summarize
+
+def _isoformat(minute):
+    return minute.astype('datetime64[s]').item().isoformat()
+
+def analyze_performance_efficiency(data):
+    """Analyze system performance and efficiency"""
+    return performance_from_summary(finalize(summarize(minute_stats(data))))
+
+def performance_from_summary(summary):
+    """Performance analysis from a finalized one-row rollup summary; empty without data"""
+    if summary is None or not summary['count'][0]:
+        return {}
+    count = int(summary['count'][0])
+    overall_first = summary['overall_efficiency_first'][0]
+    overall_last = summary['overall_efficiency_last'][0]
+
+    return {
+        'avg_solar_efficiency': float(summary['solar_efficiency_mean'][0]),
+        'avg_wind_efficiency': float(summary['wind_efficiency_mean'][0]),
+        'avg_overall_efficiency': float(summary['overall_efficiency_mean'][0]),
+        # Mean of consecutive differences telescopes to (last - first) / (n - 1)
+        'efficiency_trend': float((overall_last - overall_first) / (count - 1)) if count > 1 else float('nan'),
+        'peak_generation_hour': _isoformat(summary['total_generation_max_at'][0]),
+        'peak_consumption_hour': _isoformat(summary['consumption_max_at'][0]),
+        'energy_independence_score': float(min(1.0, summary['total_generation_sum'][0] / summary['consumption_sum'][0]))
+    }
+
+def predict_optimal_trading_times(data):
+    """Predict optimal times for energy trading"""
+    stats = minute_stats(data)
+    return trading_times_from_hours(finalize(group_stats(stats, stats['start'] // 60 % 24), keyed=True))
+
+def trading_times_from_hours(hours):
+    """Trading recommendations from finalized rollup stats grouped by hour of day"""
+    if hours is None:
+        return {'best_sell_hours': [], 'best_buy_hours': [], 'hourly_patterns': []}
+    net_energy = hours['net_energy_mean']
+    storage = hours['storage_percentage_mean']
+
+    # Best selling hours: high surplus, high storage; best buying hours: low generation, low storage
+    sell_scores = net_energy * storage / 100
+    buy_scores = -net_energy * (100 - storage) / 100
+
+    return {
+        'best_sell_hours': [int(hours['key'][i]) for i in np.argsort(-sell_scores, kind='stable')[:3]],
+        'best_buy_hours': [int(hours['key'][i]) for i in np.argsort(-buy_scores, kind='stable')[:3]],
+        'hourly_patterns': [
+            {
+                'hour': int(hours['key'][i]),
+                'avg_net_energy': float(net_energy[i]),
+                'net_energy_std': float(hours['net_energy_std'][i]),
+                'avg_storage': float(storage[i]),
+                'total_grid_export': float(hours['grid_export_sum'][i]),
+                'total_grid_import': float(hours['grid_import_sum'][i]),
+                'sell_score': float(sell_scores[i]),
+                'buy_score': float(buy_scores[i])
+            }
+            for i in range(len(hours['key']))
+        ]
+    }
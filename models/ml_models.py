@@ -1,12 +1,23 @@
 import torch
 import torch.nn as nn
 import torch.optim as optim
+from torch.utils.data import DataLoader, TensorDataset
 import numpy as np
-import pandas as pd
 from sklearn.preprocessing import StandardScaler, MinMaxScaler
 from sklearn.model_selection import train_test_split
+import copy
 import pickle
 import os
+import time
+
+# Shared with the NumPy inference engine so training and serving see the same features
+from models.numpy_inference import (
+    FEATURE_NAMES, MAX_BATCH_SIZE, MODEL_NAMES, REFRESH_SECONDS, batch_column, batch_timestamps,
+    check_feature_schema, solar_features, wind_features, fault_features, consumption_features
+)
+from models.model_registry import model_registry
+from models import energy_analytics
+
 
 class SolarPowerPredictor(nn.Module):
     """Neural network model for predicting solar power generation"""
@@ -93,307 +104,397 @@ class EnergyConsumptionPredictor(nn.Module):
         x = self.fc4(x)
         return x
 
+# Network class behind each registry model name
+MODEL_CLASSES = {
+    'solar_predictor': SolarPowerPredictor,
+    'wind_predictor': WindPowerPredictor,
+    'fault_detector': FaultDetectionModel,
+    'consumption_predictor': EnergyConsumptionPredictor
+}
+
+def _layers(model):
+    return [model.fc1, model.fc2, model.fc3, model.fc4]
+
+def bundle_arrays(model, scaler):
+    """A model's layer weights and scaler parameters as plain arrays, or None if the scaler is unfitted.
+    
+    This is the registry bundle format, which NumpyInferenceEngine serves without
+    torch or sklearn.
+    """
+    if not hasattr(scaler, 'mean_'):
+        return None
+    
+    layers = _layers(model)
+    arrays = {
+        'layer_count': np.array(len(layers)),
+        'scaler_mean': scaler.mean_,
+        'scaler_scale': scaler.scale_,
+        'output': np.array('sigmoid' if isinstance(model, FaultDetectionModel) else 'linear')
+    }
+    for i, layer in enumerate(layers):
+        # Stored as (in, out) so inference is a plain x @ weight + bias
+        arrays[f'weight_{i}'] = layer.weight.detach().cpu().numpy().T
+        arrays[f'bias_{i}'] = layer.bias.detach().cpu().numpy()
+    return arrays
+
+def model_from_arrays(name, arrays):
+    """Rebuild a (torch model, fitted StandardScaler) pair from bundle arrays"""
+    model = MODEL_CLASSES[name]()
+    state = {}
+    for i in range(int(arrays['layer_count'])):
+        state[f'fc{i + 1}.weight'] = torch.from_numpy(np.ascontiguousarray(arrays[f'weight_{i}'].T))
+        state[f'fc{i + 1}.bias'] = torch.from_numpy(np.asarray(arrays[f'bias_{i}']))
+    model.load_state_dict(state)
+    model.eval()
+    
+    scaler = StandardScaler()
+    scaler.mean_ = np.asarray(arrays['scaler_mean'], dtype=float)
+    scaler.scale_ = np.asarray(arrays['scaler_scale'], dtype=float)
+    scaler.var_ = scaler.scale_ ** 2
+    scaler.n_features_in_ = len(scaler.mean_)
+    return model, scaler
+
+def training_range(data):
+    """First and last timestamp and sample count of a training batch"""
+    timestamps = batch_timestamps(data)
+    return {
+        'start': str(timestamps.min()) if len(timestamps) else None,
+        'end': str(timestamps.max()) if len(timestamps) else None,
+        'samples': len(timestamps)
+    }
+
 class RenewableEnergyMLManager:
-    """Manager class for all machine learning models and operations"""
+    """Manager class for all machine learning models and operations.
+    
+    Trained models are published to the model registry. self.models maps each name
+    to its serving (model, scaler) pair and is replaced as a whole on every swap, so
+    a prediction never pairs one version's network with another version's scaler.
+    """
     
-    def __init__(self, model_dir='ml_models'):
+    def __init__(self, model_dir='ml_models', max_batch_size=MAX_BATCH_SIZE, registry=model_registry,
+                 refresh_seconds=REFRESH_SECONDS):
         self.model_dir = model_dir
+        self.max_batch_size = max_batch_size
+        self.registry = registry
+        self.refresh_seconds = refresh_seconds
         os.makedirs(model_dir, exist_ok=True)
         
-        # Initialize models
-        self.solar_predictor = SolarPowerPredictor()
-        self.wind_predictor = WindPowerPredictor()
-        self.fault_detector = FaultDetectionModel()
-        self.consumption_predictor = EnergyConsumptionPredictor()
-        
-        # Initialize scalers
-        self.solar_scaler = StandardScaler()
-        self.wind_scaler = StandardScaler()
-        self.fault_scaler = StandardScaler()
-        self.consumption_scaler = StandardScaler()
+        # Untrained models with unfitted scalers until a version is loaded
+        self.models = {name: (model_class(), StandardScaler()) for name, model_class in MODEL_CLASSES.items()}
+        self.versions = {name: None for name in MODEL_NAMES}
+        self._checked_at = 0.0
         
         self.load_models()
     
     def prepare_solar_features(self, data):
         """Prepare features for solar power prediction"""
-        df = pd.DataFrame(data)
-        
-        # Extract time-based features
-        df['timestamp'] = pd.to_datetime(df['timestamp'])
-        df['hour'] = df['timestamp'].dt.hour
-        df['day_of_year'] = df['timestamp'].dt.dayofyear
-        df['month'] = df['timestamp'].dt.month
-        
-        # Select features
-        features = ['sun_intensity', 'hour', 'day_of_year', 'month', 'storage_percentage']
-        
-        return df[features].values
+        return solar_features(data)
     
     def prepare_wind_features(self, data):
         """Prepare features for wind power prediction"""
-        df = pd.DataFrame(data)
-        
-        # Extract time-based features
-        df['timestamp'] = pd.to_datetime(df['timestamp'])
-        df['hour'] = df['timestamp'].dt.hour
-        df['season'] = (df['timestamp'].dt.month % 12 + 3) // 3
-        
-        # Select features (wind_speed would come from weather data)
-        features = ['wind_speed', 'hour', 'season', 'storage_percentage']
-        
-        return df[features].values
+        return wind_features(data)
     
     def prepare_fault_features(self, data):
         """Prepare features for fault detection"""
-        df = pd.DataFrame(data)
-        
-        # Calculate efficiency ratios and anomalies
-        df['solar_efficiency'] = df['solar_power'] / (df['sun_intensity'] + 1e-8)
-        df['wind_efficiency'] = df['wind_power'] / (df['wind_speed'] + 1e-8)
-        df['generation_ratio'] = df['total_generation'] / (df['consumption'] + 1e-8)
-        df['power_variance'] = df['total_generation'].rolling(window=10, min_periods=1).std().fillna(0)
-        
-        features = ['sun_intensity', 'solar_power', 'wind_speed', 'wind_power', 
-                   'solar_efficiency', 'wind_efficiency', 'generation_ratio', 'power_variance']
-        
-        return df[features].values
+        return fault_features(data)
     
     def prepare_consumption_features(self, data):
         """Prepare features for consumption prediction"""
-        df = pd.DataFrame(data)
-        
-        # Extract time-based features
-        df['timestamp'] = pd.to_datetime(df['timestamp'])
-        df['hour'] = df['timestamp'].dt.hour
-        df['day_of_week'] = df['timestamp'].dt.dayofweek
-        df['is_weekend'] = (df['day_of_week'] >= 5).astype(int)
-        
-        # Rolling averages
-        df['consumption_ma'] = df['consumption'].rolling(window=60, min_periods=1).mean()
-        df['generation_ma'] = df['total_generation'].rolling(window=60, min_periods=1).mean()
-        
-        features = ['hour', 'day_of_week', 'is_weekend', 'consumption_ma', 
-                   'generation_ma', 'storage_percentage']
-        
-        return df[features].values
+        return consumption_features(data)
     
-    def train_solar_predictor(self, data, epochs=100):
-        """Train the solar power prediction model"""
-        X = self.prepare_solar_features(data)
-        y = np.array([d['solar_power'] for d in data]).reshape(-1, 1)
-        
-        # Scale features
-        X_scaled = self.solar_scaler.fit_transform(X)
-        
-        # Convert to tensors
-        X_tensor = torch.FloatTensor(X_scaled)
-        y_tensor = torch.FloatTensor(y)
-        
-        # Split data
-        X_train, X_test, y_train, y_test = train_test_split(
-            X_tensor, y_tensor, test_size=0.2, random_state=42
+    def _train_model(self, name, model, features, targets, criterion, epochs=100, batch_size=256,
+                     patience=10, learning_rate=0.001, validation_split=0.2,
+                     progress=None, checkpoint_path=None):
+        """Mini-batch Adam training with validation-based early stopping.
+        
+        Stops once the validation loss has not improved for `patience` epochs and
+        restores the best weights. The best state is checkpointed to checkpoint_path,
+        and progress(name, epoch, epochs, train_loss, val_loss, best_val_loss) is
+        called after every epoch.
+        """
+        X_train, X_val, y_train, y_val = train_test_split(
+            features, targets, test_size=validation_split, random_state=42
+        )
+        train_loader = DataLoader(
+            TensorDataset(torch.FloatTensor(X_train), torch.FloatTensor(y_train)),
+            batch_size=batch_size, shuffle=True
         )
+        X_val_tensor = torch.FloatTensor(X_val)
+        y_val_tensor = torch.FloatTensor(y_val)
         
-        # Training
-        criterion = nn.MSELoss()
-        optimizer = optim.Adam(self.solar_predictor.parameters(), lr=0.001)
+        optimizer = optim.Adam(model.parameters(), lr=learning_rate)
+        best_val_loss = float('inf')
+        best_state = copy.deepcopy(model.state_dict())
+        epochs_without_improvement = 0
+        epochs_run = 0
         
-        self.solar_predictor.train()
         for epoch in range(epochs):
-            optimizer.zero_grad()
-            outputs = self.solar_predictor(X_train)
-            loss = criterion(outputs, y_train)
-            loss.backward()
-            optimizer.step()
+            model.train()
+            total_loss = 0.0
+            for X_batch, y_batch in train_loader:
+                optimizer.zero_grad()
+                loss = criterion(model(X_batch), y_batch)
+                loss.backward()
+                optimizer.step()
+                total_loss += loss.item() * len(X_batch)
+            train_loss = total_loss / len(X_train)
             
-            if (epoch + 1) % 20 == 0:
-                print(f'Solar Predictor - Epoch [{epoch+1}/{epochs}], Loss: {loss.item():.4f}')
-        
-        # Evaluate
-        self.solar_predictor.eval()
-        with torch.no_grad():
-            test_outputs = self.solar_predictor(X_test)
-            test_loss = criterion(test_outputs, y_test)
-            print(f'Solar Predictor Test Loss: {test_loss.item():.4f}')
+            model.eval()
+            with torch.no_grad():
+                val_loss = criterion(model(X_val_tensor), y_val_tensor).item()
+            epochs_run = epoch + 1
+            
+            if val_loss < best_val_loss:
+                best_val_loss = val_loss
+                best_state = copy.deepcopy(model.state_dict())
+                epochs_without_improvement = 0
+                if checkpoint_path:
+                    torch.save({
+                        'epoch': epochs_run,
+                        'model_state': best_state,
+                        'optimizer_state': optimizer.state_dict(),
+                        'val_loss': val_loss
+                    }, checkpoint_path)
+            else:
+                epochs_without_improvement += 1
+            
+            if progress:
+                progress(name, epochs_run, epochs, train_loss, val_loss, best_val_loss)
+            if epochs_without_improvement >= patience:
+                break
+        
+        model.load_state_dict(best_state)
+        model.eval()
+        print(f'{name} - stopped after {epochs_run}/{epochs} epochs, best validation loss: {best_val_loss:.4f}')
+        return {
+            'epochs_run': epochs_run,
+            'best_val_loss': best_val_loss,
+            'stopped_early': epochs_run < epochs
+        }
+    
+    def train_solar_predictor(self, data, epochs=100, **options):
+        """Train a new solar power prediction model and serve it"""
+        X = self.prepare_solar_features(data)
+        y = batch_column(data, 'solar_power').reshape(-1, 1)
         
-        self.save_model('solar_predictor', self.solar_predictor, self.solar_scaler)
+        # Scale features
+        model, scaler = SolarPowerPredictor(), StandardScaler()
+        X_scaled = scaler.fit_transform(X)
+        
+        result = self._train_model('solar_predictor', model, X_scaled, y, nn.MSELoss(), epochs, **options)
+        result['version'] = self.save_model('solar_predictor', model, scaler, {
+            'training_range': training_range(data),
+            'metrics': dict(result)
+        })
+        return result
     
-    def train_fault_detector(self, data, epochs=150):
-        """Train the fault detection model"""
+    def train_fault_detector(self, data, epochs=150, **options):
+        """Train a new fault detection model and serve it"""
         X = self.prepare_fault_features(data)
         
         # Create fault labels (simplified - based on efficiency drops)
-        df = pd.DataFrame(data)
-        df['solar_efficiency'] = df['solar_power'] / (df['sun_intensity'] + 1e-8)
-        df['wind_efficiency'] = df['wind_power'] / (df['wind_speed'] + 1e-8)
+        solar_efficiency = batch_column(data, 'solar_power') / (batch_column(data, 'sun_intensity') + 1e-8)
+        wind_efficiency = batch_column(data, 'wind_power') / (batch_column(data, 'wind_speed') + 1e-8)
         
         # Label as fault if efficiency is below threshold
-        solar_threshold = df['solar_efficiency'].quantile(0.3)
-        wind_threshold = df['wind_efficiency'].quantile(0.3)
+        solar_threshold = np.quantile(solar_efficiency, 0.3)
+        wind_threshold = np.quantile(wind_efficiency, 0.3)
         
-        y = ((df['solar_efficiency'] < solar_threshold) | 
-             (df['wind_efficiency'] < wind_threshold)).astype(int).values.reshape(-1, 1)
+        y = ((solar_efficiency < solar_threshold) |
+             (wind_efficiency < wind_threshold)).astype(float).reshape(-1, 1)
         
         # Scale features
-        X_scaled = self.fault_scaler.fit_transform(X)
-        
-        # Convert to tensors
-        X_tensor = torch.FloatTensor(X_scaled)
-        y_tensor = torch.FloatTensor(y)
-        
-        # Training
-        criterion = nn.BCELoss()
-        optimizer = optim.Adam(self.fault_detector.parameters(), lr=0.001)
-        
-        self.fault_detector.train()
-        for epoch in range(epochs):
-            optimizer.zero_grad()
-            outputs = self.fault_detector(X_tensor)
-            loss = criterion(outputs, y_tensor)
-            loss.backward()
-            optimizer.step()
-            
-            if (epoch + 1) % 30 == 0:
-                print(f'Fault Detector - Epoch [{epoch+1}/{epochs}], Loss: {loss.item():.4f}')
-        
-        self.save_model('fault_detector', self.fault_detector, self.fault_scaler)
+        model, scaler = FaultDetectionModel(), StandardScaler()
+        X_scaled = scaler.fit_transform(X)
+        
+        result = self._train_model('fault_detector', model, X_scaled, y, nn.BCELoss(), epochs, **options)
+        result['version'] = self.save_model('fault_detector', model, scaler, {
+            'training_range': training_range(data),
+            'metrics': dict(result),
+            'label_thresholds': {'solar_efficiency': float(solar_threshold), 'wind_efficiency': float(wind_threshold)}
+        })
+        return result
+    
+    def _serving(self, name):
+        """The (model, scaler) pair currently served for a model name"""
+        self.refresh()
+        return self.models[name]
+    
+    def is_fitted(self, name):
+        """Whether a model's scaler has been fitted, i.e. it can predict"""
+        return hasattr(self._serving(name)[1], 'mean_')
     
     def predict_solar_power(self, current_data):
         """Predict solar power generation"""
-        self.solar_predictor.eval()
+        model, scaler = self._serving('solar_predictor')
         
         X = self.prepare_solar_features([current_data])
-        X_scaled = self.solar_scaler.transform(X)
+        X_scaled = scaler.transform(X)
         X_tensor = torch.FloatTensor(X_scaled)
         
         with torch.no_grad():
-            prediction = self.solar_predictor(X_tensor)
+            prediction = model(X_tensor)
             return prediction.item()
     
     def predict_fault_probability(self, current_data):
         """Predict probability of equipment fault"""
-        self.fault_detector.eval()
+        model, scaler = self._serving('fault_detector')
         
         X = self.prepare_fault_features([current_data])
-        X_scaled = self.fault_scaler.transform(X)
+        X_scaled = scaler.transform(X)
         X_tensor = torch.FloatTensor(X_scaled)
         
         with torch.no_grad():
-            probability = self.fault_detector(X_tensor)
+            probability = model(X_tensor)
             return probability.item()
     
+    def _predict_batch(self, name, features, max_batch_size=None):
+        """Run feature rows through a model in chunks of at most max_batch_size"""
+        model, scaler = self._serving(name)
+        if not len(features):
+            return np.empty(0)
+        X_scaled = scaler.transform(features)
+        size = max_batch_size or self.max_batch_size
+        
+        with torch.no_grad():
+            outputs = [
+                model(torch.FloatTensor(X_scaled[start:start + size])).numpy()[:, 0]
+                for start in range(0, len(X_scaled), size)
+            ]
+        return np.concatenate(outputs).astype(float)
+    
+    def predict_solar_power_batch(self, batch, max_batch_size=None, series=False):
+        """Predict solar power for a batch (list of readings, dict of arrays or DataFrame)"""
+        return self._predict_batch('solar_predictor', solar_features(batch, series), max_batch_size)
+    
+    def predict_wind_power_batch(self, batch, max_batch_size=None, series=False):
+        """Predict wind power for a batch of readings"""
+        return self._predict_batch('wind_predictor', wind_features(batch, series), max_batch_size)
+    
+    def predict_fault_probability_batch(self, batch, max_batch_size=None, series=False):
+        """Predict fault probabilities for a batch of independent readings (one per site by default)"""
+        return self._predict_batch('fault_detector', fault_features(batch, series), max_batch_size)
+    
+    def predict_consumption_batch(self, batch, max_batch_size=None, series=False):
+        """Predict consumption for a batch of readings"""
+        return self._predict_batch('consumption_predictor', consumption_features(batch, series), max_batch_size)
+    
     def analyze_performance_efficiency(self, data):
         """Analyze system performance and efficiency"""
-        df = pd.DataFrame(data)
-        
-        # Calculate various efficiency metrics
-        df['solar_efficiency'] = df['solar_power'] / (df['sun_intensity'] * 100 + 1e-8)
-        df['wind_efficiency'] = df['wind_power'] / (df['wind_speed'] ** 3 + 1e-8)
-        df['overall_efficiency'] = df['total_generation'] / (df['consumption'] + 1e-8)
-        
-        # Convert timestamps to strings for JSON serialization
-        peak_gen_timestamp = df.loc[df['total_generation'].idxmax(), 'timestamp']
-        peak_cons_timestamp = df.loc[df['consumption'].idxmax(), 'timestamp']
-        
-        analysis = {
-            'avg_solar_efficiency': float(df['solar_efficiency'].mean()),
-            'avg_wind_efficiency': float(df['wind_efficiency'].mean()),
-            'avg_overall_efficiency': float(df['overall_efficiency'].mean()),
-            'efficiency_trend': float(df['overall_efficiency'].diff().mean()),
-            'peak_generation_hour': peak_gen_timestamp.isoformat() if hasattr(peak_gen_timestamp, 'isoformat') else str(peak_gen_timestamp),
-            'peak_consumption_hour': peak_cons_timestamp.isoformat() if hasattr(peak_cons_timestamp, 'isoformat') else str(peak_cons_timestamp),
-            'energy_independence_score': float(min(1.0, df['total_generation'].sum() / df['consumption'].sum()))
-        }
-        
-        return analysis
+        return energy_analytics.analyze_performance_efficiency(data)
     
     def predict_optimal_trading_times(self, data):
         """Predict optimal times for energy trading"""
-        df = pd.DataFrame(data)
-        
-        # Calculate surplus/deficit patterns
-        df['net_energy'] = df['total_generation'] - df['consumption']
-        df['hour'] = pd.to_datetime(df['timestamp']).dt.hour
-        
-        # Find patterns in surplus/deficit by hour
-        hourly_patterns = df.groupby('hour').agg({
-            'net_energy': ['mean', 'std'],
-            'storage_percentage': 'mean',
-            'grid_export': 'sum',
-            'grid_import': 'sum'
-        }).reset_index()
-        
-        # Identify best selling hours (high surplus, high storage)
-        hourly_patterns['sell_score'] = (
-            hourly_patterns['net_energy']['mean'] * 
-            hourly_patterns['storage_percentage']['mean'] / 100
-        )
-        
-        # Identify best buying hours (low generation, low storage)
-        hourly_patterns['buy_score'] = (
-            -hourly_patterns['net_energy']['mean'] * 
-            (100 - hourly_patterns['storage_percentage']['mean']) / 100
-        )
-        
-        best_sell_hours = hourly_patterns.nlargest(3, 'sell_score')['hour'].tolist()
-        best_buy_hours = hourly_patterns.nlargest(3, 'buy_score')['hour'].tolist()
-        
-        return {
-            'best_sell_hours': best_sell_hours,
-            'best_buy_hours': best_buy_hours,
-            'hourly_patterns': [
-                {
-                    'hour': int(row['hour']),
-                    'avg_net_energy': float(row[('net_energy', 'mean')]),
-                    'net_energy_std': float(row[('net_energy', 'std')]),
-                    'avg_storage': float(row[('storage_percentage', 'mean')]),
-                    'total_grid_export': float(row[('grid_export', 'sum')]),
-                    'total_grid_import': float(row[('grid_import', 'sum')]),
-                    'sell_score': float(row['sell_score']),
-                    'buy_score': float(row['buy_score'])
-                }
-                for _, row in hourly_patterns.iterrows()
-            ]
+        return energy_analytics.predict_optimal_trading_times(data)
+    
+    def save_model(self, name, model, scaler, metadata=None, activate=True):
+        """Publish a trained model and its scaler as a new registry version and serve it.
+        
+        Returns the version number, or None when the scaler has not been fitted.
+        """
+        arrays = bundle_arrays(model, scaler)
+        if arrays is None:
+            return None
+        
+        metadata = {
+            **(metadata or {}),
+            'model_class': type(model).__name__,
+            'feature_schema': FEATURE_NAMES[name]
         }
+        version = self.registry.publish(name, arrays, metadata, activate=activate)
+        if activate:
+            self._swap(name, model, scaler, version)
+        print(f'Published {name} v{version}')
+        return version
     
-    def save_model(self, name, model, scaler):
-        """Save model and scaler to disk"""
+    def publish_models(self):
+        """Publish every model with a fitted scaler that has no registry version yet"""
+        published = []
+        for name, (model, scaler) in self.models.items():
+            if self.versions[name] is None and self.save_model(name, model, scaler, {'source': 'legacy files'}):
+                published.append(name)
+        return published
+    
+    def _swap(self, name, model, scaler, version):
+        model.eval()
+        self.models = {**self.models, name: (model, scaler)}
+        self.versions = {**self.versions, name: version}
+    
+    def _build_version(self, name, version):
+        arrays, metadata = self.registry.load(name, version)
+        check_feature_schema(name, metadata)
+        return model_from_arrays(name, arrays)
+
+    def _load_version(self, name, version):
+        model, scaler = self._build_version(name, version)
+        self._swap(name, model, scaler, version)
+        print(f'Loaded {name} v{version}')
+    
+    def _load_legacy(self, name):
+        """Load a pre-registry {name}.pth / {name}_scaler.pkl pair if present"""
         model_path = os.path.join(self.model_dir, f'{name}.pth')
         scaler_path = os.path.join(self.model_dir, f'{name}_scaler.pkl')
-        
-        torch.save(model.state_dict(), model_path)
-        
-        with open(scaler_path, 'wb') as f:
-            pickle.dump(scaler, f)
+        if not os.path.exists(model_path):
+            return
+        
+        model, scaler = MODEL_CLASSES[name](), self.models[name][1]
+        model.load_state_dict(torch.load(model_path))
+        if os.path.exists(scaler_path):
+            with open(scaler_path, 'rb') as f:
+                scaler = pickle.load(f)
+        self._swap(name, model, scaler, None)
+        print(f'Loaded {name} from legacy files')
     
     def load_models(self):
-        """Load saved models from disk"""
-        models = {
-            'solar_predictor': self.solar_predictor,
-            'wind_predictor': self.wind_predictor,
-            'fault_detector': self.fault_detector,
-            'consumption_predictor': self.consumption_predictor
-        }
-        
-        scalers = {
-            'solar_predictor': self.solar_scaler,
-            'wind_predictor': self.wind_scaler,
-            'fault_detector': self.fault_scaler,
-            'consumption_predictor': self.consumption_scaler
-        }
-        
-        for name, model in models.items():
-            model_path = os.path.join(self.model_dir, f'{name}.pth')
-            scaler_path = os.path.join(self.model_dir, f'{name}_scaler.pkl')
-            
-            if os.path.exists(model_path):
-                model.load_state_dict(torch.load(model_path))
-                print(f'Loaded {name} model')
-            
-            if os.path.exists(scaler_path):
-                with open(scaler_path, 'rb') as f:
-                    scalers[name] = pickle.load(f)
-                print(f'Loaded {name} scaler')
+        """Load the active registry version of every model (legacy files when unpublished)"""
+        for name, version in self.registry.active_versions(MODEL_NAMES).items():
+            try:
+                if version is not None:
+                    self._load_version(name, version)
+                else:
+                    self._load_legacy(name)
+            except (OSError, KeyError, ValueError, RuntimeError) as e:
+                print(f'Could not load {name}: {e}')
+        self._checked_at = time.monotonic()
+    
+    def refresh(self, force=False):
+        """Swap in models activated by another process; throttled unless forced"""
+        if not force and time.monotonic() - self._checked_at < self.refresh_seconds:
+            return False
+        self._checked_at = time.monotonic()
+        changed = False
+        for name, version in self.registry.active_versions(MODEL_NAMES).items():
+            if version is not None and version != self.versions[name]:
+                try:
+                    self._load_version(name, version)
+                    changed = True
+                except (OSError, KeyError, ValueError, RuntimeError) as e:
+                    print(f'Could not load {name} v{version}: {e}')
+        return changed
+    
+    def _activation(self):
+        """Registry validate hook that builds the version before its pointer moves"""
+        built = {}
+        def validate(name, version):
+            try:
+                built[version] = self._build_version(name, version)
+            except (OSError, KeyError, RuntimeError) as e:
+                raise ValueError(f'{name} v{version} cannot be loaded: {e}') from e
+        return built, validate
+    
+    def activate(self, name, version):
+        """Serve an earlier or later registry version of a model"""
+        built, validate = self._activation()
+        self.registry.activate(name, version, validate=validate)
+        self._swap(name, *built[version], version)
+        return version
+    
+    def rollback(self, name):
+        """Serve the previously active version of a model"""
+        built, validate = self._activation()
+        version = self.registry.rollback(name, validate=validate)
+        self._swap(name, *built[version], version)
+        return version
 
 # Global ML manager instance
 ml_manager = RenewableEnergyMLManager()
@@ -0,0 +1,145 @@
+import json
+import os
+import re
+import time
+from contextlib import contextmanager
+
+import numpy as np
+
+from utils.processes import locked_file
+
+_VERSION_FILE = re.compile(r'^v(\d+)\.npz$')
+
+class ModelRegistry:
+    """Versioned store of trained models, shared by every process on this host.
+
+    Each published version is one bundle, root/<name>/v0001.npz, holding the layer
+    weights, the fitted scaler and a JSON metadata document (training data range,
+    metrics, feature schema). root/<name>/active.json names the version being served
+    plus the activation history used for rollback; it is replaced atomically, so a
+    reader sees either the old or the new version and never a mix.
+    """
+
+    def __init__(self, root='ml_models/registry'):
+        self.root = root
+
+    def _model_dir(self, name):
+        return os.path.join(self.root, name)
+
+    def _bundle_path(self, name, version):
+        return os.path.join(self._model_dir(name), f'v{version:04d}.npz')
+
+    def _pointer_path(self, name):
+        return os.path.join(self._model_dir(name), 'active.json')
+
+    @contextmanager
+    def _locked(self, name):
+        """Serialize publishers and activations for one model across processes"""
+        os.makedirs(self._model_dir(name), exist_ok=True)
+        with locked_file(os.path.join(self._model_dir(name), '.lock')):
+            yield
+
+    def _read_pointer(self, name):
+        try:
+            with open(self._pointer_path(name)) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _write_pointer(self, name, pointer):
+        path = self._pointer_path(name)
+        tmp_path = f'{path}.{os.getpid()}.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(pointer, f)
+        os.replace(tmp_path, path)
+
+    def version_numbers(self, name):
+        try:
+            files = os.listdir(self._model_dir(name))
+        except OSError:
+            return []
+        return sorted(int(match.group(1)) for match in map(_VERSION_FILE.match, files) if match)
+
+    def publish(self, name, arrays, metadata=None, activate=True):
+        """Store arrays as the next version of a model; returns the version number"""
+        with self._locked(name):
+            versions = self.version_numbers(name)
+            version = versions[-1] + 1 if versions else 1
+            metadata = {**(metadata or {}), 'name': name, 'version': version, 'created_at': time.time()}
+
+            path = self._bundle_path(name, version)
+            tmp_path = f'{path}.{os.getpid()}.tmp'
+            with open(tmp_path, 'wb') as f:
+                np.savez(f, metadata=np.array(json.dumps(metadata, default=str)), **arrays)
+            os.replace(tmp_path, path)
+
+            if activate:
+                self._activate(name, version)
+        return version
+
+    def _activate(self, name, version):
+        pointer = self._read_pointer(name) or {'history': []}
+        history = [v for v in pointer['history'] if v != version] + [version]
+        self._write_pointer(name, {'version': version, 'history': history, 'activated_at': time.time()})
+
+    def activate(self, name, version, validate=None):
+        """Serve an existing version of a model.
+
+        validate(name, version) runs before the pointer moves and may raise to
+        keep the current version active.
+        """
+        with self._locked(name):
+            if version not in self.version_numbers(name):
+                raise ValueError(f'{name} has no version {version}')
+            if validate:
+                validate(name, version)
+            self._activate(name, version)
+        return version
+
+    def rollback(self, name, validate=None):
+        """Serve the version that was active before the current one; returns it"""
+        with self._locked(name):
+            pointer = self._read_pointer(name)
+            history = [v for v in (pointer or {}).get('history', []) if v in self.version_numbers(name)]
+            if len(history) < 2:
+                raise ValueError(f'{name} has no earlier version to roll back to')
+            history.pop()
+            if validate:
+                validate(name, history[-1])
+            self._write_pointer(name, {'version': history[-1], 'history': history, 'activated_at': time.time()})
+            return history[-1]
+
+    def active_version(self, name):
+        pointer = self._read_pointer(name)
+        return pointer['version'] if pointer else None
+
+    def active_versions(self, names):
+        """Active version per model name (None when nothing is published)"""
+        return {name: self.active_version(name) for name in names}
+
+    def load(self, name, version=None):
+        """(arrays, metadata) of a version (the active one by default), or None"""
+        version = version or self.active_version(name)
+        if version is None:
+            return None
+        with np.load(self._bundle_path(name, version)) as bundle:
+            arrays = {key: bundle[key] for key in bundle.files if key != 'metadata'}
+            metadata = json.loads(str(bundle['metadata']))
+        return arrays, metadata
+
+    def metadata(self, name, version):
+        with np.load(self._bundle_path(name, version)) as bundle:
+            return json.loads(str(bundle['metadata']))
+
+    def describe(self, names):
+        """Every version's metadata and the active version, per model"""
+        return {
+            name: {
+                'active_version': self.active_version(name),
+                'versions': [self.metadata(name, version) for version in self.version_numbers(name)]
+            }
+            for name in names
+        }
+
+# Global model registry instance
+model_registry = ModelRegistry(os.environ.get('MODEL_REGISTRY_DIR', os.path.join('ml_models', 'registry')))
@@ -0,0 +1,340 @@
+import os
+import time
+from datetime import datetime
+
+import numpy as np
+
+from models.model_registry import model_registry
+
+# Models served from the registry (or legacy {name}.npz exports)
+MODEL_NAMES = ('solar_predictor', 'wind_predictor', 'fault_detector', 'consumption_predictor')
+
+# Seconds between checks for a newly activated registry version
+REFRESH_SECONDS = float(os.environ.get('ML_MODEL_REFRESH_SECONDS', 5))
+
+# Largest number of rows sent through one forward pass
+MAX_BATCH_SIZE = int(os.environ.get('ML_MAX_BATCH_SIZE', 4096))
+
+# Feature builders accept a batch as a list of reading dicts or as columns
+# (a dict of arrays or a DataFrame), so callers never have to pivot their data.
+
+def _is_records(batch):
+    return isinstance(batch, (list, tuple))
+
+def batch_length(batch):
+    """Number of readings in a batch of either shape"""
+    if _is_records(batch) or hasattr(batch, 'shape'):
+        return len(batch)
+    return len(next(iter(batch.values()))) if batch else 0
+
+def batch_column(batch, key):
+    if _is_records(batch):
+        return np.array([record[key] for record in batch], dtype=float)
+    return np.asarray(batch[key], dtype=float)
+
+def batch_timestamps(batch):
+    """Batch timestamps (datetimes, datetime64 or ISO strings) as datetime64[m]"""
+    values = [record['timestamp'] for record in batch] if _is_records(batch) else np.asarray(batch['timestamp'])
+    if isinstance(values, np.ndarray) and values.dtype.kind == 'M':
+        return values.astype('datetime64[m]')
+    return np.array([
+        np.datetime64(datetime.fromisoformat(value) if isinstance(value, str) else value, 'm')
+        for value in values
+    ], dtype='datetime64[m]')
+
+def _time_fields(timestamps):
+    """Hour, day of year, month and day of week (Monday=0) for datetime64[m] values"""
+    days = timestamps.astype('datetime64[D]')
+    years = timestamps.astype('datetime64[Y]')
+    hour = (timestamps - days) // np.timedelta64(60, 'm')
+    day_of_year = (days - years.astype('datetime64[D]')).astype(np.int64) + 1
+    month = (timestamps.astype('datetime64[M]') - years.astype('datetime64[M]')).astype(np.int64) + 1
+    day_of_week = (days.astype(np.int64) + 3) % 7  # 1970-01-01 was a Thursday
+    return hour.astype(float), day_of_year.astype(float), month.astype(float), day_of_week.astype(float)
+
+def _rolling_mean(values, window):
+    """Trailing mean over up to `window` samples (pandas rolling with min_periods=1)"""
+    sums = np.concatenate(([0.0], np.cumsum(values)))
+    index = np.arange(len(values))
+    start = np.maximum(0, index - window + 1)
+    return (sums[index + 1] - sums[start]) / (index + 1 - start)
+
+def _rolling_std(values, window):
+    """Trailing sample std over up to `window` samples; 0 where only one sample exists"""
+    index = np.arange(len(values))
+    start = np.maximum(0, index - window + 1)
+    counts = index + 1 - start
+    sums = np.concatenate(([0.0], np.cumsum(values)))
+    squares = np.concatenate(([0.0], np.cumsum(values * values)))
+    total = sums[index + 1] - sums[start]
+    variance = (squares[index + 1] - squares[start] - total * total / counts) / np.maximum(counts - 1, 1)
+    return np.where(counts > 1, np.sqrt(np.maximum(variance, 0.0)), 0.0)
+
+def solar_features(records, series=True):
+    """sun_intensity, hour, day_of_year, month, storage_percentage"""
+    hour, day_of_year, month, _ = _time_fields(batch_timestamps(records))
+    return np.column_stack([
+        batch_column(records, 'sun_intensity'), hour, day_of_year, month,
+        batch_column(records, 'storage_percentage')
+    ])
+
+def wind_features(records, series=True):
+    """wind_speed, hour, season, storage_percentage"""
+    hour, _, month, _ = _time_fields(batch_timestamps(records))
+    season = (month % 12 + 3) // 3
+    return np.column_stack([
+        batch_column(records, 'wind_speed'), hour, season, batch_column(records, 'storage_percentage')
+    ])
+
+def fault_features(records, series=True):
+    """Raw readings plus efficiency ratios and the 10-sample generation std.
+    
+    With series=False the rows are independent readings (e.g. one per site), so the
+    rolling window covers only the row itself, as it would for a single prediction.
+    """
+    sun_intensity = batch_column(records, 'sun_intensity')
+    solar_power = batch_column(records, 'solar_power')
+    wind_speed = batch_column(records, 'wind_speed')
+    wind_power = batch_column(records, 'wind_power')
+    total_generation = batch_column(records, 'total_generation')
+    consumption = batch_column(records, 'consumption')
+    return np.column_stack([
+        sun_intensity, solar_power, wind_speed, wind_power,
+        solar_power / (sun_intensity + 1e-8),
+        wind_power / (wind_speed + 1e-8),
+        total_generation / (consumption + 1e-8),
+        _rolling_std(total_generation, 10 if series else 1)
+    ])
+
+def consumption_features(records, series=True):
+    """hour, day_of_week, is_weekend, 60-sample consumption and generation means, storage"""
+    hour, _, _, day_of_week = _time_fields(batch_timestamps(records))
+    window = 60 if series else 1
+    return np.column_stack([
+        hour, day_of_week, (day_of_week >= 5).astype(float),
+        _rolling_mean(batch_column(records, 'consumption'), window),
+        _rolling_mean(batch_column(records, 'total_generation'), window),
+        batch_column(records, 'storage_percentage')
+    ])
+
+def _row_time(record):
+    timestamp = record['timestamp']
+    if isinstance(timestamp, str):
+        timestamp = datetime.fromisoformat(timestamp)
+    elif not isinstance(timestamp, datetime):
+        timestamp = np.datetime64(timestamp, 'us').astype(datetime)
+    return timestamp
+
+def row_features(name, record):
+    """Feature vector for a single reading, built without array overhead.
+
+    Matches the batch builders for a one-row batch, where the rolling std is 0 and
+    the rolling means equal the reading itself.
+    """
+    if name == 'fault_detector':
+        return [
+            record['sun_intensity'], record['solar_power'], record['wind_speed'], record['wind_power'],
+            record['solar_power'] / (record['sun_intensity'] + 1e-8),
+            record['wind_power'] / (record['wind_speed'] + 1e-8),
+            record['total_generation'] / (record['consumption'] + 1e-8),
+            0.0
+        ]
+    
+    timestamp = _row_time(record)
+    if name == 'solar_predictor':
+        return [record['sun_intensity'], timestamp.hour, timestamp.timetuple().tm_yday,
+                timestamp.month, record['storage_percentage']]
+    if name == 'wind_predictor':
+        return [record['wind_speed'], timestamp.hour, (timestamp.month % 12 + 3) // 3,
+                record['storage_percentage']]
+    day_of_week = timestamp.weekday()
+    return [timestamp.hour, day_of_week, float(day_of_week >= 5), record['consumption'],
+            record['total_generation'], record['storage_percentage']]
+
+# Column order of each feature builder, recorded with every registry version
+FEATURE_NAMES = {
+    'solar_predictor': ['sun_intensity', 'hour', 'day_of_year', 'month', 'storage_percentage'],
+    'wind_predictor': ['wind_speed', 'hour', 'season', 'storage_percentage'],
+    'fault_detector': ['sun_intensity', 'solar_power', 'wind_speed', 'wind_power', 'solar_efficiency',
+                       'wind_efficiency', 'generation_ratio', 'generation_std_10'],
+    'consumption_predictor': ['hour', 'day_of_week', 'is_weekend', 'consumption_mean_60',
+                              'generation_mean_60', 'storage_percentage']
+}
+
+def check_feature_schema(name, metadata):
+    """Raise ValueError if a bundle was trained on different features than the builders produce"""
+    schema = metadata.get('feature_schema')
+    if schema is not None and schema != FEATURE_NAMES[name]:
+        raise ValueError(f'{name} v{metadata.get("version")} expects features {schema}')
+
+FEATURE_BUILDERS = {
+    'solar_predictor': solar_features,
+    'wind_predictor': wind_features,
+    'fault_detector': fault_features,
+    'consumption_predictor': consumption_features
+}
+
+class NumpyMLP:
+    """Feed-forward ReLU network evaluated with NumPy from exported arrays.
+
+    Mirrors the torch predictors in eval mode (dropout off): standardize with the
+    scaler's mean and scale, apply each Linear layer, ReLU between layers and an
+    optional sigmoid on the output.
+    """
+
+    def __init__(self, weights, biases, mean, scale, output='linear'):
+        self.weights = [np.ascontiguousarray(w, dtype=np.float64) for w in weights]
+        self.biases = [np.asarray(b, dtype=np.float64) for b in biases]
+        self.mean = np.asarray(mean, dtype=np.float64)
+        self.scale = np.asarray(scale, dtype=np.float64)
+        self.output = output
+
+    @classmethod
+    def from_arrays(cls, arrays):
+        layer_count = int(arrays['layer_count'])
+        return cls(
+            [arrays[f'weight_{i}'] for i in range(layer_count)],
+            [arrays[f'bias_{i}'] for i in range(layer_count)],
+            arrays['scaler_mean'],
+            arrays['scaler_scale'],
+            str(arrays['output'])
+        )
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as arrays:
+            return cls.from_arrays(arrays)
+
+    def predict(self, features):
+        """One output per feature row"""
+        x = (np.atleast_2d(np.asarray(features, dtype=np.float64)) - self.mean) / self.scale
+        last = len(self.weights) - 1
+        for i, (weight, bias) in enumerate(zip(self.weights, self.biases)):
+            x = x @ weight + bias
+            if i < last:
+                np.maximum(x, 0.0, out=x)
+        if self.output == 'sigmoid':
+            x = 1.0 / (1.0 + np.exp(-x))
+        return x[:, 0]
+
+    def predict_one(self, features):
+        """Single prediction from one feature vector"""
+        x = (np.asarray(features, dtype=np.float64) - self.mean) / self.scale
+        last = len(self.weights) - 1
+        for i, (weight, bias) in enumerate(zip(self.weights, self.biases)):
+            x = x @ weight + bias
+            if i < last:
+                np.maximum(x, 0.0, out=x)
+        value = float(x[0])
+        if self.output == 'sigmoid':
+            value = 1.0 / (1.0 + np.exp(-value))
+        return float(value)
+
+class NumpyInferenceEngine:
+    """Serves the exported predictors without importing torch, sklearn or pandas.
+    
+    Models come from the active registry versions, falling back to legacy
+    {name}.npz exports. Every REFRESH_SECONDS the registry pointers are re-read and
+    changed models are swapped in, so an activation or rollback made by any process
+    reaches every worker without a restart.
+    """
+
+    def __init__(self, model_dir='ml_models', max_batch_size=MAX_BATCH_SIZE, registry=model_registry,
+                 refresh_seconds=REFRESH_SECONDS):
+        self.model_dir = model_dir
+        self.max_batch_size = max_batch_size
+        self.registry = registry
+        self.refresh_seconds = refresh_seconds
+        self.models = {}
+        self.versions = {}
+        self._checked_at = 0.0
+        self.load()
+
+    def _load_model(self, name, version):
+        if version is not None:
+            arrays, metadata = self.registry.load(name, version)
+            check_feature_schema(name, metadata)
+            return NumpyMLP.from_arrays(arrays)
+        path = os.path.join(self.model_dir, f'{name}.npz')
+        return NumpyMLP.load(path) if os.path.exists(path) else None
+
+    def validate(self, name, version):
+        """Raise ValueError unless a registry version can be served"""
+        try:
+            self._load_model(name, version)
+        except (OSError, KeyError) as e:
+            raise ValueError(f'{name} v{version} cannot be loaded: {e}') from e
+
+    def load(self, versions=None):
+        """(Re)load every available model and swap them in together"""
+        versions = versions or self.registry.active_versions(MODEL_NAMES)
+        models = {}
+        for name in MODEL_NAMES:
+            try:
+                model = self._load_model(name, versions[name])
+            except (OSError, KeyError, ValueError) as e:
+                print(f'Could not load {name}: {e}')
+                model = self.models.get(name)
+                versions[name] = self.versions.get(name)
+            if model is not None:
+                models[name] = model
+        # Single assignments, so concurrent predictions see either the old or the new set
+        self.models = models
+        self.versions = versions
+        self._checked_at = time.monotonic()
+        return sorted(models)
+
+    def refresh(self, force=False):
+        """Reload if the active registry versions changed; throttled unless forced"""
+        if not force and time.monotonic() - self._checked_at < self.refresh_seconds:
+            return False
+        self._checked_at = time.monotonic()
+        versions = self.registry.active_versions(MODEL_NAMES)
+        if versions == self.versions:
+            return False
+        self.load(versions)
+        return True
+
+    def has(self, name):
+        self.refresh()
+        return name in self.models
+
+    def predict(self, name, batch, series=False, max_batch_size=None):
+        """Predictions for a batch of readings as a float array.
+        
+        Rows are independent readings unless series=True, in which case they are one
+        time series and the rolling features span neighbouring rows. The forward pass
+        runs in chunks of at most max_batch_size rows.
+        """
+        self.refresh()
+        model = self.models[name]
+        features = FEATURE_BUILDERS[name](batch, series)
+        size = max_batch_size or self.max_batch_size
+        if len(features) <= size:
+            return model.predict(features) if len(features) else np.empty(0)
+        return np.concatenate([model.predict(features[start:start + size])
+                               for start in range(0, len(features), size)])
+
+    def predict_one(self, name, record):
+        """Prediction for a single reading dict"""
+        self.refresh()
+        return self.models[name].predict_one(row_features(name, record))
+
+    def predict_solar_power(self, current_data):
+        """Predict solar power generation"""
+        return self.predict_one('solar_predictor', current_data)
+
+    def predict_wind_power(self, current_data):
+        """Predict wind power generation"""
+        return self.predict_one('wind_predictor', current_data)
+
+    def predict_fault_probability(self, current_data):
+        """Predict probability of equipment fault"""
+        return self.predict_one('fault_detector', current_data)
+
+    def predict_consumption(self, current_data):
+        """Predict energy consumption"""
+        return self.predict_one('consumption_predictor', current_data)
+
+# Global NumPy inference engine instance
+inference_engine = NumpyInferenceEngine()
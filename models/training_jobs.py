@@ -0,0 +1,221 @@
+import json
+import os
+import subprocess
+import sys
+import time
+import traceback
+import uuid
+from contextlib import contextmanager
+
+import numpy as np
+
+from utils.processes import locked_file, pid_alive
+
+# Models with a training routine, mapped to the RenewableEnergyMLManager method that trains them
+TRAINABLE_MODELS = {
+    'solar_predictor': 'train_solar_predictor',
+    'fault_detector': 'train_fault_detector'
+}
+
+# Torch threads used by a training process; the rest of the cores stay with the web workers
+TRAIN_THREADS = int(os.environ.get('ML_TRAIN_THREADS', max(1, (os.cpu_count() or 2) // 2)))
+
+TRAINING_DEFAULTS = {
+    'epochs': 100,
+    'batch_size': 256,
+    'patience': 10
+}
+
+def _write_json(path, data):
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump(data, f, indent=2, default=str)
+    os.replace(tmp_path, path)
+
+def _read_json(path):
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+class TrainingJobManager:
+    """Runs model training in a separate process and tracks its progress.
+
+    Each job gets a directory under jobs_dir holding its spec, the training history
+    as arrays, checkpoints and a status.json that the child process rewrites after
+    every epoch. Serving keeps running on the exported NumPy models; the new models
+    replace them once the job has saved them. Only one job runs at a time on this
+    host: jobs_dir/active.json names the running job and its trainer's pid, and is
+    claimed under a file lock, so every worker sees the same job and a trainer that
+    died is noticed by all of them.
+    """
+
+    def __init__(self, model_dir='ml_models', jobs_dir=None, max_jobs=20):
+        self.model_dir = model_dir
+        self.jobs_dir = jobs_dir or os.path.join(model_dir, 'jobs')
+        self.max_jobs = max_jobs
+        self._processes = {}
+        self._applied = set()
+
+    def _job_dir(self, job_id):
+        return os.path.join(self.jobs_dir, job_id)
+
+    def _lease_path(self):
+        return os.path.join(self.jobs_dir, 'active.json')
+
+    @contextmanager
+    def _locked(self):
+        """Serialize job starts across worker processes"""
+        os.makedirs(self.jobs_dir, exist_ok=True)
+        with locked_file(os.path.join(self.jobs_dir, '.lock')):
+            yield
+
+    def _trainer_alive(self, job_id, pid):
+        process = self._processes.get(job_id)
+        if process is not None:
+            return process.poll() is None  # Also reaps our own finished children
+        return pid_alive(pid)
+
+    def running_job(self):
+        """Id of the job still training in any worker on this host, if any"""
+        lease = _read_json(self._lease_path())
+        if not lease:
+            return None
+        job = self.status(lease['job_id'])
+        if job and job['status'] in ('queued', 'running'):
+            return lease['job_id']
+        return None
+
+    def start(self, models, history, options=None):
+        """Launch a training job on columnar history; None while another job is running"""
+        with self._locked():
+            if self.running_job():
+                return None
+            return self._launch(models, history, options)
+
+    def _launch(self, models, history, options):
+        job_id = uuid.uuid4().hex[:12]
+        job_dir = self._job_dir(job_id)
+        os.makedirs(job_dir, exist_ok=True)
+
+        options = {**TRAINING_DEFAULTS, **(options or {})}
+        np.savez(os.path.join(job_dir, 'history.npz'), **history)
+        _write_json(os.path.join(job_dir, 'spec.json'), {
+            'models': list(models),
+            'options': options,
+            'model_dir': os.path.abspath(self.model_dir)
+        })
+        _write_json(os.path.join(job_dir, 'status.json'), {
+            'id': job_id,
+            'status': 'queued',
+            'models': list(models),
+            'options': options,
+            'samples': len(history['timestamp']),
+            'created_at': time.time()
+        })
+
+        root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [root, os.environ.get('PYTHONPATH')])))
+        with open(os.path.join(job_dir, 'training.log'), 'ab') as log:
+            process = self._processes[job_id] = subprocess.Popen(
+                [sys.executable, os.path.abspath(__file__), job_dir],
+                stdout=log, stderr=subprocess.STDOUT, env=env, cwd=os.getcwd()
+            )
+        _write_json(os.path.join(job_dir, 'trainer.json'), {'pid': process.pid})
+        _write_json(self._lease_path(), {'job_id': job_id, 'pid': process.pid, 'started_at': time.time()})
+        self._prune_processes()
+        return job_id
+
+    def _prune_processes(self):
+        finished = [job_id for job_id, process in self._processes.items() if process.poll() is not None]
+        for job_id in finished[:max(0, len(self._processes) - self.max_jobs)]:
+            del self._processes[job_id]
+
+    def status(self, job_id):
+        """Latest status.json of a job, or None for an unknown id"""
+        if not job_id.isalnum():
+            return None
+        job = _read_json(os.path.join(self._job_dir(job_id), 'status.json'))
+        if job is None:
+            return None
+
+        trainer = _read_json(os.path.join(self._job_dir(job_id), 'trainer.json'))
+        if trainer and job['status'] in ('queued', 'running') and not self._trainer_alive(job_id, trainer['pid']):
+            # The trainer may have finished since status.json was read
+            job = _read_json(os.path.join(self._job_dir(job_id), 'status.json')) or job
+            if job['status'] in ('queued', 'running'):
+                # The child died without reporting, e.g. killed or out of memory
+                process = self._processes.get(job_id)
+                job['status'] = 'failed'
+                job['error'] = (f'Training process exited with code {process.returncode}' if process is not None
+                                else 'Training process is no longer running')
+        return job
+
+    def list_jobs(self):
+        """Status of every job on disk, newest first"""
+        if not os.path.isdir(self.jobs_dir):
+            return []
+        jobs = [self.status(job_id) for job_id in os.listdir(self.jobs_dir) if job_id.isalnum()]
+        return sorted((job for job in jobs if job), key=lambda job: job.get('created_at', 0), reverse=True)
+
+    def take_completed(self, job_id):
+        """True the first time a completed job is seen, so callers reload its models once"""
+        job = self.status(job_id)
+        if job and job['status'] == 'completed' and job_id not in self._applied:
+            self._applied.add(job_id)
+            return True
+        return False
+
+def run_job(job_dir):
+    """Entry point of the training process"""
+    import torch
+    from models.ml_models import RenewableEnergyMLManager
+
+    torch.set_num_threads(TRAIN_THREADS)
+    spec = _read_json(os.path.join(job_dir, 'spec.json'))
+    status_path = os.path.join(job_dir, 'status.json')
+    status = _read_json(status_path)
+    status.update({'status': 'running', 'started_at': time.time(), 'threads': TRAIN_THREADS, 'results': {}})
+    _write_json(status_path, status)
+
+    def progress(name, epoch, epochs, train_loss, val_loss, best_val_loss):
+        status.update({
+            'model': name,
+            'epoch': epoch,
+            'epochs': epochs,
+            'train_loss': train_loss,
+            'val_loss': val_loss,
+            'best_val_loss': best_val_loss,
+            'updated_at': time.time()
+        })
+        _write_json(status_path, status)
+
+    try:
+        with np.load(os.path.join(job_dir, 'history.npz')) as arrays:
+            history = {key: arrays[key] for key in arrays.files}
+
+        manager = RenewableEnergyMLManager(spec['model_dir'])
+        options = spec['options']
+        for name in spec['models']:
+            train = getattr(manager, TRAINABLE_MODELS[name])
+            status['results'][name] = train(
+                history,
+                epochs=options['epochs'],
+                batch_size=options['batch_size'],
+                patience=options['patience'],
+                progress=progress,
+                checkpoint_path=os.path.join(job_dir, f'{name}_checkpoint.pth')
+            )
+        status.update({'status': 'completed', 'finished_at': time.time()})
+    except Exception as e:
+        traceback.print_exc()
+        status.update({'status': 'failed', 'error': str(e), 'finished_at': time.time()})
+    _write_json(status_path, status)
+    return status['status'] == 'completed'
+
+# Global training job manager instance
+training_jobs = TrainingJobManager()
+
+if __name__ == '__main__':
+    sys.exit(0 if run_job(sys.argv[1]) else 1)
@@ -3,13 +3,22 @@ import bcrypt
 import json
 import os
 from datetime import datetime, timedelta
+import itertools
 import secrets
+import sqlite3
 import string
+import tempfile
+import threading
+import uuid
+from contextlib import contextmanager
+
+from utils.offload import password_pool
+from utils.sqlite_db import STORAGE_BACKEND, get_database
 
 class User(UserMixin):
     def __init__(self, id, username, email, password_hash, created_at=None, 
                  full_name=None, phone_number=None, address=None, pincode=None, state=None, grid_id=None,
-                 is_admin=False):
+                 is_admin=False, password_reset_required=False):
         self.id = id
         self.username = username
         self.email = email
@@ -24,6 +33,8 @@ class User(UserMixin):
         self.grid_id = grid_id or self._generate_grid_id()
         # Admin field
         self.is_admin = is_admin
+        # Set for imported accounts that still use the shared default password
+        self.password_reset_required = password_reset_required
     
     def _generate_grid_id(self):
         """Generate a unique grid ID for the user"""
@@ -35,14 +46,17 @@ class User(UserMixin):
     
     @staticmethod
     def hash_password(password):
-        """Hash a password using bcrypt"""
-        return bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
+        """Hash a password using bcrypt on the password thread pool"""
+        hashed = password_pool.call(bcrypt.hashpw, password.encode('utf-8'), bcrypt.gensalt())
+        return hashed.decode('utf-8')
     
     def check_password(self, password):
         """Check if provided password matches the stored hash"""
         if not self.password_hash:
             return False
-        return bcrypt.checkpw(password.encode('utf-8'), self.password_hash.encode('utf-8'))
+        return password_pool.call(
+            bcrypt.checkpw, password.encode('utf-8'), self.password_hash.encode('utf-8')
+        )
     
     def to_dict(self):
         """Convert user object to dictionary"""
@@ -58,7 +72,8 @@ class User(UserMixin):
             'pincode': self.pincode,
             'state': self.state,
             'grid_id': self.grid_id,
-            'is_admin': self.is_admin
+            'is_admin': self.is_admin,
+            'password_reset_required': self.password_reset_required
         }
     
     @classmethod
@@ -76,15 +91,179 @@ class User(UserMixin):
             pincode=data.get('pincode'),
             state=data.get('state'),
             grid_id=data.get('grid_id'),
-            is_admin=data.get('is_admin', False)
+            is_admin=data.get('is_admin', False),
+            password_reset_required=data.get('password_reset_required', False)
         )
 
+# Password given to imported accounts that arrive without a hash
+DEFAULT_IMPORT_PASSWORD = 'defaultpassword123'
+IMPORT_BATCH_SIZE = 1000
+# Import job progress is written here so any worker can answer a status poll
+IMPORT_JOBS_DIR = os.environ.get('IMPORT_JOBS_DIR', os.path.join(tempfile.gettempdir(), 'ecoshakti_import_jobs'))
+MAX_IMPORT_JOBS = 50
+
+class ImportJob:
+    """Progress of a background user import, saved to jobs_dir after every update"""
+    def __init__(self, file_format, jobs_dir=None):
+        self.id = uuid.uuid4().hex
+        self.jobs_dir = jobs_dir
+        self.file_format = file_format
+        self.status = 'queued'
+        self.success = None
+        self.imported = 0
+        self.skipped = 0
+        self.errors = []
+        self.error = None
+        self.created_at = datetime.now().isoformat()
+        self.finished_at = None
+    
+    def update(self, **fields):
+        for key, value in fields.items():
+            setattr(self, key, value)
+        if self.status in ('completed', 'failed') and not self.finished_at:
+            self.finished_at = datetime.now().isoformat()
+        self.save()
+    
+    def save(self):
+        if not self.jobs_dir:
+            return
+        os.makedirs(self.jobs_dir, exist_ok=True)
+        path = os.path.join(self.jobs_dir, f'{self.id}.json')
+        tmp_path = f'{path}.{os.getpid()}.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(self.to_dict(), f)
+        os.replace(tmp_path, path)
+    
+    @classmethod
+    def load(cls, jobs_dir, job_id):
+        """A job saved by any worker, or None"""
+        if not job_id.isalnum():
+            return None
+        try:
+            with open(os.path.join(jobs_dir, f'{job_id}.json')) as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return None
+        job = cls(data['format'])
+        job.id = data['job_id']
+        for key in ('status', 'success', 'imported', 'skipped', 'errors', 'error', 'created_at', 'finished_at'):
+            setattr(job, key, data.get(key))
+        return job
+    
+    def to_dict(self):
+        return {
+            'job_id': self.id,
+            'format': self.file_format,
+            'status': self.status,
+            'success': self.success,
+            'imported': self.imported,
+            'skipped': self.skipped,
+            'errors': list(self.errors),
+            'error': self.error,
+            'created_at': self.created_at,
+            'finished_at': self.finished_at
+        }
+
 class UserManager:
-    def __init__(self, users_file='users.json'):
+    def __init__(self, users_file='users.json', import_jobs_dir=IMPORT_JOBS_DIR):
         self.users_file = users_file
+        self.import_jobs_dir = import_jobs_dir
         self.users = {}
+        # Case-normalized username/email -> user id, kept in sync with self.users
+        self._ids_by_username = {}
+        self._ids_by_email = {}
+        # Highest numeric id seen, so new ids don't need a scan of every user
+        self._max_user_id = 0
+        self.import_jobs = {}
+        # Serializes id allocation and inserts; hashing happens before taking it
+        self._write_lock = threading.RLock()
         self.load_users()
     
+    @staticmethod
+    def _normalize(value):
+        """Lookup key for usernames and emails: trimmed and case-folded"""
+        return (value or '').strip().casefold()
+    
+    @classmethod
+    def _candidate_keys(cls, value, user_id):
+        """Index keys to try for a username/email, in order.
+        
+        Accounts created before lookups were case-insensitive can differ only by case.
+        The first keeps the plain key; the others are indexed under the key suffixed
+        with their exact value (or, for exact duplicates, their id), so none is lost.
+        """
+        key = cls._normalize(value)
+        return [key, f'{key}#{(value or "").strip()}', f'{key}#{user_id}']
+    
+    @classmethod
+    def _lookup_keys(cls, value):
+        """Keys to look a username/email up under: the exact-case one first"""
+        return cls._candidate_keys(value, None)[1::-1]
+    
+    def _key_owner(self, field, key):
+        """Id of the user indexed under key for field ('username' or 'email'), if any"""
+        return getattr(self, f'_ids_by_{field}').get(key)
+    
+    def _free_key(self, field, value, user):
+        """First candidate key for value that no other account holds"""
+        candidates = self._candidate_keys(value, user.id)
+        for key in candidates:
+            if self._key_owner(field, key) in (None, user.id):
+                break
+        if key != candidates[0]:
+            print(f"User {user.id}: {field} {value!r} collides with user {self._key_owner(field, candidates[0])} "
+                  f"when case is ignored; indexed as {key!r}")
+        return key
+    
+    def _index_user(self, user):
+        self._ids_by_username[self._free_key('username', user.username, user)] = user.id
+        self._ids_by_email[self._free_key('email', user.email, user)] = user.id
+        if str(user.id).isdigit():
+            self._max_user_id = max(self._max_user_id, int(user.id))
+    
+    def _unindex_user(self, user):
+        for index, value in ((self._ids_by_username, user.username), (self._ids_by_email, user.email)):
+            for key in self._candidate_keys(value, user.id):
+                if index.get(key) == user.id:
+                    del index[key]
+    
+    def _rebuild_indexes(self):
+        self._ids_by_username = {}
+        self._ids_by_email = {}
+        self._max_user_id = 0
+        for user in self.users.values():
+            self._index_user(user)
+    
+    def _put_user(self, user):
+        """Add or replace a user, keeping the lookup indexes in sync"""
+        previous = self.users.get(user.id)
+        if previous is not None:
+            self._unindex_user(previous)
+        self.users[user.id] = user
+        self._index_user(user)
+    
+    def _insert_user(self, user):
+        """Add a new user; False if the id is already taken"""
+        if user.id in self.users:
+            return False
+        self._put_user(user)
+        return True
+    
+    def _add_new_user(self, make_user, user_id=None):
+        """Insert make_user(id) under a free id (user_id if given and free); call with the write lock held"""
+        for _ in range(5):
+            user = make_user(str(user_id or self._next_user_id()))
+            if self._insert_user(user):
+                return user
+            user_id = None
+        raise ValueError("Could not allocate a user id")
+    
+    @contextmanager
+    def _writing(self):
+        """Hold the write lock for a block of changes"""
+        with self._write_lock:
+            yield
+    
     def load_users(self):
         """Load users from JSON file"""
         if os.path.exists(self.users_file):
@@ -96,6 +275,7 @@ class UserManager:
                         self.users[user.id] = user
             except (json.JSONDecodeError, KeyError):
                 self.users = {}
+        self._rebuild_indexes()
     
     def save_users(self):
         """Save users to JSON file"""
@@ -112,29 +292,31 @@ class UserManager:
     def create_user(self, username, email, password, is_admin=False):
         """Create a new user"""
         # Check if username or email already exists
-        for user in self.users.values():
-            if user.username == username:
-                raise ValueError("Username already exists")
-            if user.email == email:
-                raise ValueError("Email already exists")
+        if self.get_user_by_username(username):
+            raise ValueError("Username already exists")
+        if self.get_user_by_email(email):
+            raise ValueError("Email already exists")
         
         # Remove email whitelist check since admin panel is removed
         # Allow any valid email to register
         
-        # Generate new user ID
-        user_id = str(len(self.users) + 1)
-        
-        # Hash password
+        # Hash password; this yields to other greenlets, so ids are allocated afterwards
         password_hash = User.hash_password(password)
         
-        # Create user
-        user = User(
-            user_id, username, email, password_hash, is_admin=is_admin
-        )
-        self.users[user_id] = user
-        
-        # Save to file
-        self.save_users()
+        with self._writing():
+            # Checked again: another registration may have finished while hashing
+            if self.get_user_by_username(username):
+                raise ValueError("Username already exists")
+            if self.get_user_by_email(email):
+                raise ValueError("Email already exists")
+            
+            # Create user under the next free ID
+            user = self._add_new_user(
+                lambda user_id: User(user_id, username, email, password_hash, is_admin=is_admin)
+            )
+            
+            # Save to file
+            self.save_users()
         
         return user
     
@@ -142,19 +324,20 @@ class UserManager:
         """Get user by ID"""
         return self.users.get(user_id)
     
-    def get_user_by_username(self, username):
-        """Get user by username"""
-        for user in self.users.values():
-            if user.username == username:
-                return user
+    def _user_by_key(self, field, value):
+        for key in self._lookup_keys(value):
+            user_id = self._key_owner(field, key)
+            if user_id is not None:
+                return self.users.get(user_id)
         return None
     
+    def get_user_by_username(self, username):
+        """Get user by username (case-insensitive)"""
+        return self._user_by_key('username', username)
+    
     def get_user_by_email(self, email):
-        """Get user by email"""
-        for user in self.users.values():
-            if user.email == email:
-                return user
-        return None
+        """Get user by email (case-insensitive)"""
+        return self._user_by_key('email', email)
     
     def authenticate_user(self, username_or_email, password):
         """Authenticate user by username/email and password"""
@@ -166,34 +349,51 @@ class UserManager:
             return user
         return None
     
+    def set_password(self, user_id, password):
+        """Replace a user's password and clear password_reset_required; the updated user or None"""
+        password_hash = User.hash_password(password)
+        with self._writing():
+            user = self.get_user(user_id)
+            if not user:
+                return None
+            user.password_hash = password_hash
+            user.password_reset_required = False
+            self._put_user(user)
+            self.save_users()
+        return user
+    
     def update_user_profile(self, user_id, profile_data):
         """Update user profile information"""
-        user = self.get_user(user_id)
-        if not user:
-            return False
-        
-        # Update profile fields if provided
-        if 'full_name' in profile_data:
-            user.full_name = profile_data['full_name']
-        if 'phone_number' in profile_data:
-            user.phone_number = profile_data['phone_number']
-        if 'address' in profile_data:
-            user.address = profile_data['address']
-        if 'pincode' in profile_data:
-            user.pincode = profile_data['pincode']
-        if 'state' in profile_data:
-            user.state = profile_data['state']
-        
-        # Save changes
-        self.save_users()
+        with self._writing():
+            user = self.get_user(user_id)
+            if not user:
+                return False
+            
+            self._unindex_user(user)
+            # Update profile fields if provided
+            if 'full_name' in profile_data:
+                user.full_name = profile_data['full_name']
+            if 'phone_number' in profile_data:
+                user.phone_number = profile_data['phone_number']
+            if 'address' in profile_data:
+                user.address = profile_data['address']
+            if 'pincode' in profile_data:
+                user.pincode = profile_data['pincode']
+            if 'state' in profile_data:
+                user.state = profile_data['state']
+            self._put_user(user)
+            
+            # Save changes
+            self.save_users()
         return True
     
     def delete_user(self, user_id):
         """Delete a user by ID"""
-        if user_id in self.users:
-            del self.users[user_id]
-            self.save_users()
-            return True
+        with self._writing():
+            if user_id in self.users:
+                self._unindex_user(self.users.pop(user_id))
+                self.save_users()
+                return True
         return False
     
     def get_all_users(self):
@@ -212,7 +412,7 @@ class UserManager:
         writer.writerow(['ID', 'Username', 'Email', 'Full Name', 'Phone Number', 'Address', 'Pincode', 'State', 'Grid ID', 'Created At'])
         
         # Write user data
-        for user in self.users.values():
+        for user in self.get_all_users():
             writer.writerow([
                 user.id,
                 user.username,
@@ -231,7 +431,7 @@ class UserManager:
     def export_users_json(self):
         """Export users to JSON format (without password hashes for security)"""
         users_data = []
-        for user in self.users.values():
+        for user in self.get_all_users():
             user_dict = user.to_dict()
             # Remove password hash for security
             user_dict.pop('password_hash', None)
@@ -239,58 +439,119 @@ class UserManager:
         
         return json.dumps(users_data, indent=2)
     
-    def import_users_from_json(self, json_data, overwrite_existing=False):
-        """Import users from JSON data"""
-        try:
-            users_data = json.loads(json_data) if isinstance(json_data, str) else json_data
-            imported_count = 0
-            skipped_count = 0
-            errors = []
+    def _next_user_id(self):
+        """Smallest numeric id above every one indexed so far"""
+        return self._max_user_id + 1
+    
+    @staticmethod
+    def _row_from_csv(row):
+        """Map an exported CSV row onto the user dict shape"""
+        return {
+            'id': row.get('ID'),
+            'username': row.get('Username'),
+            'email': row.get('Email'),
+            'full_name': row.get('Full Name', ''),
+            'phone_number': row.get('Phone Number', ''),
+            'address': row.get('Address', ''),
+            'pincode': row.get('Pincode', ''),
+            'state': row.get('State', ''),
+            'grid_id': row.get('Grid ID', ''),
+            'created_at': row.get('Created At') or datetime.now().isoformat()
+        }
+    
+    def import_rows(self, rows, overwrite_existing=False, job=None, sleep=None):
+        """Import user dicts in batches and save once at the end.
+        
+        Rows without a password hash share one bcrypt hash of the default password,
+        computed at most once per import, and are flagged password_reset_required.
+        Each batch is written under the write lock (one transaction with SQLite) and
+        nothing inside it yields. When a job is given its progress is updated after
+        every batch, and sleep(0) is called between batches so other greenlets keep
+        running.
+        """
+        imported_count = 0
+        skipped_count = 0
+        errors = []
+        default_hash = None
+        
+        batch = []
+        for row in itertools.chain(rows, [None]):
+            if row is not None:
+                batch.append(row)
+                if len(batch) < IMPORT_BATCH_SIZE:
+                    continue
             
-            for user_data in users_data:
-                try:
-                    # Check if user already exists
-                    existing_user = self.get_user_by_username(user_data.get('username', '')) or \
-                                  self.get_user_by_email(user_data.get('email', ''))
+            # Hashing yields to other greenlets, so it happens before the write transaction
+            if default_hash is None and any(not user_data.get('password_hash') for user_data in batch):
+                default_hash = User.hash_password(DEFAULT_IMPORT_PASSWORD)
+            
+            with self._writing():
+                # Re-read per batch: registrations may have taken ids since the last one
+                next_id = self._next_user_id()
+                for user_data in batch:
+                    username = (user_data.get('username') or '').strip()
+                    email = (user_data.get('email') or '').strip()
+                    if not username or not email:
+                        errors.append(f"Error importing user {username or 'unknown'}: username and email are required")
+                        continue
                     
+                    existing_user = self.get_user_by_username(username) or self.get_user_by_email(email)
                     if existing_user and not overwrite_existing:
                         skipped_count += 1
                         continue
                     
-                    # Generate new ID if not provided or if user exists
-                    if not user_data.get('id') or existing_user:
-                        user_data['id'] = str(len(self.users) + imported_count + 1)
-                    
-                    # If no password hash provided, generate a default one
-                    if not user_data.get('password_hash'):
-                        user_data['password_hash'] = User.hash_password('defaultpassword123')
-                    
-                    # Create user object
-                    user = User.from_dict(user_data)
-                    
-                    # Add or update user
-                    self.users[user.id] = user
-                    imported_count += 1
-                    
-                except Exception as e:
-                    errors.append(f"Error importing user {user_data.get('username', 'unknown')}: {str(e)}")
+                    try:
+                        user_data = dict(user_data, username=username, email=email)
+                        
+                        # No password hash provided: share one hash of the default password
+                        if not user_data.get('password_hash'):
+                            user_data['password_hash'] = default_hash
+                            user_data['password_reset_required'] = True
+                        
+                        if existing_user:
+                            # Overwrite replaces the matching account in place
+                            self._unindex_user(existing_user)
+                            self._put_user(User.from_dict(dict(user_data, id=existing_user.id)))
+                        else:
+                            # The row's own id when it is free, otherwise the next one
+                            user = self._add_new_user(
+                                lambda user_id: User.from_dict(dict(user_data, id=user_id)),
+                                user_data.get('id') or next_id
+                            )
+                            if user.id.isdigit():
+                                next_id = max(next_id, int(user.id) + 1)
+                        imported_count += 1
+                    except Exception as e:
+                        errors.append(f"Error importing user {username}: {str(e)}")
             
-            # Save changes
-            if imported_count > 0:
+            batch = []
+            if job is not None:
+                job.update(imported=imported_count, skipped=skipped_count, errors=errors)
+            if sleep is not None:
+                sleep(0)
+        
+        # Save changes
+        if imported_count > 0:
+            with self._writing():
                 self.save_users()
-            
-            return {
-                'success': True,
-                'imported': imported_count,
-                'skipped': skipped_count,
-                'errors': errors
-            }
-            
+        
+        return {
+            'success': True,
+            'imported': imported_count,
+            'skipped': skipped_count,
+            'errors': errors
+        }
+    
+    def import_users_from_json(self, json_data, overwrite_existing=False):
+        """Import users from JSON data"""
+        try:
+            users_data = json.loads(json_data) if isinstance(json_data, str) else json_data
         except Exception as e:
             return {
                 'success': False,
                 'error': f"Failed to parse JSON data: {str(e)}"
             }
+        return self.import_rows(users_data, overwrite_existing)
     
     def import_users_from_csv(self, csv_data, overwrite_existing=False):
         """Import users from CSV data"""
@@ -298,64 +559,212 @@ class UserManager:
         import io
         
         try:
-            csv_file = io.StringIO(csv_data)
-            reader = csv.DictReader(csv_file)
-            
-            imported_count = 0
-            skipped_count = 0
-            errors = []
-            
-            for row in reader:
-                try:
-                    # Check if user already exists
-                    existing_user = self.get_user_by_username(row.get('Username', '')) or \
-                                  self.get_user_by_email(row.get('Email', ''))
-                    
-                    if existing_user and not overwrite_existing:
-                        skipped_count += 1
-                        continue
-                    
-                    # Create user data
-                    user_data = {
-                        'id': row.get('ID') or str(len(self.users) + imported_count + 1),
-                        'username': row['Username'],
-                        'email': row['Email'],
-                        'password_hash': User.hash_password('defaultpassword123'),  # Default password
-                        'full_name': row.get('Full Name', ''),
-                        'phone_number': row.get('Phone Number', ''),
-                        'address': row.get('Address', ''),
-                        'pincode': row.get('Pincode', ''),
-                        'state': row.get('State', ''),
-                        'grid_id': row.get('Grid ID', ''),
-                        'created_at': row.get('Created At') or datetime.now().isoformat()
-                    }
-                    
-                    # Create user object
-                    user = User.from_dict(user_data)
-                    
-                    # Add or update user
-                    self.users[user.id] = user
-                    imported_count += 1
-                    
-                except Exception as e:
-                    errors.append(f"Error importing user {row.get('Username', 'unknown')}: {str(e)}")
-            
-            # Save changes
-            if imported_count > 0:
-                self.save_users()
-            
-            return {
-                'success': True,
-                'imported': imported_count,
-                'skipped': skipped_count,
-                'errors': errors
-            }
-            
+            reader = csv.DictReader(io.StringIO(csv_data))
+            return self.import_rows((self._row_from_csv(row) for row in reader), overwrite_existing)
         except Exception as e:
             return {
                 'success': False,
                 'error': f"Failed to parse CSV data: {str(e)}"
             }
     
+    def _read_import_file(self, path, file_format):
+        """Stream user dicts from an uploaded CSV or JSON file on disk"""
+        import csv
+        
+        if file_format == 'csv':
+            with open(path, 'r', encoding='utf-8', newline='') as f:
+                for row in csv.DictReader(f):
+                    yield self._row_from_csv(row)
+        else:
+            with open(path, 'r', encoding='utf-8') as f:
+                users_data = json.load(f)
+            if not isinstance(users_data, list):
+                raise ValueError("Expected a JSON list of users")
+            yield from users_data
+    
+    def _run_import_job(self, job, path, file_format, overwrite_existing, sleep):
+        job.update(status='running')
+        try:
+            result = self.import_rows(
+                self._read_import_file(path, file_format), overwrite_existing, job=job, sleep=sleep
+            )
+            job.update(status='completed', **result)
+        except Exception as e:
+            job.update(status='failed', success=False, error=f"Failed to import {file_format.upper()} data: {str(e)}")
+        finally:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+    
+    def start_import_job(self, path, file_format, overwrite_existing, start_background_task, sleep=None):
+        """Import an uploaded file in the background; returns the job to poll"""
+        job = ImportJob(file_format, self.import_jobs_dir)
+        job.save()
+        self.import_jobs[job.id] = job
+        self._prune_import_jobs()
+        start_background_task(self._run_import_job, job, path, file_format, overwrite_existing, sleep)
+        return job
+    
+    def _prune_import_jobs(self):
+        """Forget the oldest finished jobs beyond MAX_IMPORT_JOBS; running ones are kept"""
+        finished = [job_id for job_id, job in self.import_jobs.items() if job.finished_at]
+        for job_id in finished[:max(0, len(self.import_jobs) - MAX_IMPORT_JOBS)]:
+            del self.import_jobs[job_id]
+        
+        try:
+            names = [name for name in os.listdir(self.import_jobs_dir) if name.endswith('.json')]
+        except OSError:
+            return
+        saved = [ImportJob.load(self.import_jobs_dir, name[:-5]) for name in names]
+        finished = sorted((job for job in saved if job and job.finished_at), key=lambda job: job.created_at)
+        for job in finished[:max(0, len(saved) - MAX_IMPORT_JOBS)]:
+            try:
+                os.remove(os.path.join(self.import_jobs_dir, f'{job.id}.json'))
+            except OSError:
+                pass
+    
+    def get_import_job(self, job_id):
+        """Job started by this worker, or one another worker saved to the shared jobs directory"""
+        return self.import_jobs.get(job_id) or ImportJob.load(self.import_jobs_dir, job_id)
+    
+class SQLiteUserManager(UserManager):
+    """UserManager backed by a shared SQLite database instead of users.json.
+    
+    Lookups are indexed queries, so startup cost does not grow with the user count and
+    every gunicorn worker sees the same accounts. Every write runs in a transaction
+    (one per operation, one per import batch). New accounts are plain INSERTs, so a
+    worker that loses an id race gets a conflict and retries with the next id instead
+    of overwriting the other account; only explicit overwrites replace rows.
+    """
+    
+    SCHEMA = '''
+        CREATE TABLE IF NOT EXISTS users (
+            id TEXT PRIMARY KEY,
+            username TEXT NOT NULL,
+            email TEXT NOT NULL,
+            username_key TEXT NOT NULL UNIQUE,
+            email_key TEXT NOT NULL UNIQUE,
+            grid_id TEXT,
+            created_at TEXT,
+            data TEXT NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS idx_users_grid_id ON users(grid_id);
+        -- Lets MAX() over the numeric ids seek to the end instead of scanning
+        CREATE INDEX IF NOT EXISTS idx_users_numeric_id ON users(CAST(id AS INTEGER))
+            WHERE id NOT GLOB '*[^0-9]*';
+    '''
+    
+    def __init__(self, users_file='users.json', db=None, import_jobs_dir=IMPORT_JOBS_DIR):
+        self.db = db or get_database()
+        self.db.executescript(self.SCHEMA)
+        super().__init__(users_file, import_jobs_dir)
+    
+    def load_users(self):
+        """Nothing to load; on first use, migrate an existing users.json into the database"""
+        if self.db.query_one('SELECT 1 FROM users LIMIT 1') or not os.path.exists(self.users_file):
+            return
+        try:
+            with open(self.users_file, 'r') as f:
+                users_data = json.load(f)
+            with self.db.transaction():
+                for user_data in users_data:
+                    self._put_user(User.from_dict(user_data))
+            print(f"Migrated {len(users_data)} users from {self.users_file} to {self.db.path}")
+        except (json.JSONDecodeError, KeyError, sqlite3.Error) as e:
+            print(f"Could not migrate {self.users_file}: {e}")
+    
+    def save_users(self):
+        """Commit pending writes"""
+        self.db.commit()
+    
+    def _index_user(self, user):
+        pass  # The database's unique indexes replace the in-memory ones
+    
+    def _unindex_user(self, user):
+        pass
+    
+    def _rebuild_indexes(self):
+        pass
+    
+    @contextmanager
+    def _writing(self):
+        """One transaction per block; it also serializes this process's writers"""
+        with self.db.transaction():
+            yield
+    
+    def _key_owner(self, field, key):
+        row = self.db.query_one(f'SELECT id FROM users WHERE {field}_key = ?', (key,))
+        return row['id'] if row else None
+    
+    def _put_user(self, user):
+        """Add or replace a user (the explicit overwrite path and the users.json migration)"""
+        self.db.execute(
+            '''INSERT INTO users (id, username, email, username_key, email_key, grid_id, created_at, data)
+               VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+               ON CONFLICT(id) DO UPDATE SET
+                   username = excluded.username, email = excluded.email,
+                   username_key = excluded.username_key, email_key = excluded.email_key,
+                   grid_id = excluded.grid_id, created_at = excluded.created_at, data = excluded.data''',
+            (user.id, user.username, user.email, self._free_key('username', user.username, user),
+             self._free_key('email', user.email, user), user.grid_id, user.created_at, json.dumps(user.to_dict()))
+        )
+    
+    def _insert_user(self, user):
+        """Add a new user; False if another worker took the id first"""
+        try:
+            self.db.execute(
+                '''INSERT INTO users (id, username, email, username_key, email_key, grid_id, created_at, data)
+                   VALUES (?, ?, ?, ?, ?, ?, ?, ?)''',
+                (user.id, user.username, user.email, self._normalize(user.username), self._normalize(user.email),
+                 user.grid_id, user.created_at, json.dumps(user.to_dict()))
+            )
+        except sqlite3.IntegrityError as e:
+            if 'users.username_key' in str(e):
+                raise ValueError("Username already exists")
+            if 'users.email_key' in str(e):
+                raise ValueError("Email already exists")
+            return False
+        return True
+    
+    def _user_where(self, column, value):
+        row = self.db.query_one(f'SELECT data FROM users WHERE {column} = ?', (value,))
+        return User.from_dict(json.loads(row['data'])) if row else None
+    
+    def _user_by_key(self, field, value):
+        exact_key, key = self._lookup_keys(value)
+        row = self.db.query_one(
+            f'SELECT data FROM users WHERE {field}_key IN (?, ?) ORDER BY {field}_key = ? DESC LIMIT 1',
+            (exact_key, key, exact_key)
+        )
+        return User.from_dict(json.loads(row['data'])) if row else None
+    
+    def _next_user_id(self):
+        row = self.db.query_one("SELECT MAX(CAST(id AS INTEGER)) AS max_id FROM users WHERE id NOT GLOB '*[^0-9]*'")
+        return (row['max_id'] or 0) + 1
+    
+    def get_user(self, user_id):
+        """Get user by ID"""
+        return self._user_where('id', str(user_id))
+    
+    def get_user_by_username(self, username):
+        """Get user by username (case-insensitive)"""
+        return self._user_by_key('username', username)
+    
+    def get_user_by_email(self, email):
+        """Get user by email (case-insensitive)"""
+        return self._user_by_key('email', email)
+    
+    def delete_user(self, user_id):
+        """Delete a user by ID"""
+        with self._writing():
+            deleted = self.db.execute('DELETE FROM users WHERE id = ?', (str(user_id),)).rowcount
+        return deleted > 0
+    
+    def get_all_users(self):
+        """Get all users"""
+        rows = self.db.query('SELECT data FROM users ORDER BY rowid')
+        return [User.from_dict(json.loads(row['data'])) for row in rows]
+
 # Global user manager instance
-user_manager = UserManager()
+user_manager = SQLiteUserManager() if STORAGE_BACKEND == 'sqlite' else UserManager()
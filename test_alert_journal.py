@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+Test script to verify alert journal replay, compaction and cleanup during compaction
+"""
+import sys
+import os
+import tempfile
+import threading
+import time
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from utils.alert_system import AlertJournal, AlertManager, AlertSeverity, AlertType
+
+def new_manager(alerts_file, compact_after=1000, journal=None):
+    return AlertManager(alerts_file, journal or AlertJournal(alerts_file, compact_after=compact_after))
+
+def create(manager, title):
+    return manager.create_alert(AlertType.FAULT_DETECTION, AlertSeverity.LOW, title, 'message', user_id='1')
+
+def test_journal_replay():
+    print("=== Alert Journal Replay Test ===")
+    alerts_file = os.path.join(tempfile.mkdtemp(), 'alerts.json')
+    manager = new_manager(alerts_file)
+    alerts = [create(manager, f'alert {i}') for i in range(5)]
+    manager.mark_alert_as_read(alerts[1].id)
+    manager.acknowledge_alert(alerts[2].id, '1')
+    assert not os.path.exists(alerts_file), "routine changes should only append to the journal"
+
+    reloaded = new_manager(alerts_file)
+    assert [alert.id for alert in reloaded.alerts] == [alert.id for alert in alerts]
+    assert reloaded.get_alert_by_id(alerts[1].id).is_read
+    assert reloaded.get_alert_by_id(alerts[2].id).is_acknowledged
+    assert reloaded.get_alert_summary('1')['unread'] == 4
+    print("✅ Creates and updates are replayed from the journal")
+
+    # A torn final line from an interrupted write is skipped
+    with open(reloaded.journal.journal_file, 'a') as f:
+        f.write('{"op": "create", "alert": {')
+    assert len(new_manager(alerts_file).alerts) == 5
+    print("✅ A torn journal line is ignored")
+
+def test_background_compaction():
+    print("=== Alert Journal Compaction Test ===")
+    alerts_file = os.path.join(tempfile.mkdtemp(), 'alerts.json')
+    manager = new_manager(alerts_file, compact_after=10)
+    alerts = [create(manager, f'alert {i}') for i in range(25)]
+    manager.journal._compaction_thread.join()
+    assert os.path.exists(alerts_file)
+    assert manager.journal.events_since_compaction < len(alerts)
+    assert [alert.id for alert in new_manager(alerts_file).alerts] == [alert.id for alert in alerts]
+    print("✅ Compaction folds the journal into the snapshot without losing alerts")
+
+class GatedJournal(AlertJournal):
+    """Holds the background compaction until the test releases it"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.gate = threading.Event()
+
+    def _compact_rotated(self, alerts_data):
+        self.gate.wait()
+        super()._compact_rotated(alerts_data)
+
+def test_cleanup_during_compaction():
+    print("=== Cleanup During Compaction Test ===")
+    alerts_file = os.path.join(tempfile.mkdtemp(), 'alerts.json')
+    journal = GatedJournal(alerts_file, compact_after=5)
+    manager = new_manager(alerts_file, journal=journal)
+    alerts = [create(manager, f'alert {i}') for i in range(6)]
+    assert journal._compaction_thread.is_alive()
+
+    for alert in alerts[:3]:
+        alert.timestamp = '2000-01-01T00:00:00'
+    cleanup = threading.Thread(target=manager.cleanup_old_alerts)
+    cleanup.start()
+    time.sleep(0.2)  # Cleanup waits for the compaction holding the older snapshot
+    journal.gate.set()
+    cleanup.join()
+
+    kept = [alert.id for alert in alerts[3:]]
+    assert [alert.id for alert in manager.alerts] == kept
+    assert [alert.id for alert in new_manager(alerts_file).alerts] == kept
+    print("✅ Alerts removed by cleanup stay removed after a concurrent compaction")
+
+if __name__ == "__main__":
+    test_journal_replay()
+    test_background_compaction()
+    test_cleanup_during_compaction()
@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+"""
+Test script to verify alert indexes, summary counters and deduplication against the alert store
+"""
+import sys
+import os
+import random
+import tempfile
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from utils.alert_system import AlertManager, AlertSeverity, AlertType, EnergyAlertAnalyzer, SQLiteAlertManager
+from utils.sqlite_db import SQLiteDatabase
+
+BATTERY_LOW = {'storage_percentage': 10.0}
+USERS = ['1', '2', '3', None]  # None: broadcast to everyone
+
+def json_manager(directory):
+    return AlertManager(os.path.join(directory, 'alerts.json'))
+
+def sqlite_manager(directory):
+    return SQLiteAlertManager(os.path.join(directory, 'alerts.json'), SQLiteDatabase(os.path.join(directory, 'alerts.db')))
+
+def expected_alerts(alerts, user_id=None, unread_only=False, unacknowledged_only=False, limit=None):
+    """get_alerts by a full scan, as before the indexes"""
+    matching = [a for a in alerts
+                if (not user_id or a.user_id in (user_id, None))
+                and not (unread_only and a.is_read) and not (unacknowledged_only and a.is_acknowledged)]
+    matching.sort(key=lambda a: a.timestamp, reverse=True)
+    return matching[:limit] if limit else matching
+
+def expected_summary(alerts, user_id=None):
+    """get_alert_summary by a full scan, as before the counters"""
+    matching = [a for a in alerts if not user_id or a.user_id in (user_id, None)]
+    return {
+        'total': len(matching),
+        'unread': sum(not a.is_read for a in matching),
+        'unacknowledged': sum(not a.is_acknowledged for a in matching),
+        'by_severity': {severity.value: sum(a.severity == severity for a in matching)
+                        for severity in (AlertSeverity.CRITICAL, AlertSeverity.HIGH, AlertSeverity.MEDIUM, AlertSeverity.LOW)},
+        'by_type': {alert_type.value: sum(a.alert_type == alert_type for a in matching) for alert_type in AlertType}
+    }
+
+def exercise(manager, seed=7, count=300):
+    """Random creates, reads, acknowledgements and repeats; returns every alert created"""
+    rng = random.Random(seed)
+    alerts = []
+    for i in range(count):
+        alert = manager.create_alert(rng.choice(list(AlertType)), rng.choice(list(AlertSeverity)),
+                                     f'condition {i % 20}', 'message', user_id=rng.choice(USERS))
+        alerts.append(alert)
+        action = rng.random()
+        target = rng.choice(alerts)
+        if action < 0.2:
+            manager.mark_alert_as_read(target.id)
+        elif action < 0.35:
+            manager.acknowledge_alert(target.id, '1')
+        elif action < 0.5:
+            manager.record_occurrence(target.id, 'again', severity=rng.choice(list(AlertSeverity)))
+    return alerts
+
+def check_queries(manager, alerts):
+    stored = [manager.get_alert_by_id(alert.id) for alert in alerts]
+    for user_id in USERS:
+        for unread_only, unacknowledged_only, limit in ((False, False, None), (True, False, None),
+                                                        (False, True, 10), (True, True, 5)):
+            got = manager.get_alerts(user_id, unread_only, unacknowledged_only, limit)
+            want = expected_alerts(stored, user_id, unread_only, unacknowledged_only, limit)
+            assert [a.id for a in got] == [a.id for a in want], (user_id, unread_only, unacknowledged_only, limit)
+        assert manager.get_alert_summary(user_id) == expected_summary(stored, user_id), user_id
+
+def test_indexes_match_full_scan():
+    print("=== Alert Index Test ===")
+    directory = tempfile.mkdtemp()
+    manager = json_manager(directory)
+    alerts = exercise(manager)
+    check_queries(manager, alerts)
+    print("✅ Indexed filters and running counters match a full scan")
+
+    # Replayed from the journal, and after a cleanup rebuilds the indexes
+    check_queries(json_manager(directory), alerts)
+    for alert in alerts[::3]:
+        alert.timestamp = '2000-01-01T00:00:00'
+    manager.cleanup_old_alerts()
+    kept = [alert for alert in alerts if alert.timestamp != '2000-01-01T00:00:00']
+    check_queries(manager, kept)
+    assert manager.get_alert_by_id(alerts[0].id) is None
+    print("✅ The indexes survive a reload and a cleanup")
+
+def test_sqlite_matches_json():
+    print("=== SQLite Alert Backend Test ===")
+    directory = tempfile.mkdtemp()
+    manager = sqlite_manager(directory)
+    alerts = exercise(manager)
+    check_queries(manager, alerts)
+    check_queries(sqlite_manager(directory), alerts)
+    print("✅ SQLite filters, ordering and summaries match a full scan")
+
+    for alert in alerts[::3]:
+        manager.db.execute('UPDATE alerts SET timestamp = ? WHERE id = ?', ('2000-01-01T00:00:00', alert.id))
+    manager.db.commit()
+    assert manager.cleanup_old_alerts() == len(alerts[::3])
+    kept = [alert for i, alert in enumerate(alerts) if i % 3]
+    check_queries(manager, kept)
+    print("✅ Cleanup deletes old rows from the database")
+
+def check_dedup(make_manager, backend):
+    directory = tempfile.mkdtemp()
+    analyzer = EnergyAlertAnalyzer(make_manager(directory))
+    first = analyzer.analyze_and_create_alerts(BATTERY_LOW, user_id='1')
+    assert [alert.alert_type for alert in first] == [AlertType.BATTERY_LOW]
+    assert analyzer.analyze_and_create_alerts(BATTERY_LOW, user_id='1') == []
+    print(f"✅ {backend}: a repeat within the cool-down is folded into the open alert")
+
+    # A restarted process (or another worker) finds the open alert in the store
+    restarted = EnergyAlertAnalyzer(make_manager(directory))
+    assert restarted.analyze_and_create_alerts(BATTERY_LOW, user_id='1') == []
+    assert len(restarted.analyze_and_create_alerts(BATTERY_LOW, user_id='2')) == 1
+    alert = restarted.alert_manager.get_alert_by_id(first[0].id)
+    assert alert.occurrence_count == 3 and not alert.is_read
+    print(f"✅ {backend}: deduplication survives a restart and stays per user")
+
+    # Escalation raises the severity of the open alert
+    restarted.alert_manager.mark_alert_as_read(alert.id)
+    restarted.analyze_and_create_alerts({'storage_percentage': 5.0}, user_id='1')
+    assert restarted.alert_manager.get_alert_by_id(alert.id).severity in (AlertSeverity.HIGH, AlertSeverity.CRITICAL)
+
+    # Once acknowledged, the next occurrence opens a new alert
+    restarted.alert_manager.acknowledge_alert(alert.id, '1')
+    assert len(restarted.analyze_and_create_alerts(BATTERY_LOW, user_id='1')) == 1
+    print(f"✅ {backend}: an acknowledged alert is not reopened")
+
+def test_dedup_json_backend():
+    print("=== Alert Deduplication (JSON journal) ===")
+    check_dedup(json_manager, 'json')
+
+def test_dedup_sqlite_backend():
+    print("=== Alert Deduplication (SQLite) ===")
+    check_dedup(sqlite_manager, 'sqlite')
+
+if __name__ == "__main__":
+    test_indexes_match_full_scan()
+    test_sqlite_matches_json()
+    test_dedup_json_backend()
+    test_dedup_sqlite_backend()
@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+"""
+Test script to verify the chart JSON cache: time-bucketed keys and LRU limits
+"""
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from utils.chart_cache import ChartCache
+
+def test_bucketed_keys():
+    print("=== Chart Cache Key Test ===")
+    cache = ChartCache(bucket_seconds=60)
+    builds = []
+    def build():
+        builds.append(1)
+        return '{"data": []}'
+
+    key = cache.make_key('solar', 24, 'GRID-1', now=120.0)
+    assert cache.get_or_build(key, build) == cache.get_or_build(key, build) == '{"data": []}'
+    assert len(builds) == 1 and cache.stats()['hits'] == 1 and cache.stats()['misses'] == 1
+    print("✅ Requests within a bucket share one rendered chart")
+
+    assert cache.make_key('solar', 24, 'GRID-1', now=179.9) == key
+    assert cache.make_key('solar', 24, 'GRID-1', now=180.0) != key
+    assert cache.make_key('solar', 48, 'GRID-1', now=120.0) != key
+    assert cache.make_key('solar', 24, 'GRID-2', now=120.0) != key
+    print("✅ Keys change with the minute, the window and the grid")
+
+    assert cache.seconds_left_in_bucket(now=130.0) == 50 and cache.seconds_left_in_bucket(now=179.9) == 1
+
+def test_limits():
+    print("=== Chart Cache Limit Test ===")
+    cache = ChartCache(max_entries=3, max_bytes=100)
+    for name in 'abc':
+        cache.put(name, name * 10)
+    cache.get('a')  # Most recently used now
+    cache.put('d', 'd' * 10)
+    assert cache.get('b') is None and cache.get('a') is not None
+    print("✅ The least recently used entry is evicted past max_entries")
+
+    cache.put('e', 'e' * 80)
+    assert cache.stats()['bytes'] <= 100 and cache.get('e') is not None
+    cache.put('huge', 'x' * 101)
+    assert cache.get('huge') is None
+    print("✅ Total size stays within max_bytes and oversized charts are not stored")
+
+    error = ({'error': 'no data'}, 500)
+    assert cache.get_or_build('f', lambda: error) == error and cache.get('f') is None
+    print("✅ Error responses are passed through uncached")
+
+if __name__ == "__main__":
+    test_bucketed_keys()
+    test_limits()
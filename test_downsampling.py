@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+"""
+Test script to verify chart downsampling keeps peaks and dips within the point budget
+"""
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import numpy as np
+import pandas as pd
+
+from utils.downsampling import downsample_frame, downsample_indices, lttb_indices, minmax_indices
+
+def make_series(n=10000, seed=3):
+    rng = np.random.default_rng(seed)
+    x = np.datetime64('2026-01-01T00:00', 'm') + np.arange(n) * np.timedelta64(1, 'm')
+    y = np.sin(np.arange(n) / 300) * 1000 + rng.normal(0, 20, n)
+    y[1234] = 5000     # Spike, e.g. an appliance surge
+    y[7777] = -4000    # Dip, e.g. a fault
+    return x, y
+
+def test_lttb():
+    print("=== LTTB Downsampling Test ===")
+    x, y = make_series()
+    indices = lttb_indices(x, y, 500)
+    assert len(indices) == 500 and indices[0] == 0 and indices[-1] == len(y) - 1
+    assert np.all(np.diff(indices) > 0)
+    assert 1234 in indices and 7777 in indices
+    print("✅ LTTB keeps the endpoints, the spike and the dip in 500 points")
+
+    # A fixed stride, as the charts used before, misses both
+    stride = np.arange(0, len(y), len(y) // 500)
+    assert 1234 not in stride and 7777 not in stride
+
+    assert np.array_equal(lttb_indices(x[:100], y[:100], 500), np.arange(100))
+    print("✅ Series within the budget are returned whole")
+
+def test_minmax_and_columns():
+    x, y = make_series()
+    indices = minmax_indices(y, 200)
+    assert len(indices) <= 200 and 1234 in indices and 7777 in indices
+    print("✅ The min/max envelope keeps both extremes")
+
+    other = -y
+    indices = downsample_indices(x, [y, other], max_points=500)
+    assert len(indices) <= 500 and 1234 in indices and 7777 in indices
+    assert np.all(np.diff(indices) > 0)
+    print("✅ Shared picks keep every column's extremes on one x axis")
+
+def test_downsample_frame():
+    x, y = make_series()
+    df = pd.DataFrame({'timestamp': pd.to_datetime(x), 'consumption': y, 'solar_power': np.abs(y)})
+    sampled = downsample_frame(df, 'timestamp', ['consumption', 'solar_power'])
+    assert len(sampled) <= 500
+    assert sampled['consumption'].max() == y.max() and sampled['consumption'].min() == y.min()
+    assert sampled['timestamp'].is_monotonic_increasing
+    empty = downsample_frame(df.iloc[:0], 'timestamp', ['consumption'])
+    assert len(empty) == 0
+    print("✅ Frames are downsampled to the budget with their extremes")
+
+if __name__ == "__main__":
+    test_lttb()
+    test_minmax_and_columns()
+    test_downsample_frame()
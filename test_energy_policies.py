@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+Test script to verify vectorized fault detection and trading analysis match the per-record loops
+"""
+import sys
+import os
+from datetime import datetime, timedelta
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import numpy as np
+
+from utils.data_generator import SOLAR_FAULT_POLICY, TRADING_POLICY, RenewableEnergyDataGenerator
+
+def loop_solar_faults(data, policy):
+    """detect_solar_faults as a per-record loop, as before vectorizing"""
+    faults = []
+    for record in data:
+        sun_intensity = record['sun_intensity']
+        solar_power = record['solar_power']
+        if sun_intensity > policy['min_sun_intensity']:
+            expected_power = (sun_intensity / 100) * policy['rated_power'] * policy['performance_ratio']
+            if solar_power < expected_power * policy['min_efficiency']:
+                faults.append({
+                    'timestamp': record['timestamp'],
+                    'fault_type': 'Low Solar Efficiency',
+                    'sun_intensity': sun_intensity,
+                    'actual_power': solar_power,
+                    'expected_power': expected_power,
+                    'efficiency_loss': round(((expected_power - solar_power) / expected_power) * 100, 2)
+                })
+    return faults
+
+def loop_trading(data, policy):
+    """analyze_energy_trading as a per-record loop, as before vectorizing"""
+    opportunities = []
+    for record in data:
+        net_power = record['net_power']
+        storage_percentage = record['storage_percentage']
+        if net_power > policy['sell_min_surplus'] and storage_percentage > policy['sell_min_storage']:
+            opportunities.append({
+                'timestamp': record['timestamp'],
+                'opportunity_type': 'SELL',
+                'surplus_power': round(net_power, 2),
+                'recommended_sell': round(net_power * policy['sell_fraction'], 2),
+                'estimated_revenue': round(net_power * policy['sell_fraction'] * policy['sell_price'], 2)
+            })
+        elif net_power < -policy['buy_min_deficit'] and storage_percentage < policy['buy_max_storage']:
+            opportunities.append({
+                'timestamp': record['timestamp'],
+                'opportunity_type': 'BUY',
+                'deficit_power': round(abs(net_power), 2),
+                'recommended_buy': round(abs(net_power) * policy['buy_fraction'], 2),
+                'estimated_cost': round(abs(net_power) * policy['buy_fraction'] * policy['buy_price'], 2)
+            })
+    return opportunities
+
+def make_records(n=5000, seed=5):
+    """Readings spread over every branch, plus values sitting on a rounding boundary"""
+    rng = np.random.default_rng(seed)
+    start = datetime(2026, 3, 1)
+    records = [{
+        'timestamp': start + timedelta(minutes=i),
+        'sun_intensity': float(rng.uniform(0, 100)),
+        'solar_power': float(rng.uniform(0, 8000)),
+        'net_power': float(rng.uniform(-6000, 6000)),
+        'storage_percentage': float(rng.uniform(0, 100))
+    } for i in range(n)]
+    for i, value in enumerate((2000.005, 2675.125, -1000.015, -3456.785, 4000.5)):
+        records[i].update(net_power=value, storage_percentage=90.0 if value > 0 else 10.0)
+    return records
+
+def columns(records):
+    arrays = {key: np.array([record[key] for record in records]) for key in records[0] if key != 'timestamp'}
+    arrays['timestamp'] = np.array([record['timestamp'] for record in records], dtype='datetime64[m]')
+    return arrays
+
+POLICIES = {
+    'default': {},
+    'strict': {'min_sun_intensity': 50, 'min_efficiency': 0.8, 'sell_min_storage': 60, 'buy_max_storage': 50},
+    'prices': {'sell_price': 0.21, 'buy_price': 0.09, 'sell_fraction': 0.65}
+}
+
+def test_solar_faults_match_loop():
+    print("=== Vectorized Solar Fault Test ===")
+    generator = RenewableEnergyDataGenerator(seed=1)
+    records = make_records()
+    assert generator.detect_solar_faults(records) == loop_solar_faults(records, SOLAR_FAULT_POLICY)
+    print("✅ detect_solar_faults matches the per-record loop")
+
+    results = generator.evaluate_solar_fault_policies(columns(records), POLICIES)
+    for name, overrides in POLICIES.items():
+        assert results[name] == loop_solar_faults(records, {**SOLAR_FAULT_POLICY, **overrides}), name
+    print("✅ Every policy matches on columnar input, timestamps included")
+
+def test_trading_matches_loop():
+    print("=== Vectorized Trading Analysis Test ===")
+    generator = RenewableEnergyDataGenerator(seed=1)
+    records = make_records()
+    expected = loop_trading(records, TRADING_POLICY)
+    assert generator.analyze_energy_trading(records) == expected
+    assert {o['opportunity_type'] for o in expected} == {'SELL', 'BUY'}
+    print("✅ analyze_energy_trading matches the per-record loop, rounding boundaries included")
+
+    results = generator.evaluate_trading_policies(columns(records), POLICIES)
+    for name, overrides in POLICIES.items():
+        assert results[name] == loop_trading(records, {**TRADING_POLICY, **overrides}), name
+    assert generator.analyze_energy_trading([]) == []
+    print("✅ Every policy matches on columnar input")
+
+if __name__ == "__main__":
+    test_solar_faults_match_loop()
+    test_trading_matches_loop()
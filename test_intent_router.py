@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+"""
+Test script to verify chatbot intent routing priority and keyword matching
+"""
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from utils.intent_router import IntentRouter
+
+INTENTS = [
+    ('storage', ['battery', 'storage', 'charge']),
+    ('generation', ['generation', 'solar', 'wind']),
+    ('weather', ['weather', 'sun', 'wind speed']),
+    ('greeting', ['hello', 'hi', 'good morning']),
+    ('math', ['calculate'])
+]
+
+router = IntentRouter(INTENTS, patterns={'math': r'\d+\s*[+\-*/]\s*\d+'})
+
+CASES = [
+    # (question, expected intent)
+    ("How much solar did we produce?", 'generation'),
+    ("Is the battery charged from solar?", 'storage'),             # Earlier intent wins
+    ("What is the wind speed?", 'generation'),                     # 'wind' belongs to generation first
+    ("Weather and wind speed today", 'generation'),
+    ("Hello there", 'greeting'),
+    ("Good morning!", 'greeting'),                                 # Multi-word phrase
+    ("Show me this week's weather", 'weather'),                    # 'hi' does not match inside 'this'
+    ("Any charges left?", 'storage'),                              # Trailing plural 's'
+    ("What is 12 * 4?", 'math'),                                   # Pattern match
+    ("Calculate the storage", 'storage'),                          # 'storage' outranks the 'calculate' keyword
+    ("Tell me something", 'general')                               # Default intent
+]
+
+def test_intent_priority():
+    print("=== Intent Router Priority Test ===\n")
+    for question, expected in CASES:
+        intent = router.classify(question).intent
+        assert intent == expected, f"{question!r} routed to {intent}, expected {expected}"
+        print(f"✅ {question!r} -> {intent}")
+
+def test_match_details():
+    match = router.match("good morning, how is the battery?")
+    assert match.intent == 'storage' and match.keyword == 'battery' and match.priority == 0
+    assert router.match("nothing relevant here") is None
+    print("✅ Matches report the winning keyword and priority")
+
+    counted = IntentRouter(INTENTS)
+    for question in ("Hi", "Hello", "solar output", "anything else"):
+        counted.classify(question)
+    assert counted.stats() == {'greeting': 2, 'generation': 1, 'general': 1}
+    print(f"✅ Classification counts: {counted.stats()}")
+
+if __name__ == "__main__":
+    test_intent_priority()
+    test_match_details()
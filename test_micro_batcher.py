@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+"""
+Test script to verify the micro-batcher coalesces concurrent predictions
+"""
+import sys
+import os
+import threading
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from utils.micro_batcher import MicroBatcher
+
+def run_concurrently(batcher, items):
+    """predict() for every item from its own thread; returns results (or errors) in item order"""
+    results = [None] * len(items)
+    start = threading.Barrier(len(items))
+
+    def call(i):
+        start.wait()
+        try:
+            results[i] = batcher.predict(items[i])
+        except Exception as e:
+            results[i] = e
+
+    threads = [threading.Thread(target=call, args=(i,)) for i in range(len(items))]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results
+
+def test_coalescing():
+    print("=== Micro-Batcher Test ===")
+    calls = []
+    def predict_batch(items):
+        calls.append(len(items))
+        return [item * 2 for item in items]
+
+    batcher = MicroBatcher(predict_batch, max_batch_size=8, max_wait_seconds=0.2)
+    results = run_concurrently(batcher, list(range(20)))
+    assert results == [float(i * 2) for i in range(20)]
+    print("✅ Every caller gets the result for its own item")
+
+    assert sum(calls) == 20 and max(calls) <= 8 and len(calls) < 20
+    assert batcher.stats()['items'] == 20 and batcher.stats()['batches'] == len(calls)
+    print(f"✅ 20 concurrent calls ran as {len(calls)} batches of at most 8")
+
+    assert batcher.predict(21) == 42.0
+    print("✅ A lone call is flushed after the wait")
+
+def test_errors_reach_every_caller():
+    def predict_batch(items):
+        raise ValueError("model not loaded")
+
+    batcher = MicroBatcher(predict_batch, max_wait_seconds=0.1)
+    results = run_concurrently(batcher, list(range(5)))
+    assert all(isinstance(result, ValueError) for result in results)
+    print("✅ A failed batch raises in every caller waiting on it")
+
+if __name__ == "__main__":
+    test_coalescing()
+    test_errors_reach_every_caller()
@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+Test script to verify the NumPy inference engine matches the torch models, and batched predictions
+"""
+import sys
+import os
+import tempfile
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import numpy as np
+import torch
+from sklearn.preprocessing import StandardScaler
+
+from models.ml_models import MODEL_CLASSES, RenewableEnergyMLManager
+from models.model_registry import ModelRegistry
+from models.numpy_inference import FEATURE_BUILDERS, MODEL_NAMES, NumpyInferenceEngine
+from utils.data_generator import RenewableEnergyDataGenerator
+
+def readings(hours=6, seed=11):
+    """A dict of arrays, as the time-series store and the batch APIs use"""
+    return RenewableEnergyDataGenerator(seed=seed).generate_complete_arrays(hours_back=hours)
+
+def record(data, i):
+    return {column: values[i] for column, values in data.items()}
+
+def published_models(data):
+    """An ML manager and a NumPy engine serving the same untrained networks from one registry"""
+    directory = tempfile.mkdtemp()
+    registry = ModelRegistry(os.path.join(directory, 'registry'))
+    manager = RenewableEnergyMLManager(model_dir=directory, registry=registry)
+    torch.manual_seed(0)
+    for name in MODEL_NAMES:
+        scaler = StandardScaler().fit(FEATURE_BUILDERS[name](data, True))
+        manager.save_model(name, MODEL_CLASSES[name](), scaler)
+    return manager, NumpyInferenceEngine(model_dir=directory, registry=registry)
+
+def test_numpy_matches_torch():
+    print("=== NumPy vs Torch Inference Test ===")
+    data = readings()
+    manager, engine = published_models(data)
+    torch_batches = {
+        'solar_predictor': manager.predict_solar_power_batch,
+        'wind_predictor': manager.predict_wind_power_batch,
+        'fault_detector': manager.predict_fault_probability_batch,
+        'consumption_predictor': manager.predict_consumption_batch
+    }
+    for name in MODEL_NAMES:
+        assert engine.has(name)
+        for series in (False, True):
+            expected = torch_batches[name](data, series=series)
+            got = engine.predict(name, data, series=series)
+            assert got.shape == expected.shape
+            assert np.allclose(got, expected, rtol=1e-4, atol=1e-5), f"{name} (series={series}) differs"
+    print("✅ Batch predictions match torch for every model, per reading and as a series")
+
+    for i in (0, 100, len(data['timestamp']) - 1):
+        reading = record(data, i)
+        assert np.isclose(engine.predict_solar_power(reading), manager.predict_solar_power(reading), rtol=1e-4, atol=1e-5)
+        assert np.isclose(engine.predict_fault_probability(reading), manager.predict_fault_probability(reading),
+                          rtol=1e-4, atol=1e-5)
+        for name in MODEL_NAMES:
+            assert np.isclose(engine.predict_one(name, reading), engine.predict(name, [reading])[0])
+    print("✅ Single predictions match torch and the batch path")
+
+def test_batch_shapes_and_chunks():
+    print("=== Batched Prediction Test ===")
+    data = readings(hours=2)
+    manager, engine = published_models(data)
+    rows = [record(data, i) for i in range(len(data['timestamp']))]
+    whole = manager.predict_fault_probability_batch(data)
+    assert np.allclose(manager.predict_fault_probability_batch(rows), whole)
+    assert np.allclose(manager.predict_fault_probability_batch(data, max_batch_size=7), whole)
+    assert np.allclose(engine.predict('fault_detector', data, max_batch_size=7), engine.predict('fault_detector', rows))
+    print("✅ Lists of readings and dicts of arrays agree, whatever the chunk size")
+
+    singles = [manager.predict_fault_probability(row) for row in rows[:20]]
+    assert np.allclose(whole[:20], singles, rtol=1e-4, atol=1e-5)
+    assert len(manager.predict_solar_power_batch([])) == 0 and len(engine.predict('solar_predictor', [])) == 0
+    print("✅ Batch rows are scored like single predictions; empty batches give empty results")
+
+if __name__ == "__main__":
+    test_numpy_matches_torch()
+    test_batch_shapes_and_chunks()
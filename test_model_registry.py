@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""
+Test script to verify model registry activation and rollback history
+"""
+import sys
+import os
+import tempfile
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import numpy as np
+
+from models.model_registry import ModelRegistry
+
+def publish(registry, value, activate=True):
+    return registry.publish('solar_predictor', {'weight_0': np.full((2, 1), value)}, {'note': value}, activate=activate)
+
+def test_rollback_history():
+    print("=== Model Registry Rollback Test ===")
+    registry = ModelRegistry(tempfile.mkdtemp())
+    assert registry.active_version('solar_predictor') is None
+
+    assert [publish(registry, value) for value in (1.0, 2.0, 3.0)] == [1, 2, 3]
+    assert registry.active_version('solar_predictor') == 3
+    print("✅ Each publish activates the new version")
+
+    assert registry.rollback('solar_predictor') == 2
+    assert registry.rollback('solar_predictor') == 1
+    print("✅ Rollback walks back through the activation history")
+    try:
+        registry.rollback('solar_predictor')
+        raise AssertionError("rollback past the first version should fail")
+    except ValueError:
+        print("✅ Rollback past the first activation is refused")
+
+    # Re-activating moves a version to the end of the history instead of duplicating it
+    registry.activate('solar_predictor', 3)
+    registry.activate('solar_predictor', 2)
+    assert registry.rollback('solar_predictor') == 3
+    assert registry.rollback('solar_predictor') == 1
+    print("✅ Activations reorder the history")
+
+    arrays, metadata = registry.load('solar_predictor')
+    assert metadata['version'] == 1 and arrays['weight_0'][0, 0] == 1.0
+    print("✅ The active bundle is loaded by default")
+
+def test_activation_checks():
+    print("=== Model Registry Activation Checks ===")
+    registry = ModelRegistry(tempfile.mkdtemp())
+    publish(registry, 1.0)
+    assert publish(registry, 2.0, activate=False) == 2
+    assert registry.active_version('solar_predictor') == 1
+    print("✅ Publishing without activation keeps the served version")
+
+    try:
+        registry.activate('solar_predictor', 5)
+        raise AssertionError("activating a missing version should fail")
+    except ValueError:
+        print("✅ Unknown versions cannot be activated")
+
+    def reject(name, version):
+        raise ValueError(f'{name} v{version} is broken')
+    for action in (lambda: registry.activate('solar_predictor', 2, validate=reject),
+                   lambda: registry.rollback('solar_predictor', validate=reject)):
+        try:
+            action()
+        except ValueError:
+            pass
+        assert registry.active_version('solar_predictor') == 1
+    print("✅ A failed validation leaves the pointer unchanged")
+
+if __name__ == "__main__":
+    test_rollback_history()
+    test_activation_checks()
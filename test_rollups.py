@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+Test script to verify the rollup summaries against aggregation over raw minutes
+"""
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import numpy as np
+
+from utils.data_generator import RenewableEnergyDataGenerator
+from utils.rollups import RollupStore, finalize, group_stats, minute_stats, summarize, to_minute
+from utils.timeseries_store import TimeSeriesStore
+
+COMPARED_STATS = ('count', 'consumption_sum', 'consumption_min', 'consumption_max', 'consumption_first',
+                  'consumption_last', 'consumption_std', 'net_energy_mean', 'overall_efficiency_mean')
+
+def make_rollups(days=3, levels=None):
+    store = TimeSeriesStore(capacity_minutes=days * 1440, generator=RenewableEnergyDataGenerator(seed=7))
+    rollups = RollupStore(store, levels) if levels else RollupStore(store)
+    rollups.update()
+    return store, rollups
+
+def raw_summary(store, start, stop):
+    arrays = store.slice(start=np.datetime64(start, 'm'), end=np.datetime64(stop - 1, 'm'))
+    return finalize(summarize(minute_stats(arrays)))
+
+def assert_same(expected, actual, label):
+    for key in COMPARED_STATS:
+        assert np.allclose(expected[key], actual[key], equal_nan=True), f"{label}: {key} differs"
+
+def check_random_windows(store, rollups, windows, label):
+    rng = np.random.default_rng(42)
+    oldest, newest = to_minute(store.oldest_timestamp), rollups.newest_minute
+    for _ in range(windows):
+        start = int(rng.integers(oldest, newest))
+        stop = int(rng.integers(start + 1, newest + 2))
+        assert_same(raw_summary(store, start, stop), rollups.summary(start, stop), f"{label} [{start}, {stop})")
+    print(f"✅ {windows} random windows match raw aggregation ({label})")
+
+def test_summaries_match_raw_minutes():
+    print("=== Rollup summaries vs raw minutes ===")
+    store, rollups = make_rollups()
+    check_random_windows(store, rollups, 50, 'default levels')
+
+    # Windows aligned to whole days are answered from the daily level
+    start = to_minute(store.oldest_timestamp) // 1440 * 1440 + 1440
+    assert_same(raw_summary(store, start, start + 1440), rollups.summary(start, start + 1440), 'whole day')
+    print("✅ Whole-day window matches raw aggregation")
+
+def test_hourly_groups_match_raw_minutes():
+    print("=== Hour-of-day groups vs raw minutes ===")
+    store, rollups = make_rollups()
+    start, stop = rollups.recent(36)
+    stats = minute_stats(store.slice(start=np.datetime64(start, 'm'), end=np.datetime64(stop - 1, 'm')))
+    expected = finalize(group_stats(stats, stats['start'] // 60 % 24), keyed=True)
+    actual = rollups.group(start, stop, 'hour')
+    assert list(expected['key']) == list(actual['key'])
+    assert_same(expected, actual, 'hourly groups')
+    print("✅ 24 hourly groups match raw aggregation")
+
+def test_retention():
+    print("=== Rollup retention ===")
+    levels = (('15min', 15, 8), ('hourly', 60, 6), ('daily', 1440, 2))
+    store, rollups = make_rollups(levels=levels)
+    for level, (name, minutes, retention) in zip(rollups.levels, levels):
+        starts = level.rows['start'][:level.size]
+        assert level.size <= 2 * retention, f"{name} keeps {level.size} buckets"
+        assert np.all(np.diff(starts) == minutes), f"{name} buckets are not consecutive"
+        print(f"✅ {name}: {level.size} consecutive buckets kept (retention {retention})")
+    # Ranges older than a level's retention fall back to finer levels and raw minutes
+    check_random_windows(store, rollups, 20, 'short retention')
+
+def test_empty_window():
+    store, rollups = make_rollups(days=1)
+    newest = rollups.newest_minute
+    assert rollups.summary(newest + 1, newest + 60) is None
+    assert rollups.group(newest + 1, newest + 60, 'hour') is None
+    print("✅ Windows without minutes have no summary")
+
+if __name__ == "__main__":
+    test_summaries_match_raw_minutes()
+    test_hourly_groups_match_raw_minutes()
+    test_retention()
+    test_empty_window()
@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+Test script to verify state, history and Socket.IO messages shared between workers
+"""
+import sys
+import os
+import tempfile
+import threading
+import types
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import numpy as np
+
+from utils.data_generator import RenewableEnergyDataGenerator
+from utils.shared_state import LocalState, SharedSeries, SharedState, SQLitePubSubManager
+from utils.timeseries_store import VALUE_COLUMNS, TimeSeriesStore
+
+def temp_db():
+    return os.path.join(tempfile.mkdtemp(), 'shared.db')
+
+def test_local_state_copies():
+    state = LocalState()
+    state.set('last_reading', {'storage_percentage': 50.0})
+    state.get('last_reading')['storage_percentage'] = 10.0
+    assert state.get('last_reading') == {'storage_percentage': 50.0}
+    assert state.get('missing', 'default') == 'default'
+    print("✅ LocalState hands out copies, like SharedState")
+
+def test_shared_state_between_workers():
+    print("=== Shared State Test ===")
+    path = temp_db()
+    first, second = SharedState(path), SharedState(path)
+    first.set('grid_connected', False)
+    assert second.get('grid_connected') is False
+    print("✅ Values written by one worker are read by another")
+
+    assert first.try_acquire_lease('broadcast', 60)
+    assert not second.try_acquire_lease('broadcast', 60)
+    assert first.try_acquire_lease('broadcast', 60)
+    print("✅ A lease has one holder, who can renew it")
+
+    first.add_client('sid-1', 'grid-a', '1')
+    second.add_client('sid-2', 'grid-b', '2')
+    assert sorted(first.clients()) == [('grid-a', '1'), ('grid-b', '2')]
+    second.remove_client('sid-2')
+    assert second.clients() == [('grid-a', '1')]
+    print("✅ Connected clients are visible from every worker")
+
+def test_shared_series():
+    print("=== Shared Time-Series Test ===")
+    path = temp_db()
+
+    def worker(seed):
+        return TimeSeriesStore(capacity_minutes=2 * 1440, generator=RenewableEnergyDataGenerator(seed=seed),
+                               shared=SharedSeries(VALUE_COLUMNS, SharedState(path), path=path))
+
+    producer, reader = worker(1), worker(2)
+    now = np.datetime64('2026-01-15T12:00', 'm')
+    assert producer.extend_to(now) == producer.capacity
+    assert reader.extend_to(now) == reader.capacity
+
+    # The reader does not simulate: it waits for the lease holder's minutes
+    later = now + np.timedelta64(3, 'm')
+    assert reader.extend_to(later) == 0
+    assert producer.extend_to(later) == 3
+    assert reader.extend_to(later) == 3
+
+    ours, theirs = producer.last(producer.capacity), reader.last(reader.capacity)
+    for column in ('timestamp',) + VALUE_COLUMNS:
+        assert np.array_equal(ours[column], theirs[column]), f"{column} differs between workers"
+    print("✅ Both workers serve the same history, produced once")
+
+def test_pubsub_relay():
+    print("=== SQLite Socket.IO Queue Test ===")
+    path = temp_db()
+    sender, listener = SQLitePubSubManager(path), SQLitePubSubManager(path)
+    listener.server = types.SimpleNamespace(sleep=lambda seconds: threading.Event().wait(seconds))
+    messages = listener._listen()
+    threading.Timer(0.2, sender._publish, [{'method': 'emit', 'event': 'data_update'}]).start()
+    assert sender.json.loads(next(messages)) == {'method': 'emit', 'event': 'data_update'}
+    print("✅ An emit published by one worker reaches another worker's listener")
+
+if __name__ == "__main__":
+    test_local_state_copies()
+    test_shared_state_between_workers()
+    test_shared_series()
+    test_pubsub_relay()
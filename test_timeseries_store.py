@@ -0,0 +1,46 @@
+#!/usr/bin/env python3
+"""
+Test script to verify the live tick keeps the battery distribution over a long backfill
+"""
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import numpy as np
+
+from utils.data_generator import RenewableEnergyDataGenerator
+from utils.timeseries_store import TimeSeriesStore
+
+def test_backfill_storage_distribution():
+    print("=== Live Battery Distribution Test ===\n")
+    for seed in range(3):
+        store = TimeSeriesStore(capacity_minutes=7 * 1440, generator=RenewableEnergyDataGenerator(seed=seed))
+        storage = store.last(store.capacity)['storage_percentage']
+        print(f"Seed {seed}: mean {storage.mean():.1f}%, min {storage.min():.1f}%, max {storage.max():.1f}%")
+        # The per-request generator started each reading's hour at 50%: about 30-60%, never near empty
+        assert 35 <= storage.mean() <= 50, "battery level drifted"
+        assert storage.min() >= 25 and storage.max() <= 75
+    print("✅ A 7-day backfill keeps the per-reading battery distribution")
+
+def test_live_storage_matches_hourly_simulation():
+    generator = RenewableEnergyDataGenerator(seed=1)
+    net_power = np.random.default_rng(0).uniform(-6000, 4000, 500)
+    live = generator.generate_live_storage_arrays(net_power)
+    for end in (10, 59, 200, 499):
+        # The old model: simulate the battery from 50% over the hour ending at the reading
+        start = max(0, end - generator.LIVE_BATTERY_WINDOW + 1)
+        reference = generator.generate_storage_arrays(net_power[start:end + 1], np.zeros(end + 1 - start))
+        for column, values in live.items():
+            assert np.isclose(values[end], reference[column][-1]), f"{column} differs at minute {end}"
+    print("✅ Each minute matches an hour simulated from 50%")
+
+    # Advancing in two steps gives the same minutes as one step
+    first = generator.generate_live_storage_arrays(net_power[:123])
+    rest = generator.generate_live_storage_arrays(net_power[123:], net_power[:123])
+    for column, values in live.items():
+        assert np.allclose(np.concatenate([first[column], rest[column]]), values)
+    print("✅ Incremental ticks match a single backfill")
+
+if __name__ == "__main__":
+    test_backfill_storage_distribution()
+    test_live_storage_matches_hourly_simulation()
@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Test script to verify bulk user imports: one default hash, batches and background jobs
+"""
+import sys
+import os
+import json
+import tempfile
+import threading
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from models.user import IMPORT_BATCH_SIZE, SQLiteUserManager, User, UserManager
+from utils.sqlite_db import SQLiteDatabase
+
+def rows(count, start=0):
+    return [{'id': str(i + 1), 'username': f'user{i}', 'email': f'user{i}@example.com'}
+            for i in range(start, start + count)]
+
+def json_manager(directory):
+    return UserManager(os.path.join(directory, 'users.json'), import_jobs_dir=os.path.join(directory, 'jobs'))
+
+def sqlite_manager(directory):
+    return SQLiteUserManager(os.path.join(directory, 'users.json'), SQLiteDatabase(os.path.join(directory, 'users.db')),
+                             import_jobs_dir=os.path.join(directory, 'jobs'))
+
+def check_bulk_import(make_manager, backend):
+    directory = tempfile.mkdtemp()
+    manager = make_manager(directory)
+    existing = manager.create_user('user0', 'someone@example.com', 'secret')
+
+    hash_calls = []
+    original_hash = User.hash_password
+    User.hash_password = staticmethod(lambda password: hash_calls.append(password) or original_hash(password))
+    try:
+        result = manager.import_rows(rows(IMPORT_BATCH_SIZE + 50) + [{'username': 'nobody'}])
+    finally:
+        User.hash_password = original_hash
+    assert result['imported'] == IMPORT_BATCH_SIZE + 49 and result['skipped'] == 1 and len(result['errors']) == 1
+    assert len(hash_calls) == 1
+    print(f"✅ {backend}: {result['imported']} rows over two batches cost one bcrypt hash")
+
+    imported = [manager.get_user_by_username(f'user{i}') for i in (1, IMPORT_BATCH_SIZE + 49)]
+    assert imported[0].password_hash == imported[1].password_hash
+    assert all(user.password_reset_required for user in imported)
+    assert manager.authenticate_user('user1', 'defaultpassword123').id == imported[0].id
+    assert manager.get_user_by_username('user0').id == existing.id
+    assert len({user.id for user in manager.get_all_users()}) == IMPORT_BATCH_SIZE + 50
+    print(f"✅ {backend}: rows whose id is taken get a fresh one; the existing account is skipped")
+
+    result = manager.import_rows([{'username': 'USER1', 'email': 'user1@example.com', 'full_name': 'Replaced'}],
+                                 overwrite_existing=True)
+    assert result['imported'] == 1
+    assert manager.get_user_by_username('user1').full_name == 'Replaced'
+    assert manager.get_user_by_username('user1').id == imported[0].id
+    print(f"✅ {backend}: overwrite replaces the matching account in place")
+
+    # The import survives a reload from storage
+    assert len(make_manager(directory).get_all_users()) == IMPORT_BATCH_SIZE + 50
+
+def test_bulk_import_json_backend():
+    print("=== Bulk User Import (users.json) ===")
+    check_bulk_import(json_manager, 'json')
+
+def test_bulk_import_sqlite_backend():
+    print("=== Bulk User Import (SQLite) ===")
+    check_bulk_import(sqlite_manager, 'sqlite')
+
+def test_import_job():
+    print("=== Background Import Job Test ===")
+    directory = tempfile.mkdtemp()
+    manager = json_manager(directory)
+    upload = os.path.join(directory, 'upload.json')
+    with open(upload, 'w') as f:
+        json.dump(rows(20), f)
+
+    threads = []
+    def start_background_task(target, *args):
+        threads.append(threading.Thread(target=target, args=args))
+        threads[-1].start()
+
+    job = manager.start_import_job(upload, 'json', False, start_background_task)
+    threads[0].join()
+    saved = json_manager(directory).get_import_job(job.id)
+    assert saved.status == 'completed' and saved.imported == 20 and saved.finished_at
+    assert not os.path.exists(upload)
+    print("✅ The job imports in the background and its progress is visible to other workers")
+
+if __name__ == "__main__":
+    test_bulk_import_json_backend()
+    test_bulk_import_sqlite_backend()
+    test_import_job()
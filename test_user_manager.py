@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+Test script to verify case-insensitive user lookups and accounts that differ only by case
+"""
+import sys
+import os
+import json
+import tempfile
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from models.user import SQLiteUserManager, User, UserManager
+from utils.sqlite_db import SQLiteDatabase
+
+PASSWORD_HASH = User.hash_password('secret')
+
+def account(user_id, username, email):
+    return {'id': user_id, 'username': username, 'email': email, 'password_hash': PASSWORD_HASH,
+            'created_at': '2025-01-01T00:00:00'}
+
+COLLIDING = [
+    account('1', 'Bob', 'Bob@Example.com'),
+    account('2', 'bob', 'bob@example.com'),
+    account('3', 'bob', 'bob.other@example.com'),  # Exact duplicate username
+]
+
+def users_file(accounts):
+    path = os.path.join(tempfile.mkdtemp(), 'users.json')
+    with open(path, 'w') as f:
+        json.dump(accounts, f)
+    return path
+
+def test_user_indexes():
+    print("=== User Index Test ===")
+    manager = UserManager(users_file([account('1', 'Alice', 'Alice@Example.com')]))
+    assert manager.get_user_by_username(' alice ').id == '1'
+    assert manager.get_user_by_email('ALICE@example.COM').id == '1'
+    assert manager.authenticate_user('alice@example.com', 'secret').id == '1'
+    print("✅ Usernames and emails are found regardless of case")
+
+    manager.update_user_profile('1', {'full_name': 'Alice A.'})
+    assert manager.get_user_by_username('alice').full_name == 'Alice A.'
+    assert manager.delete_user('1')
+    assert manager.get_user_by_username('alice') is None and manager.get_user_by_email('alice@example.com') is None
+    print("✅ The indexes follow profile updates and deletes")
+
+def check_case_collisions(manager):
+    assert len(manager.get_all_users()) == 3
+    assert manager.get_user_by_username('Bob').id == '1'
+    assert manager.get_user_by_username('bob').id == '2'
+    assert manager.get_user_by_username('BOB').id == '1'
+    assert manager.get_user_by_email('bob@example.com').id == '2'
+    assert manager.authenticate_user('bob', 'secret').id == '2'
+    print("✅ Accounts differing only by case are all kept and found by their exact name")
+
+    manager.update_user_profile('2', {'state': 'Kerala'})
+    assert manager.get_user_by_username('bob').state == 'Kerala'
+    assert manager.get_user_by_username('BOB').id == '1'
+    print("✅ Updating a shadowed account keeps both indexed")
+
+def test_case_collisions_json():
+    print("=== Case Collision Test (users.json) ===")
+    check_case_collisions(UserManager(users_file(COLLIDING)))
+
+def sqlite_manager(accounts=()):
+    path = users_file(list(accounts))
+    return SQLiteUserManager(path, SQLiteDatabase(os.path.join(os.path.dirname(path), 'users.db')))
+
+def test_sqlite_backend():
+    print("=== SQLite User Backend Test ===")
+    manager = sqlite_manager()
+    user = manager.create_user('Carol', 'carol@example.com', 'secret')
+    assert manager.get_user_by_username('CAROL').id == user.id
+    assert manager.get_user_by_email('Carol@Example.com').id == user.id
+    for username, email in (('carol', 'other@example.com'), ('other', 'CAROL@example.com')):
+        try:
+            manager.create_user(username, email, 'secret')
+            assert False, "a case variant of an existing account was created"
+        except ValueError:
+            pass
+    print("✅ Lookups are case-insensitive and the unique keys reject case variants")
+
+    assert manager.set_password(user.id, 'changed')
+    assert manager.authenticate_user('carol', 'changed').id == user.id
+    assert manager.delete_user(user.id) and manager.get_user_by_username('carol') is None
+    print("✅ Password changes and deletes go through the database")
+
+def test_case_collisions_sqlite_migration():
+    print("=== Case Collision Test (users.json migration) ===")
+    check_case_collisions(sqlite_manager(COLLIDING))
+
+def test_next_user_id():
+    print("=== User Id Allocation Test ===")
+    accounts = [account('7', 'dave', 'dave@example.com'), account('legacy', 'erin', 'erin@example.com')]
+    manager = UserManager(users_file(accounts))
+    assert manager._next_user_id() == 8
+    assert manager.create_user('frank', 'frank@example.com', 'secret').id == '8'
+    assert manager._next_user_id() == 9
+    print("✅ New ids continue from the highest id seen")
+
+    manager = sqlite_manager(accounts)
+    assert manager._next_user_id() == 8
+    plan = manager.db.query(
+        "EXPLAIN QUERY PLAN SELECT MAX(CAST(id AS INTEGER)) AS max_id FROM users WHERE id NOT GLOB '*[^0-9]*'"
+    )
+    assert 'idx_users_numeric_id' in plan[0]['detail']
+    print("✅ SQLite finds the highest id through an index instead of a scan")
+
+if __name__ == "__main__":
+    test_user_indexes()
+    test_case_collisions_json()
+    test_sqlite_backend()
+    test_case_collisions_sqlite_migration()
+    test_next_user_id()
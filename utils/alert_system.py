@@ -1,9 +1,17 @@
 from datetime import datetime, timedelta
+import bisect
+import heapq
 import json
 import os
+import sqlite3
+import threading
+import uuid
 from enum import Enum
+from itertools import islice
 from typing import List, Dict, Any
 
+from utils.sqlite_db import STORAGE_BACKEND, get_database
+
 class AlertType(Enum):
     FAULT_DETECTION = "fault_detection"
     LOW_EFFICIENCY = "low_efficiency"
@@ -21,10 +29,14 @@ class AlertSeverity(Enum):
     HIGH = "high"
     CRITICAL = "critical"
 
+# Escalation order, so a repeat of an open condition can raise its alert's severity
+SEVERITY_RANK = {AlertSeverity.LOW: 0, AlertSeverity.MEDIUM: 1, AlertSeverity.HIGH: 2, AlertSeverity.CRITICAL: 3}
+
 class Alert:
     def __init__(self, alert_type: AlertType, severity: AlertSeverity, title: str, 
                  message: str, data: Dict[str, Any] = None, user_id: str = None):
-        self.id = f"alert_{datetime.now().strftime('%Y%m%d_%H%M%S')}_{hash(message) % 10000}"
+        # Random suffix: the journal replays by id, so ids must not collide within a second
+        self.id = f"alert_{datetime.now().strftime('%Y%m%d_%H%M%S')}_{uuid.uuid4().hex[:8]}"
         self.alert_type = alert_type
         self.severity = severity
         self.title = title
@@ -36,6 +48,8 @@ class Alert:
         self.is_acknowledged = False
         self.acknowledged_by = None
         self.acknowledged_at = None
+        self.occurrence_count = 1
+        self.last_seen = self.timestamp
     
     def to_dict(self):
         return {
@@ -50,7 +64,9 @@ class Alert:
             'is_read': self.is_read,
             'is_acknowledged': self.is_acknowledged,
             'acknowledged_by': self.acknowledged_by,
-            'acknowledged_at': self.acknowledged_at
+            'acknowledged_at': self.acknowledged_at,
+            'occurrence_count': self.occurrence_count,
+            'last_seen': self.last_seen
         }
     
     @classmethod
@@ -69,6 +85,8 @@ class Alert:
         alert.is_acknowledged = data.get('is_acknowledged', False)
         alert.acknowledged_by = data.get('acknowledged_by')
         alert.acknowledged_at = data.get('acknowledged_at')
+        alert.occurrence_count = data.get('occurrence_count', 1)
+        alert.last_seen = data.get('last_seen', alert.timestamp)
         return alert
     
     def acknowledge(self, user_id: str):
@@ -78,30 +96,195 @@ class Alert:
     
     def mark_as_read(self):
         self.is_read = True
+    
+    def record_occurrence(self, message: str = None, data: Dict[str, Any] = None,
+                          severity: AlertSeverity = None):
+        """Fold a repeat of the same condition into this alert; it becomes unread again"""
+        self.occurrence_count += 1
+        self.last_seen = datetime.now().isoformat()
+        self.is_read = False
+        if severity is not None and SEVERITY_RANK[severity] > SEVERITY_RANK[self.severity]:
+            self.severity = severity
+        if message is not None:
+            self.message = message
+        if data is not None:
+            self.data = data
+
+class AlertJournal:
+    """Append-only storage for alerts: a JSON snapshot plus a JSON-lines event journal.
+    
+    Each create/update appends one line, so a write costs the same however many alerts
+    exist. Once the journal grows past `compact_after` events it is rotated and folded
+    into a fresh snapshot on a background thread. Replay is idempotent (events are keyed
+    by alert id), so a crash at any point during compaction loses nothing.
+    """
+    
+    def __init__(self, snapshot_file='alerts.json', compact_after=1000):
+        self.snapshot_file = snapshot_file
+        self.journal_file = os.path.splitext(snapshot_file)[0] + '.journal.jsonl'
+        self.compacting_file = self.journal_file + '.compacting'
+        self.compact_after = compact_after
+        self.events_since_compaction = 0
+        self._lock = threading.Lock()
+        self._compaction_thread = None
+    
+    def load(self):
+        """Rebuild alert dicts (oldest first) from the snapshot and journal replay"""
+        alerts = {}
+        if os.path.exists(self.snapshot_file):
+            try:
+                with open(self.snapshot_file, 'r') as f:
+                    for alert_data in json.load(f):
+                        alerts[alert_data['id']] = alert_data
+            except (json.JSONDecodeError, KeyError, ValueError):
+                alerts = {}
+        
+        events = 0
+        for path in (self.compacting_file, self.journal_file):
+            if not os.path.exists(path):
+                continue
+            with open(path, 'r') as f:
+                for line in f:
+                    try:
+                        event = json.loads(line)
+                    except ValueError:
+                        continue  # Torn final line from an interrupted write
+                    if event.get('op') == 'create':
+                        alerts[event['alert']['id']] = event['alert']
+                    elif event.get('op') == 'update' and event.get('id') in alerts:
+                        alerts[event['id']].update(event['changes'])
+                    events += 1
+        
+        self.events_since_compaction = events
+        return list(alerts.values())
+    
+    def _append(self, event):
+        line = json.dumps(event, separators=(',', ':')) + '\n'
+        with self._lock:
+            with open(self.journal_file, 'a') as f:
+                f.write(line)
+            self.events_since_compaction += 1
+    
+    def append_create(self, alert_data):
+        self._append({'op': 'create', 'alert': alert_data})
+    
+    def append_update(self, alert_id, changes):
+        self._append({'op': 'update', 'id': alert_id, 'changes': changes})
+    
+    def write_snapshot(self, alerts_data):
+        """Write every alert dict to the snapshot file atomically"""
+        tmp_file = f'{self.snapshot_file}.{threading.get_ident()}.tmp'
+        with open(tmp_file, 'w') as f:
+            json.dump(alerts_data, f, indent=2)
+        os.replace(tmp_file, self.snapshot_file)
+    
+    def compact_now(self, alerts):
+        """Synchronously fold the journal into a new snapshot"""
+        with self._lock:
+            if self._compaction_thread is not None:
+                # Its older snapshot must not land on top of this one
+                self._compaction_thread.join()
+            self.write_snapshot([alert.to_dict() for alert in alerts])
+            for path in (self.compacting_file, self.journal_file):
+                if os.path.exists(path):
+                    os.remove(path)
+            self.events_since_compaction = 0
+    
+    def maybe_compact(self, alerts):
+        """Start a background compaction once enough events have accumulated"""
+        if self.events_since_compaction < self.compact_after:
+            return False
+        with self._lock:
+            if self._compaction_thread is not None and self._compaction_thread.is_alive():
+                return False
+            if os.path.exists(self.compacting_file):
+                # Left over from an interrupted compaction; it was replayed at load, so fold it in
+                with open(self.compacting_file, 'a') as rotated, open(self.journal_file, 'a+') as journal:
+                    journal.seek(0)
+                    rotated.write(journal.read())
+                os.remove(self.journal_file)
+            # Rotate under the lock: new events go to a fresh journal while the old one is folded
+            if os.path.exists(self.journal_file):
+                os.replace(self.journal_file, self.compacting_file)
+            self.events_since_compaction = 0
+            # Serialize now: the alerts keep changing while the thread writes
+            snapshot = [alert.to_dict() for alert in alerts]
+            self._compaction_thread = threading.Thread(target=self._compact_rotated, args=(snapshot,), daemon=True)
+            self._compaction_thread.start()
+        return True
+    
+    def _compact_rotated(self, alerts_data):
+        try:
+            self.write_snapshot(alerts_data)
+            os.remove(self.compacting_file)
+        except OSError as e:
+            print(f"Alert journal compaction failed: {e}")
+
+class AlertCounters:
+    """Running alert counts for one user (or for all alerts), updated on each mutation"""
+    
+    def __init__(self):
+        self.total = 0
+        self.unread = 0
+        self.unacknowledged = 0
+        self.by_severity = {severity: 0 for severity in AlertSeverity}
+        self.by_type = {alert_type: 0 for alert_type in AlertType}
+    
+    def add(self, alert: Alert, sign: int = 1):
+        self.total += sign
+        self.unread += sign * (not alert.is_read)
+        self.unacknowledged += sign * (not alert.is_acknowledged)
+        self.by_severity[alert.severity] += sign
+        self.by_type[alert.alert_type] += sign
 
 class AlertManager:
-    def __init__(self, alerts_file='alerts.json'):
+    def __init__(self, alerts_file='alerts.json', journal=None):
         self.alerts_file = alerts_file
+        self.journal = journal or AlertJournal(alerts_file)
         self.alerts: List[Alert] = []
         self.load_alerts()
     
     def load_alerts(self):
-        """Load alerts from JSON file"""
-        if os.path.exists(self.alerts_file):
-            try:
-                with open(self.alerts_file, 'r') as f:
-                    alerts_data = json.load(f)
-                    for alert_data in alerts_data:
-                        alert = Alert.from_dict(alert_data)
-                        self.alerts.append(alert)
-            except (json.JSONDecodeError, KeyError, ValueError):
-                self.alerts = []
+        """Load alerts from the snapshot file and replay the journal"""
+        try:
+            for alert_data in self.journal.load():
+                self.alerts.append(Alert.from_dict(alert_data))
+        except (KeyError, ValueError):
+            self.alerts = []
+        self._rebuild_indexes()
+    
+    def _rebuild_indexes(self):
+        """Index alerts by id and by user (oldest first) and recount everything"""
+        self.alerts.sort(key=lambda a: a.timestamp)
+        self._by_id: Dict[str, Alert] = {}
+        self._by_user: Dict[str, List[Alert]] = {}
+        self._counters: Dict[Any, AlertCounters] = {}
+        self._all_counters = AlertCounters()
+        self._latest_by_condition: Dict[tuple, Alert] = {}
+        for alert in self.alerts:
+            self._index_alert(alert)
+    
+    def _index_alert(self, alert: Alert):
+        self._by_id.setdefault(alert.id, alert)
+        user_alerts = self._by_user.setdefault(alert.user_id, [])
+        if user_alerts and user_alerts[-1].timestamp > alert.timestamp:
+            bisect.insort(user_alerts, alert, key=lambda a: a.timestamp)
+        else:
+            user_alerts.append(alert)
+        self._counters.setdefault(alert.user_id, AlertCounters()).add(alert)
+        self._all_counters.add(alert)
+        key = (alert.user_id, alert.alert_type, alert.title)
+        latest = self._latest_by_condition.get(key)
+        if latest is None or latest.timestamp <= alert.timestamp:
+            self._latest_by_condition[key] = alert
+    
+    def _update_counters(self, alert: Alert, sign: int):
+        self._counters[alert.user_id].add(alert, sign)
+        self._all_counters.add(alert, sign)
     
     def save_alerts(self):
-        """Save alerts to JSON file"""
-        alerts_data = [alert.to_dict() for alert in self.alerts]
-        with open(self.alerts_file, 'w') as f:
-            json.dump(alerts_data, f, indent=2)
+        """Rewrite the full alert snapshot (compaction); routine changes go to the journal"""
+        self.journal.compact_now(self.alerts)
     
     def create_alert(self, alert_type: AlertType, severity: AlertSeverity, 
                     title: str, message: str, data: Dict[str, Any] = None, 
@@ -109,53 +292,85 @@ class AlertManager:
         """Create a new alert"""
         alert = Alert(alert_type, severity, title, message, data, user_id)
         self.alerts.append(alert)
-        self.save_alerts()
+        self._index_alert(alert)
+        self.journal.append_create(alert.to_dict())
+        self.journal.maybe_compact(self.alerts)
         return alert
     
+    def _newest_first(self, user_id: str = None):
+        """Iterate alerts newest first; a user sees their own alerts plus broadcast ones"""
+        if not user_id:
+            return reversed(self.alerts)
+        own = self._by_user.get(user_id, [])
+        broadcast = self._by_user.get(None, [])
+        if not broadcast:
+            return reversed(own)
+        return heapq.merge(reversed(own), reversed(broadcast), key=lambda a: a.timestamp, reverse=True)
+    
     def get_alerts(self, user_id: str = None, unread_only: bool = False, 
                   unacknowledged_only: bool = False, limit: int = None):
-        """Get alerts with filtering options"""
-        filtered_alerts = self.alerts
-        
-        if user_id:
-            filtered_alerts = [a for a in filtered_alerts if a.user_id == user_id or a.user_id is None]
+        """Get alerts with filtering options (newest first)"""
+        filtered_alerts = self._newest_first(user_id)
         
         if unread_only:
-            filtered_alerts = [a for a in filtered_alerts if not a.is_read]
+            filtered_alerts = (a for a in filtered_alerts if not a.is_read)
         
         if unacknowledged_only:
-            filtered_alerts = [a for a in filtered_alerts if not a.is_acknowledged]
-        
-        # Sort by timestamp (newest first)
-        filtered_alerts.sort(key=lambda a: a.timestamp, reverse=True)
-        
-        if limit:
-            filtered_alerts = filtered_alerts[:limit]
+            filtered_alerts = (a for a in filtered_alerts if not a.is_acknowledged)
         
-        return filtered_alerts
+        return list(islice(filtered_alerts, limit or None))
     
     def get_alert_by_id(self, alert_id: str):
         """Get a specific alert by ID"""
-        for alert in self.alerts:
-            if alert.id == alert_id:
-                return alert
-        return None
+        return self._by_id.get(alert_id)
     
     def acknowledge_alert(self, alert_id: str, user_id: str):
         """Acknowledge an alert"""
         alert = self.get_alert_by_id(alert_id)
         if alert:
+            self._update_counters(alert, -1)
             alert.acknowledge(user_id)
-            self.save_alerts()
+            self._update_counters(alert, 1)
+            self.journal.append_update(alert.id, {
+                'is_acknowledged': alert.is_acknowledged,
+                'acknowledged_by': alert.acknowledged_by,
+                'acknowledged_at': alert.acknowledged_at
+            })
+            return True
+        return False
+    
+    def record_occurrence(self, alert_id: str, message: str = None, data: Dict[str, Any] = None,
+                          severity: AlertSeverity = None):
+        """Count a repeat occurrence on an existing alert instead of creating a new one"""
+        alert = self.get_alert_by_id(alert_id)
+        if alert:
+            self._update_counters(alert, -1)
+            alert.record_occurrence(message, data, severity)
+            self._update_counters(alert, 1)
+            self.journal.append_update(alert.id, {
+                'occurrence_count': alert.occurrence_count,
+                'last_seen': alert.last_seen,
+                'message': alert.message,
+                'data': alert.data,
+                'severity': alert.severity.value,
+                'is_read': alert.is_read
+            })
             return True
         return False
     
+    def find_open_alert(self, user_id: str, alert_type: AlertType, title: str):
+        """Newest unacknowledged alert a user has for a condition (type and title), or None"""
+        alert = self._latest_by_condition.get((user_id, alert_type, title))
+        return alert if alert is not None and not alert.is_acknowledged else None
+    
     def mark_alert_as_read(self, alert_id: str):
         """Mark an alert as read"""
         alert = self.get_alert_by_id(alert_id)
         if alert:
+            self._update_counters(alert, -1)
             alert.mark_as_read()
-            self.save_alerts()
+            self._update_counters(alert, 1)
+            self.journal.append_update(alert.id, {'is_read': True})
             return True
         return False
     
@@ -171,38 +386,202 @@ class AlertManager:
         
         removed_count = initial_count - len(self.alerts)
         if removed_count > 0:
+            self._rebuild_indexes()
             self.save_alerts()
         
         return removed_count
     
     def get_alert_summary(self, user_id: str = None):
-        """Get summary of alerts by type and severity"""
-        alerts = self.get_alerts(user_id=user_id)
+        """Get summary of alerts by type and severity from the running counters"""
+        if user_id:
+            counters = [self._counters[key] for key in (user_id, None) if key in self._counters]
+        else:
+            counters = [self._all_counters]
         
         summary = {
-            'total': len(alerts),
-            'unread': len([a for a in alerts if not a.is_read]),
-            'unacknowledged': len([a for a in alerts if not a.is_acknowledged]),
+            'total': sum(c.total for c in counters),
+            'unread': sum(c.unread for c in counters),
+            'unacknowledged': sum(c.unacknowledged for c in counters),
             'by_severity': {
-                'critical': len([a for a in alerts if a.severity == AlertSeverity.CRITICAL]),
-                'high': len([a for a in alerts if a.severity == AlertSeverity.HIGH]),
-                'medium': len([a for a in alerts if a.severity == AlertSeverity.MEDIUM]),
-                'low': len([a for a in alerts if a.severity == AlertSeverity.LOW])
+                severity.value: sum(c.by_severity[severity] for c in counters)
+                for severity in (AlertSeverity.CRITICAL, AlertSeverity.HIGH, AlertSeverity.MEDIUM, AlertSeverity.LOW)
             },
-            'by_type': {}
+            'by_type': {
+                alert_type.value: sum(c.by_type[alert_type] for c in counters)
+                for alert_type in AlertType
+            }
         }
         
-        for alert_type in AlertType:
-            summary['by_type'][alert_type.value] = len([
-                a for a in alerts if a.alert_type == alert_type
-            ])
+        return summary
+
+class SQLiteAlertManager(AlertManager):
+    """AlertManager backed by a shared SQLite database instead of the JSON journal.
+    
+    Filters, ordering and summaries run as indexed queries, so nothing is loaded at
+    startup and every gunicorn worker reads and writes the same alerts.
+    """
+    
+    SCHEMA = '''
+        CREATE TABLE IF NOT EXISTS alerts (
+            id TEXT PRIMARY KEY,
+            user_id TEXT,
+            timestamp TEXT NOT NULL,
+            alert_type TEXT NOT NULL,
+            severity TEXT NOT NULL,
+            is_read INTEGER NOT NULL DEFAULT 0,
+            is_acknowledged INTEGER NOT NULL DEFAULT 0,
+            data TEXT NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS idx_alerts_user_timestamp ON alerts(user_id, timestamp);
+        CREATE INDEX IF NOT EXISTS idx_alerts_timestamp ON alerts(timestamp);
+        CREATE INDEX IF NOT EXISTS idx_alerts_user_read ON alerts(user_id, is_read);
+        CREATE INDEX IF NOT EXISTS idx_alerts_open ON alerts(user_id, alert_type, is_acknowledged, timestamp);
+    '''
+    
+    def __init__(self, alerts_file='alerts.json', db=None):
+        self.alerts_file = alerts_file
+        self.db = db or get_database()
+        self.db.executescript(self.SCHEMA)
+        self.load_alerts()
+    
+    def load_alerts(self):
+        """Nothing to load; on first use, migrate existing JSON alerts into the database"""
+        if self.db.query_one('SELECT 1 FROM alerts LIMIT 1'):
+            return
+        try:
+            alerts_data = AlertJournal(self.alerts_file).load()
+            if alerts_data:
+                with self.db.transaction():
+                    for alert_data in alerts_data:
+                        self._put_alert(Alert.from_dict(alert_data))
+                print(f"Migrated {len(alerts_data)} alerts from {self.alerts_file} to {self.db.path}")
+        except (KeyError, ValueError, sqlite3.Error) as e:
+            print(f"Could not migrate {self.alerts_file}: {e}")
+    
+    def save_alerts(self):
+        """Commit pending writes"""
+        self.db.commit()
+    
+    def _put_alert(self, alert: Alert):
+        self.db.execute(
+            '''INSERT INTO alerts (id, user_id, timestamp, alert_type, severity, is_read, is_acknowledged, data)
+               VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+               ON CONFLICT(id) DO UPDATE SET
+                   severity = excluded.severity, is_read = excluded.is_read,
+                   is_acknowledged = excluded.is_acknowledged, data = excluded.data''',
+            (alert.id, alert.user_id, alert.timestamp, alert.alert_type.value, alert.severity.value,
+             int(alert.is_read), int(alert.is_acknowledged), json.dumps(alert.to_dict()))
+        )
+    
+    @staticmethod
+    def _user_clause(user_id: str = None):
+        """WHERE clause for a user's own alerts plus broadcast ones (all alerts without a user)"""
+        if not user_id:
+            return '1 = 1', ()
+        return '(user_id = ? OR user_id IS NULL)', (user_id,)
+    
+    def create_alert(self, alert_type: AlertType, severity: AlertSeverity, 
+                    title: str, message: str, data: Dict[str, Any] = None, 
+                    user_id: str = None):
+        """Create a new alert"""
+        alert = Alert(alert_type, severity, title, message, data, user_id)
+        with self.db.transaction():
+            self._put_alert(alert)
+        return alert
+    
+    def get_alerts(self, user_id: str = None, unread_only: bool = False, 
+                  unacknowledged_only: bool = False, limit: int = None):
+        """Get alerts with filtering options (newest first)"""
+        where, params = self._user_clause(user_id)
+        if unread_only:
+            where += ' AND is_read = 0'
+        if unacknowledged_only:
+            where += ' AND is_acknowledged = 0'
+        rows = self.db.query(
+            f'SELECT data FROM alerts WHERE {where} ORDER BY timestamp DESC LIMIT ?',
+            params + (limit or -1,)
+        )
+        return [Alert.from_dict(json.loads(row['data'])) for row in rows]
+    
+    def get_alert_by_id(self, alert_id: str):
+        """Get a specific alert by ID"""
+        row = self.db.query_one('SELECT data FROM alerts WHERE id = ?', (alert_id,))
+        return Alert.from_dict(json.loads(row['data'])) if row else None
+    
+    def _update_alert(self, alert_id: str, change):
+        with self.db.transaction():
+            alert = self.get_alert_by_id(alert_id)
+            if not alert:
+                return False
+            change(alert)
+            self._put_alert(alert)
+        return True
+    
+    def acknowledge_alert(self, alert_id: str, user_id: str):
+        """Acknowledge an alert"""
+        return self._update_alert(alert_id, lambda alert: alert.acknowledge(user_id))
+    
+    def record_occurrence(self, alert_id: str, message: str = None, data: Dict[str, Any] = None,
+                          severity: AlertSeverity = None):
+        """Count a repeat occurrence on an existing alert instead of creating a new one"""
+        return self._update_alert(alert_id, lambda alert: alert.record_occurrence(message, data, severity))
+    
+    def find_open_alert(self, user_id: str, alert_type: AlertType, title: str):
+        """Newest unacknowledged alert a user has for a condition (type and title), or None"""
+        row = self.db.query_one(
+            '''SELECT data FROM alerts
+               WHERE user_id IS ? AND alert_type = ? AND is_acknowledged = 0 AND json_extract(data, '$.title') = ?
+               ORDER BY timestamp DESC LIMIT 1''',
+            (user_id, alert_type.value, title)
+        )
+        return Alert.from_dict(json.loads(row['data'])) if row else None
+    
+    def mark_alert_as_read(self, alert_id: str):
+        """Mark an alert as read"""
+        return self._update_alert(alert_id, lambda alert: alert.mark_as_read())
+    
+    def cleanup_old_alerts(self, days_old: int = 30):
+        """Remove alerts older than specified days"""
+        cutoff_date = datetime.now() - timedelta(days=days_old)
+        with self.db.transaction():
+            removed_count = self.db.execute(
+                'DELETE FROM alerts WHERE timestamp <= ?', (cutoff_date.isoformat(),)
+            ).rowcount
+        return removed_count
+    
+    def get_alert_summary(self, user_id: str = None):
+        """Get summary of alerts by type and severity with one grouped query"""
+        where, params = self._user_clause(user_id)
+        rows = self.db.query(
+            f'''SELECT severity, alert_type, COUNT(*) AS total,
+                       SUM(is_read = 0) AS unread, SUM(is_acknowledged = 0) AS unacknowledged
+                FROM alerts WHERE {where} GROUP BY severity, alert_type''',
+            params
+        )
+        
+        summary = {
+            'total': 0,
+            'unread': 0,
+            'unacknowledged': 0,
+            'by_severity': {
+                severity.value: 0
+                for severity in (AlertSeverity.CRITICAL, AlertSeverity.HIGH, AlertSeverity.MEDIUM, AlertSeverity.LOW)
+            },
+            'by_type': {alert_type.value: 0 for alert_type in AlertType}
+        }
+        for row in rows:
+            summary['total'] += row['total']
+            summary['unread'] += row['unread']
+            summary['unacknowledged'] += row['unacknowledged']
+            summary['by_severity'][row['severity']] += row['total']
+            summary['by_type'][row['alert_type']] += row['total']
         
         return summary
 
 class EnergyAlertAnalyzer:
     """Analyze energy data and generate appropriate alerts"""
     
-    def __init__(self, alert_manager: AlertManager):
+    def __init__(self, alert_manager: AlertManager, cooldown_seconds: int = 900):
         self.alert_manager = alert_manager
         self.thresholds = {
             'solar_efficiency_low': 0.6,      # 60% of expected
@@ -213,6 +592,26 @@ class EnergyAlertAnalyzer:
             'deficit_threshold': -2000,       # 2kW deficit
             'fault_probability': 0.7          # 70% fault probability
         }
+        # Repeats of an open condition within this window update the existing alert
+        self.cooldown = timedelta(seconds=cooldown_seconds)
+    
+    def _raise_alert(self, alert_type: AlertType, severity: AlertSeverity, title: str,
+                     message: str, data: Dict[str, Any] = None, user_id: str = None):
+        """Create an alert, or coalesce it into the open alert for the same condition.
+        
+        Returns the new alert, or None when the occurrence was folded into an existing
+        unacknowledged alert last seen within the cool-down window. A folded occurrence
+        marks the alert unread again and raises its severity if this one is higher. The
+        open alert is looked up in the alert store, so this holds across restarts and
+        workers.
+        """
+        existing = self.alert_manager.find_open_alert(user_id, alert_type, title)
+        if (existing is not None
+                and datetime.now() - datetime.fromisoformat(existing.last_seen) <= self.cooldown
+                and self.alert_manager.record_occurrence(existing.id, message, data, severity)):
+            return None
+        
+        return self.alert_manager.create_alert(alert_type, severity, title, message, data, user_id)
     
     def analyze_and_create_alerts(self, current_data: Dict[str, Any], 
                                 historical_data: List[Dict[str, Any]] = None,
@@ -227,7 +626,7 @@ class EnergyAlertAnalyzer:
             
             if actual_solar < expected_solar * self.thresholds['solar_efficiency_low']:
                 efficiency_loss = ((expected_solar - actual_solar) / expected_solar) * 100
-                alert = self.alert_manager.create_alert(
+                alert = self._raise_alert(
                     AlertType.LOW_EFFICIENCY,
                     AlertSeverity.HIGH if efficiency_loss > 50 else AlertSeverity.MEDIUM,
                     "Solar Panel Low Efficiency",
@@ -242,7 +641,8 @@ class EnergyAlertAnalyzer:
                     },
                     user_id
                 )
-                alerts_created.append(alert)
+                if alert:
+                    alerts_created.append(alert)
         
         # Wind turbine efficiency check
         wind_speed = current_data.get('wind_speed', 0)
@@ -256,7 +656,7 @@ class EnergyAlertAnalyzer:
             
             if actual_wind < expected_wind * self.thresholds['wind_efficiency_low']:
                 efficiency_loss = ((expected_wind - actual_wind) / expected_wind) * 100
-                alert = self.alert_manager.create_alert(
+                alert = self._raise_alert(
                     AlertType.LOW_EFFICIENCY,
                     AlertSeverity.HIGH if efficiency_loss > 60 else AlertSeverity.MEDIUM,
                     "Wind Turbine Low Efficiency",
@@ -271,13 +671,14 @@ class EnergyAlertAnalyzer:
                     },
                     user_id
                 )
-                alerts_created.append(alert)
+                if alert:
+                    alerts_created.append(alert)
         
         # Battery status alerts
         storage_percentage = current_data.get('storage_percentage', 50)
         
         if storage_percentage <= self.thresholds['battery_low']:
-            alert = self.alert_manager.create_alert(
+            alert = self._raise_alert(
                 AlertType.BATTERY_LOW,
                 AlertSeverity.HIGH if storage_percentage < 10 else AlertSeverity.MEDIUM,
                 "Battery Level Low",
@@ -286,10 +687,11 @@ class EnergyAlertAnalyzer:
                 {'storage_percentage': storage_percentage},
                 user_id
             )
-            alerts_created.append(alert)
+            if alert:
+                alerts_created.append(alert)
         
         if storage_percentage >= self.thresholds['battery_full']:
-            alert = self.alert_manager.create_alert(
+            alert = self._raise_alert(
                 AlertType.BATTERY_FULL,
                 AlertSeverity.LOW,
                 "Battery Nearly Full",
@@ -298,14 +700,15 @@ class EnergyAlertAnalyzer:
                 {'storage_percentage': storage_percentage},
                 user_id
             )
-            alerts_created.append(alert)
+            if alert:
+                alerts_created.append(alert)
         
         # Energy surplus/deficit alerts
         net_power = current_data.get('net_power', 0)
         
         if net_power >= self.thresholds['surplus_threshold']:
             revenue_estimate = net_power * 0.15 / 1000  # $0.15 per kWh
-            alert = self.alert_manager.create_alert(
+            alert = self._raise_alert(
                 AlertType.ENERGY_SURPLUS,
                 AlertSeverity.LOW,
                 "Energy Surplus Available",
@@ -318,11 +721,12 @@ class EnergyAlertAnalyzer:
                 },
                 user_id
             )
-            alerts_created.append(alert)
+            if alert:
+                alerts_created.append(alert)
         
         if net_power <= self.thresholds['deficit_threshold']:
             cost_estimate = abs(net_power) * 0.12 / 1000  # $0.12 per kWh
-            alert = self.alert_manager.create_alert(
+            alert = self._raise_alert(
                 AlertType.ENERGY_DEFICIT,
                 AlertSeverity.MEDIUM if abs(net_power) > 4000 else AlertSeverity.LOW,
                 "Energy Deficit",
@@ -335,13 +739,14 @@ class EnergyAlertAnalyzer:
                 },
                 user_id
             )
-            alerts_created.append(alert)
+            if alert:
+                alerts_created.append(alert)
         
         # Trading opportunity alerts
         if (net_power > 2000 and storage_percentage > 80):
             sell_amount = net_power * 0.8
             revenue = sell_amount * 0.15 / 1000
-            alert = self.alert_manager.create_alert(
+            alert = self._raise_alert(
                 AlertType.TRADING_OPPORTUNITY,
                 AlertSeverity.LOW,
                 "Optimal Selling Opportunity",
@@ -355,12 +760,13 @@ class EnergyAlertAnalyzer:
                 },
                 user_id
             )
-            alerts_created.append(alert)
+            if alert:
+                alerts_created.append(alert)
         
         elif (net_power < -1000 and storage_percentage < 30):
             buy_amount = abs(net_power) * 0.5
             cost = buy_amount * 0.12 / 1000
-            alert = self.alert_manager.create_alert(
+            alert = self._raise_alert(
                 AlertType.TRADING_OPPORTUNITY,
                 AlertSeverity.LOW,
                 "Energy Purchase Opportunity",
@@ -374,7 +780,8 @@ class EnergyAlertAnalyzer:
                 },
                 user_id
             )
-            alerts_created.append(alert)
+            if alert:
+                alerts_created.append(alert)
         
         return alerts_created
     
@@ -403,7 +810,7 @@ class EnergyAlertAnalyzer:
         recent_wind_trend = df['wind_eff_trend'].tail(20).mean()
         
         if recent_solar_trend < -0.001:  # Declining trend
-            alert = self.alert_manager.create_alert(
+            alert = self._raise_alert(
                 AlertType.MAINTENANCE_REQUIRED,
                 AlertSeverity.MEDIUM,
                 "Solar Panel Maintenance Recommended",
@@ -413,10 +820,11 @@ class EnergyAlertAnalyzer:
                 {'efficiency_trend': recent_solar_trend},
                 user_id
             )
-            alerts_created.append(alert)
+            if alert:
+                alerts_created.append(alert)
         
         if recent_wind_trend < -0.002:  # Declining trend
-            alert = self.alert_manager.create_alert(
+            alert = self._raise_alert(
                 AlertType.MAINTENANCE_REQUIRED,
                 AlertSeverity.MEDIUM,
                 "Wind Turbine Maintenance Recommended",
@@ -426,10 +834,14 @@ class EnergyAlertAnalyzer:
                 {'efficiency_trend': recent_wind_trend},
                 user_id
             )
-            alerts_created.append(alert)
+            if alert:
+                alerts_created.append(alert)
         
         return alerts_created
 
 # Global alert manager instance
-alert_manager = AlertManager()
-alert_analyzer = EnergyAlertAnalyzer(alert_manager)
+alert_manager = SQLiteAlertManager() if STORAGE_BACKEND == 'sqlite' else AlertManager()
+alert_analyzer = EnergyAlertAnalyzer(
+    alert_manager,
+    cooldown_seconds=int(os.environ.get('ALERT_COOLDOWN_SECONDS', 900))
+)
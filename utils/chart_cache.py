@@ -0,0 +1,84 @@
+import threading
+import time
+from collections import OrderedDict
+
+class ChartCache:
+    """LRU cache for rendered chart JSON, keyed by (chart, hours, grid, time bucket).
+
+    History only changes once a minute, so every request inside the same bucket can
+    share one rendered figure. Entries are evicted least-recently-used first when
+    either the entry count or the total size limit is exceeded.
+    """
+
+    def __init__(self, max_entries=256, max_bytes=32 * 1024 * 1024, bucket_seconds=60):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.bucket_seconds = bucket_seconds
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def current_bucket(self, now=None):
+        """Index of the time bucket containing `now` (seconds since the epoch)"""
+        return int((now if now is not None else time.time()) // self.bucket_seconds)
+
+    def seconds_left_in_bucket(self, now=None):
+        """Seconds until the current bucket expires, for Cache-Control headers"""
+        now = now if now is not None else time.time()
+        return max(1, int(self.bucket_seconds - now % self.bucket_seconds))
+
+    def make_key(self, chart, hours, grid_id, now=None):
+        return (chart, hours, grid_id, self.current_bucket(now))
+
+    def get(self, key):
+        with self._lock:
+            value = self._entries.get(key)
+            if value is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key, value):
+        size = len(value)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._bytes -= len(previous)
+            self._entries[key] = value
+            self._bytes += size
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._bytes -= len(evicted)
+
+    def get_or_build(self, key, build):
+        """Return the cached value for key, or call build() and cache a string result"""
+        value = self.get(key)
+        if value is not None:
+            return value
+        value = build()
+        if isinstance(value, str):
+            self.put(key, value)
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self):
+        with self._lock:
+            return {
+                'entries': len(self._entries),
+                'bytes': self._bytes,
+                'hits': self.hits,
+                'misses': self.misses
+            }
+
+# Global chart cache instance
+chart_cache = ChartCache()
@@ -0,0 +1,78 @@
+import threading
+from datetime import datetime
+
+from utils.rollups import finalize, minute_stats, rollup_store, summarize, to_minute
+
+def metrics_from_summary(summary):
+    """The chatbot's daily metrics dict (energy totals in kWh, power in W) from a finalized rollup row"""
+    if summary is None or not summary['count'][0]:
+        return {}
+    count = int(summary['count'][0])
+    to_kwh = 1 / 1000 / 60  # W-minutes to kWh
+    return {
+        'total_consumption': float(summary['consumption_sum'][0]) * to_kwh,
+        'total_generation': float(summary['total_generation_sum'][0]) * to_kwh,
+        'total_solar_generation': float(summary['solar_power_sum'][0]) * to_kwh,
+        'total_wind_generation': float(summary['wind_power_sum'][0]) * to_kwh,
+        'total_grid_export': float(summary['grid_export_sum'][0]) * to_kwh,
+        'total_grid_import': float(summary['grid_import_sum'][0]) * to_kwh,
+        'avg_consumption': float(summary['consumption_mean'][0]),
+        'avg_generation': float(summary['total_generation_mean'][0]),
+        'avg_storage': float(summary['storage_percentage_mean'][0]),
+        'max_storage': float(summary['storage_percentage_max'][0]),
+        'min_storage': float(summary['storage_percentage_min'][0]),
+        'peak_consumption': float(summary['consumption_max'][0]),
+        'peak_generation': float(summary['total_generation_max'][0]),
+        'hours': count / 60
+    }
+
+def metrics_from_data(data):
+    """Daily metrics for a block of readings (reading dicts or columnar arrays)"""
+    return metrics_from_summary(finalize(summarize(minute_stats(data))))
+
+class DailyMetricsCache:
+    """Daily metrics by calendar date, read from the daily rollups.
+
+    A date is answered from its daily bucket when the bucket holds every minute of
+    the day (for today, every minute since midnight); days whose early minutes
+    predate the store are left to the caller. Past days are kept as finished
+    metrics dicts.
+    """
+
+    def __init__(self, rollups, max_days=60):
+        self.rollups = rollups
+        self.max_days = max_days
+        self._finished = {}  # date -> metrics dict, for complete or externally supplied days
+        self._lock = threading.Lock()
+
+    def get(self, day):
+        """Metrics for a date (today so far for the current date); None if not available"""
+        if isinstance(day, datetime):
+            day = day.date()
+        with self._lock:
+            if day in self._finished:
+                return self._finished[day]
+
+        bucket, newest_minute = self.rollups.day_with_newest(day)
+        if bucket is None:
+            return None
+        expected = min(1440, newest_minute - to_minute(day) + 1)
+        if bucket['count'][0] != expected:
+            return None
+        metrics = metrics_from_summary(bucket)
+        if expected == 1440:
+            self.put(day, metrics)
+        return metrics
+
+    def put(self, day, metrics):
+        """Keep metrics computed elsewhere for a date the store does not cover"""
+        if isinstance(day, datetime):
+            day = day.date()
+        with self._lock:
+            self._finished[day] = metrics
+            for old_day in sorted(self._finished)[:max(0, len(self._finished) - self.max_days)]:
+                del self._finished[old_day]
+        return metrics
+
+# Global daily metrics cache over the shared rollups
+daily_metrics = DailyMetricsCache(rollup_store)
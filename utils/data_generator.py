@@ -1,14 +1,68 @@
 import random
 import numpy as np
-import pandas as pd
 from datetime import datetime, timedelta
 import math
-import random
+import re
+
+# Column order of a complete dataset record
+DATASET_COLUMNS = (
+    'timestamp', 'sun_intensity', 'solar_power', 'wind_speed', 'wind_power', 'consumption',
+    'storage_kwh', 'storage_percentage', 'grid_export', 'grid_import', 'net_power', 'total_generation'
+)
+
+# Default thresholds for detect_solar_faults; policies override any subset
+SOLAR_FAULT_POLICY = {
+    'min_sun_intensity': 70,     # Only judge panels under high sun intensity
+    'rated_power': 10000,        # W at 100% sun intensity
+    'performance_ratio': 0.75,   # Expected output after losses
+    'min_efficiency': 0.6        # Fault below 60% of expected
+}
+
+# Default thresholds and prices for analyze_energy_trading
+TRADING_POLICY = {
+    'sell_min_surplus': 2000,
+    'sell_min_storage': 80,
+    'sell_fraction': 0.8,        # Sell 80% of surplus
+    'sell_price': 0.15,          # $ per kWh
+    'buy_min_deficit': 1000,
+    'buy_max_storage': 30,
+    'buy_fraction': 0.5,
+    'buy_price': 0.12            # $ per kWh
+}
+
+# Added to days since the Unix epoch to get date.toordinal(), which keys the per-date
+# seeds: it stays non-negative for dates before 1970, as numpy seed entropy must
+UNIX_EPOCH_ORDINAL = datetime(1970, 1, 1).toordinal()
 
 class RenewableEnergyDataGenerator:
-    def __init__(self):
-        self.solar_efficiency = 0.85 + random.uniform(-0.15, 0.10)  # Solar panel efficiency
-        self.wind_efficiency = 0.80 + random.uniform(-0.10, 0.15)   # Wind turbine efficiency
+    # Regime tables for the array engine, in the same order as the per-minute loops below
+    WEATHER_PATTERNS = ('sunny', 'partly_cloudy', 'cloudy', 'clear')
+    WEATHER_FACTOR_RANGES = np.array([(0.9, 1.0), (0.6, 0.85), (0.3, 0.65), (0.85, 0.95)])
+    SOLAR_FAULT_RANGES = np.array([(0.8, 0.9), (0.5, 0.8), (0.2, 0.5)])  # minor, moderate, severe
+    WIND_PATTERNS = ('calm', 'light', 'moderate', 'strong', 'gusty')
+    WIND_FACTOR_RANGES = np.array([(0.3, 0.6), (0.6, 0.9), (0.9, 1.2), (1.2, 1.6), (0.8, 1.8)])
+    WIND_FAULT_RANGES = np.array([(0.4, 0.7), (0.2, 0.5), (0.1, 0.6), (0.0, 0.3)])  # blade, gearbox, electrical, maintenance
+    CONSUMPTION_PROFILES = ('residential', 'commercial', 'mixed')
+    APPLIANCE_SPIKES = (
+        (0.25, 1000, 3000),   # hvac
+        (0.15, 3000, 7000),   # electric_vehicle
+        (0.18, 2000, 4000),   # water_heater
+        (0.12, 800, 2000),    # kitchen
+        (0.08, 1500, 2500),   # laundry
+        (0.3, 200, 800)       # electronics
+    )
+    BATTERY_CAPACITY = 20000  # 20kWh battery
+    # The per-request generator simulated the battery over the hour before each reading,
+    # starting at 50%; the live tick anchors every minute the same way
+    LIVE_BATTERY_WINDOW = 60
+    
+    def __init__(self, seed=None):
+        self.rng = np.random.default_rng(seed)
+        self.solar_efficiency = 0.85 + self.rng.uniform(-0.15, 0.10)  # Solar panel efficiency
+        self.wind_efficiency = 0.80 + self.rng.uniform(-0.10, 0.15)   # Wind turbine efficiency
+        
+        # Live tick mode: regimes and battery carried from one minute to the next
+        self.live_state = None
         
     def generate_solar_data(self, hours_back=24):
         """Generate realistic solar energy data with enhanced randomness and weather patterns"""
@@ -263,8 +317,262 @@ class RenewableEnergyDataGenerator:
         
         return storage_data
     
-    def generate_complete_dataset(self, hours_back=24):
+    def _time_fields(self, timestamps):
+        """Split a datetime64 array into hour, minute and weekday arrays"""
+        minutes = timestamps.astype('datetime64[m]')
+        hours = minutes.astype('datetime64[h]')
+        days = minutes.astype('datetime64[D]')
+        hour = (hours - days).astype(np.int64)
+        minute = (minutes - hours).astype(np.int64)
+        weekday = (days.astype(np.int64) + 3) % 7  # 1970-01-01 was a Thursday, 0=Monday
+        return hour, minute, weekday
+    
+    def _regime_indices(self, n, interval_range, options, state=None, key=None):
+        """Pick a new regime every interval samples, like the loops' i % interval checks.
+        
+        With a live `state`, the regime held in state[key] as (index, samples left, interval)
+        is continued first and the state is updated for the next call.
+        """
+        if state is None:
+            interval = int(self.rng.integers(*interval_range))
+            segments = -(-n // interval)
+            return np.repeat(self.rng.integers(0, len(options), size=segments), interval)[:n]
+        
+        regime, remaining, interval = state[key]
+        head = min(remaining, n)
+        rest = n - head
+        segments = -(-rest // interval)
+        draws = self.rng.integers(0, len(options), size=segments)
+        if segments:
+            state[key] = (int(draws[-1]), segments * interval - rest, interval)
+        else:
+            state[key] = (regime, remaining - head, interval)
+        return np.concatenate([np.full(head, regime), np.repeat(draws, interval)[:rest]]).astype(np.int64)
+    
+    def _uniform_by(self, ranges, indices):
+        """Draw one uniform sample per element from the (low, high) row selected by indices"""
+        bounds = ranges[indices]
+        return bounds[:, 0] + (bounds[:, 1] - bounds[:, 0]) * self.rng.random(len(indices))
+    
+    def generate_solar_arrays(self, timestamps, state=None):
+        """Array version of generate_solar_data for a datetime64 timestamp array"""
+        rng = self.rng
+        n = len(timestamps)
+        hour, minute, _ = self._time_fields(timestamps)
+        weather = self._regime_indices(n, (60, 181), self.WEATHER_PATTERNS, state, 'weather')
+        
+        # Multi-layered sine wave during daylight, minimal readings at night
+        base_intensity = np.maximum(0, np.sin((hour - 5) * np.pi / 14) * 95 + np.sin(minute * np.pi / 30) * 5)
+        peak_hours = (hour >= 10) & (hour <= 15)
+        base_intensity = np.where(peak_hours, np.minimum(100, base_intensity * rng.uniform(1.1, 1.3, n)), base_intensity)
+        daylight = (hour >= 5) & (hour <= 19)
+        base_intensity = np.where(daylight, base_intensity, rng.uniform(0, 2, n))
+        
+        weather_factor = self._uniform_by(self.WEATHER_FACTOR_RANGES, weather)
+        atmospheric_noise = rng.uniform(-8, 12, n)
+        cloud_shadow = np.where(rng.random(n) < 0.15, rng.uniform(-15, 5, n), 0)
+        sun_intensity = np.clip(base_intensity * weather_factor + atmospheric_noise + cloud_shadow, 0, 100)
+        
+        max_power = rng.uniform(9500, 10500, n)
+        efficiency_variation = rng.uniform(0.95, 1.05, n)
+        power_generation = (sun_intensity / 100) * max_power * self.solar_efficiency * efficiency_variation
+        
+        fault = rng.random(n) < 0.08
+        fault_factor = self._uniform_by(self.SOLAR_FAULT_RANGES, rng.integers(0, 3, n))
+        power_generation = np.where(fault, power_generation * fault_factor, power_generation)
+        
+        return {
+            'sun_intensity': np.round(sun_intensity, 2),
+            'solar_power': np.round(power_generation, 2)
+        }
+    
+    def generate_wind_arrays(self, timestamps, state=None):
+        """Array version of generate_wind_data for a datetime64 timestamp array"""
+        rng = self.rng
+        n = len(timestamps)
+        hour, _, _ = self._time_fields(timestamps)
+        pattern = self._regime_indices(n, (120, 301), self.WIND_PATTERNS, state, 'wind_pattern')
+        
+        diurnal_factor = 1.2 - 0.4 * np.sin((hour - 6) * np.pi / 12)
+        base_wind = rng.uniform(6, 12, n) * diurnal_factor
+        pattern_factor = self._uniform_by(self.WIND_FACTOR_RANGES, pattern)
+        
+        turbulence = rng.uniform(-3, 3, n)
+        gust_chance = np.where(pattern == self.WIND_PATTERNS.index('gusty'), 0.1, 0.03)
+        gust = np.where(rng.random(n) < gust_chance, rng.uniform(3, 8, n), 0)
+        wind_speed = np.maximum(0, base_wind * pattern_factor + turbulence + gust)
+        
+        max_power = rng.uniform(7800, 8200, n)
+        turbine_efficiency = rng.uniform(0.95, 1.05, n)
+        curve = max_power * np.clip((wind_speed - 3) / 11, 0, None) ** 2.8 * turbine_efficiency
+        wind_power = np.select(
+            [wind_speed < 3, wind_speed > 25, wind_speed > 14],
+            [rng.uniform(0, 50, n), rng.uniform(0, 100, n), max_power * rng.uniform(0.95, 1.02, n)],
+            default=curve
+        )
+        wind_power = wind_power * self.wind_efficiency
+        
+        fault = rng.random(n) < 0.05
+        fault_factor = self._uniform_by(self.WIND_FAULT_RANGES, rng.integers(0, 4, n))
+        wind_power = np.where(fault, wind_power * fault_factor, wind_power)
+        
+        return {
+            'wind_speed': np.round(wind_speed, 2),
+            'wind_power': np.round(wind_power, 2)
+        }
+    
+    def generate_consumption_arrays(self, timestamps, profile=None):
+        """Array version of generate_consumption_data for a datetime64 timestamp array"""
+        rng = self.rng
+        n = len(timestamps)
+        hour, _, day_of_week = self._time_fields(timestamps)
+        profile = profile or self.CONSUMPTION_PROFILES[rng.integers(0, len(self.CONSUMPTION_PROFILES))]
+        
+        if profile == 'residential':
+            base_consumption = np.select(
+                [(hour >= 6) & (hour <= 9), (hour >= 17) & (hour <= 22), (hour >= 23) | (hour <= 5)],
+                [rng.uniform(4500, 7000, n), rng.uniform(5500, 8500, n), rng.uniform(1500, 2800, n)],
+                default=rng.uniform(2800, 4500, n)
+            )
+        elif profile == 'commercial':
+            base_consumption = np.select(
+                [day_of_week >= 5, (hour >= 8) & (hour <= 18)],
+                [rng.uniform(1200, 2500, n), rng.uniform(6000, 9500, n)],
+                default=rng.uniform(2000, 3500, n)
+            )
+        else:  # Mixed profile
+            daily_factor = 1 + 0.3 * np.sin((hour - 6) * np.pi / 12)
+            base_consumption = rng.uniform(3000, 6500, n) * daily_factor
+        
+        for probability, low, high in self.APPLIANCE_SPIKES:
+            base_consumption = base_consumption + np.where(rng.random(n) < probability, rng.uniform(low, high, n), 0)
+        
+        weather_adjustment = rng.uniform(-500, 1500, n)
+        minute_variation = rng.uniform(-300, 300, n)
+        consumption = np.maximum(800, base_consumption + weather_adjustment + minute_variation)
+        
+        return {'consumption': np.round(consumption, 2)}
+    
+    def generate_storage_arrays(self, total_generation, consumption, initial_storage=None):
+        """Array version of generate_storage_data; only the battery level itself is sequential"""
+        battery_capacity = self.BATTERY_CAPACITY
+        current_storage = battery_capacity * 0.5 if initial_storage is None else initial_storage
+        net_power = total_generation - consumption
+        
+        # Charging side has no dependency on the battery level
+        charge_power = np.minimum(net_power, battery_capacity * 0.1)
+        
+        max_discharge = battery_capacity * 0.2
+        storage = [0.0] * len(net_power)
+        discharge = [0.0] * len(net_power)
+        for i, (net, charge) in enumerate(zip(net_power.tolist(), charge_power.tolist())):
+            if net > 0:
+                current_storage += charge / 60
+                if current_storage > battery_capacity:
+                    current_storage = battery_capacity
+            else:
+                discharge_power = min(-net, current_storage * 6, max_discharge)
+                current_storage -= discharge_power / 60
+                if current_storage < 0:
+                    current_storage = 0
+                discharge[i] = discharge_power
+            storage[i] = current_storage
+        return self._storage_columns(net_power, np.array(storage), np.array(discharge))
+    
+    def _storage_columns(self, net_power, storage, discharge):
+        charge_power = np.minimum(net_power, self.BATTERY_CAPACITY * 0.1)
+        grid_export = np.where(net_power > 0, np.maximum(0, net_power - charge_power), 0)
+        grid_import = np.where(net_power < 0, np.maximum(0, -net_power - discharge), 0)
+        return {
+            'storage_kwh': np.round(storage, 2),
+            'storage_percentage': np.round(storage / self.BATTERY_CAPACITY * 100, 2),
+            'grid_export': np.round(grid_export, 2),
+            'grid_import': np.round(grid_import, 2),
+            'net_power': np.round(net_power, 2)
+        }
+    
+    def generate_live_storage_arrays(self, net_power, earlier_net_power=()):
+        """Battery columns where each minute's level is simulated from 50% over the hour ending at it.
+        
+        earlier_net_power holds the minutes before the first one. One step per minute of
+        the window, vectorized over every output minute, so long backfills keep the
+        per-reading distribution instead of draining a single battery for weeks.
+        """
+        battery_capacity = self.BATTERY_CAPACITY
+        earlier = np.asarray(earlier_net_power, dtype=float)[-(self.LIVE_BATTERY_WINDOW - 1):]
+        padded = np.concatenate([earlier, net_power])
+        ends = np.arange(len(net_power)) + len(earlier)
+        
+        storage = np.full(len(net_power), battery_capacity * 0.5)
+        discharge = np.zeros(len(net_power))
+        for back in range(self.LIVE_BATTERY_WINDOW - 1, -1, -1):
+            valid = ends >= back
+            net = padded[np.maximum(ends - back, 0)]
+            charge = np.minimum(net, battery_capacity * 0.1)
+            discharge = np.where(net > 0, 0, np.minimum(np.minimum(-net, storage * 6), battery_capacity * 0.2))
+            step = np.where(net > 0, charge, -discharge) / 60
+            storage = np.where(valid, np.clip(storage + step, 0, battery_capacity), storage)
+        return self._storage_columns(net_power, storage, discharge)
+    
+    def generate_complete_arrays(self, hours_back=24, end_time=None):
+        """Generate the complete dataset as a dict of NumPy arrays (newest sample first)"""
+        end = np.datetime64(end_time or datetime.now(), 'us')
+        timestamps = end - np.arange(hours_back * 60) * np.timedelta64(1, 'm')
+        return self.simulate_arrays(timestamps)
+    
+    def simulate_arrays(self, timestamps, initial_storage=None, state=None):
+        """Simulate every signal for the given datetime64 timestamps, in array order.
+        
+        Passing a live `state` (see new_live_state) continues its weather, wind pattern,
+        consumption profile and recent net power and updates it in place.
+        """
+        arrays = {'timestamp': timestamps}
+        arrays.update(self.generate_solar_arrays(timestamps, state))
+        arrays.update(self.generate_wind_arrays(timestamps, state))
+        arrays.update(self.generate_consumption_arrays(timestamps, state['profile'] if state else None))
+        arrays['total_generation'] = arrays['solar_power'] + arrays['wind_power']
+        if state is None:
+            arrays.update(self.generate_storage_arrays(arrays['total_generation'], arrays['consumption'], initial_storage))
+        else:
+            net_power = arrays['total_generation'] - arrays['consumption']
+            arrays.update(self.generate_live_storage_arrays(net_power, state['net_power']))
+            state['net_power'] = np.concatenate([state['net_power'], net_power])[-(self.LIVE_BATTERY_WINDOW - 1):]
+        return arrays
+    
+    def new_live_state(self):
+        """Fresh live-tick state: regimes are drawn on the first step, no earlier net power"""
+        rng = self.rng
+        return {
+            'weather': (0, 0, int(rng.integers(60, 181))),
+            'wind_pattern': (0, 0, int(rng.integers(120, 301))),
+            'profile': self.CONSUMPTION_PROFILES[rng.integers(0, len(self.CONSUMPTION_PROFILES))],
+            'net_power': np.empty(0)
+        }
+    
+    def advance_live(self, timestamps, earlier_net_power=None):
+        """Advance the live tick over consecutive minute timestamps, the next ones after the last call.
+        
+        earlier_net_power replaces the remembered minutes before the first timestamp,
+        for when another process produced them.
+        """
+        if self.live_state is None:
+            self.live_state = self.new_live_state()
+        if earlier_net_power is not None:
+            self.live_state['net_power'] = np.asarray(earlier_net_power, dtype=float)
+        return self.simulate_arrays(timestamps, state=self.live_state)
+    
+    @staticmethod
+    def arrays_to_records(arrays):
+        """Convert columnar arrays into the list-of-dicts shape used by the routes"""
+        columns = [(key, arrays[key].tolist()) for key in DATASET_COLUMNS]
+        keys = [key for key, _ in columns]
+        return [dict(zip(keys, row)) for row in zip(*(values for _, values in columns))]
+    
+    def generate_complete_dataset(self, hours_back=24, vectorized=True):
         """Generate complete renewable energy dataset"""
+        if vectorized:
+            return self.arrays_to_records(self.generate_complete_arrays(hours_back))
+        
         solar_data = self.generate_solar_data(hours_back)
         wind_data = self.generate_wind_data(hours_back)
         consumption_data = self.generate_consumption_data(hours_back)
@@ -292,74 +600,216 @@ class RenewableEnergyDataGenerator:
     
     def get_daily_averages(self, data):
         """Calculate daily averages for analysis"""
-        df = pd.DataFrame(data)
-        df['date'] = pd.to_datetime(df['timestamp']).dt.date
-        
-        daily_averages = df.groupby('date').agg({
-            'solar_power': 'mean',
-            'wind_power': 'mean',
-            'total_generation': 'mean',
-            'consumption': 'mean',
-            'storage_percentage': 'mean',
-            'sun_intensity': 'mean',
-            'grid_export': 'sum',
-            'grid_import': 'sum'
-        }).reset_index()
-        
-        return daily_averages.to_dict('records')
+        from utils.rollups import daily_averages, finalize, group_stats, minute_stats  # Avoids a circular import
+        
+        stats = minute_stats(data)
+        return daily_averages(finalize(group_stats(stats, stats['start'] // 1440), keyed=True))
+    
+    @staticmethod
+    def _analysis_columns(data, keys):
+        """Float columns from a list of records or from columnar arrays"""
+        if isinstance(data, (list, tuple)):
+            return {key: np.array([record[key] for record in data], dtype=float) for key in keys}
+        return {key: np.asarray(data[key], dtype=float) for key in keys}
     
-    def detect_solar_faults(self, data):
+    @staticmethod
+    def _timestamps_at(data, indices):
+        """Timestamps of the selected rows only, as datetimes for columnar input"""
+        if isinstance(data, (list, tuple)):
+            return [data[i]['timestamp'] for i in indices]
+        timestamps = np.asarray(data['timestamp'])[indices]
+        if timestamps.dtype.kind == 'M':
+            return timestamps.astype('datetime64[us]').tolist()
+        return timestamps.tolist()
+    
+    @staticmethod
+    def _round2(values):
+        """round(value, 2) for every value, vectorized.
+        
+        np.round scales by 100 first, which can tip values sitting on a .5 boundary the
+        other way; those few are rounded with Python's round so results match exactly.
+        """
+        rounded = np.round(values, 2)
+        scaled = values * 100
+        near_tie = np.abs(scaled - np.floor(scaled) - 0.5) < 1e-6
+        if near_tie.any():
+            rounded[near_tie] = [round(value, 2) for value in values[near_tie].tolist()]
+        return rounded.tolist()
+    
+    def detect_solar_faults(self, data, policy=None):
         """Detect potential solar panel faults based on sun intensity vs power generation"""
-        faults = []
+        return self.evaluate_solar_fault_policies(data, {'default': policy or {}})['default']
+    
+    def evaluate_solar_fault_policies(self, data, policies):
+        """Solar faults under several threshold policies ({name: overrides of SOLAR_FAULT_POLICY}).
         
-        for record in data:
-            sun_intensity = record['sun_intensity']
-            solar_power = record['solar_power']
-            
-            if sun_intensity > 70:  # High sun intensity
-                expected_power = (sun_intensity / 100) * 10000 * 0.75  # Expected with some losses
-                
-                if solar_power < expected_power * 0.6:  # Less than 60% of expected
-                    faults.append({
-                        'timestamp': record['timestamp'],
-                        'fault_type': 'Low Solar Efficiency',
-                        'sun_intensity': sun_intensity,
-                        'actual_power': solar_power,
-                        'expected_power': expected_power,
-                        'efficiency_loss': round(((expected_power - solar_power) / expected_power) * 100, 2)
-                    })
+        The columns are extracted once and each policy is a boolean mask over them, so
+        only the matching rows are turned into dicts.
+        """
+        columns = self._analysis_columns(data, ('sun_intensity', 'solar_power'))
+        sun_intensity = columns['sun_intensity']
+        solar_power = columns['solar_power']
         
-        return faults
+        results = {}
+        for name, overrides in policies.items():
+            policy = {**SOLAR_FAULT_POLICY, **overrides}
+            expected_power = (sun_intensity / 100) * policy['rated_power'] * policy['performance_ratio']
+            rows = np.flatnonzero(
+                (sun_intensity > policy['min_sun_intensity']) &
+                (solar_power < expected_power * policy['min_efficiency'])
+            )
+            
+            expected = expected_power[rows]
+            actual = solar_power[rows]
+            efficiency_loss = self._round2((expected - actual) / expected * 100)
+            results[name] = [{
+                'timestamp': timestamp,
+                'fault_type': 'Low Solar Efficiency',
+                'sun_intensity': intensity,
+                'actual_power': actual_power,
+                'expected_power': expected_value,
+                'efficiency_loss': loss
+            } for timestamp, intensity, actual_power, expected_value, loss in zip(
+                self._timestamps_at(data, rows), sun_intensity[rows].tolist(), actual.tolist(),
+                expected.tolist(), efficiency_loss
+            )]
+        return results
     
-    def analyze_energy_trading(self, data):
+    def analyze_energy_trading(self, data, policy=None):
         """Analyze energy surplus/deficit for trading opportunities"""
-        trading_opportunities = []
+        return self.evaluate_trading_policies(data, {'default': policy or {}})['default']
+    
+    def evaluate_trading_policies(self, data, policies):
+        """Trading opportunities under several threshold/price policies ({name: overrides of TRADING_POLICY})"""
+        columns = self._analysis_columns(data, ('net_power', 'storage_percentage'))
+        net_power = columns['net_power']
+        storage_percentage = columns['storage_percentage']
         
-        for record in data:
-            net_power = record['net_power']
-            storage_percentage = record['storage_percentage']
+        results = {}
+        for name, overrides in policies.items():
+            policy = {**TRADING_POLICY, **overrides}
             
             # Selling opportunity when surplus and battery is nearly full
-            if net_power > 2000 and storage_percentage > 80:
-                trading_opportunities.append({
-                    'timestamp': record['timestamp'],
-                    'opportunity_type': 'SELL',
-                    'surplus_power': round(net_power, 2),
-                    'recommended_sell': round(net_power * 0.8, 2),  # Sell 80% of surplus
-                    'estimated_revenue': round(net_power * 0.8 * 0.15, 2)  # $0.15 per kWh
-                })
-            
+            sell = (net_power > policy['sell_min_surplus']) & (storage_percentage > policy['sell_min_storage'])
             # Buying opportunity when deficit and battery is low
-            elif net_power < -1000 and storage_percentage < 30:
-                trading_opportunities.append({
-                    'timestamp': record['timestamp'],
-                    'opportunity_type': 'BUY',
-                    'deficit_power': round(abs(net_power), 2),
-                    'recommended_buy': round(abs(net_power) * 0.5, 2),
-                    'estimated_cost': round(abs(net_power) * 0.5 * 0.12, 2)  # $0.12 per kWh
-                })
-        
-        return trading_opportunities
+            buy = ~sell & (net_power < -policy['buy_min_deficit']) & (storage_percentage < policy['buy_max_storage'])
+            rows = np.flatnonzero(sell | buy)
+            
+            power = np.abs(net_power[rows])
+            fraction = np.where(sell[rows], policy['sell_fraction'], policy['buy_fraction'])
+            price = np.where(sell[rows], policy['sell_price'], policy['buy_price'])
+            amounts = self._round2(power)
+            recommended = self._round2(power * fraction)
+            values = self._round2(power * fraction * price)
+            
+            opportunities = []
+            for i, (timestamp, is_sell) in enumerate(zip(self._timestamps_at(data, rows), sell[rows].tolist())):
+                if is_sell:
+                    opportunities.append({
+                        'timestamp': timestamp,
+                        'opportunity_type': 'SELL',
+                        'surplus_power': amounts[i],
+                        'recommended_sell': recommended[i],
+                        'estimated_revenue': values[i]
+                    })
+                else:
+                    opportunities.append({
+                        'timestamp': timestamp,
+                        'opportunity_type': 'BUY',
+                        'deficit_power': amounts[i],
+                        'recommended_buy': recommended[i],
+                        'estimated_cost': values[i]
+                    })
+            results[name] = opportunities
+        return results
+    
+    @staticmethod
+    def _freq_minutes(freq):
+        """Step in whole minutes from an int, a timedelta or a string like '1min', '15min', '1h' or 'D'"""
+        if isinstance(freq, timedelta):
+            return max(1, int(freq.total_seconds() // 60))
+        if isinstance(freq, (int, np.integer)):
+            return max(1, int(freq))
+        count, unit = re.fullmatch(r'\s*(\d*)\s*(min|m|t|h|d)\s*', str(freq).lower()).groups()
+        return (int(count) if count else 1) * {'min': 1, 'm': 1, 't': 1, 'h': 60, 'd': 1440}[unit]
+    
+    def generate_historical_range(self, start, end, freq='1min', seed=None):
+        """Vectorized generate_historical_point for every timestamp in [start, end) at freq.
+        
+        Returns columnar arrays (timestamps as datetime64[m]). With a seed, each date's
+        random draws come from its own generator seeded by (seed, date) and the panel
+        and turbine efficiencies from the seed itself, so a date always yields the same
+        series whatever the range or process it is generated in.
+        """
+        step = np.timedelta64(self._freq_minutes(freq), 'm')
+        timestamps = np.arange(np.datetime64(start, 'm'), np.datetime64(end, 'm'), step)
+        n = len(timestamps)
+        hour, minute, _ = self._time_fields(timestamps)
+        
+        if seed is None:
+            draws = self.rng.random((10, n))
+            solar_efficiency, wind_efficiency = self.solar_efficiency, self.wind_efficiency
+        else:
+            # One full day of minute draws per date, indexed by minute of day
+            days = timestamps.astype('datetime64[D]')
+            minute_of_day = hour * 60 + minute
+            draws = np.empty((10, n))
+            for day in np.unique(days):
+                rows = days == day
+                day_draws = np.random.default_rng([seed, int(day.astype(np.int64)) + UNIX_EPOCH_ORDINAL]).random((10, 1440))
+                draws[:, rows] = day_draws[:, minute_of_day[rows]]
+            installation = RenewableEnergyDataGenerator(seed)
+            solar_efficiency, wind_efficiency = installation.solar_efficiency, installation.wind_efficiency
+        
+        def uniform(row, low, high):
+            return low + draws[row] * (high - low)
+        
+        # Solar generation based on time of day
+        daylight = (hour >= 5) & (hour <= 19)
+        primary_angle = np.sin((hour - 5) * np.pi / 14)
+        secondary_angle = np.sin(minute * np.pi / 30)
+        sun_intensity = np.maximum(0, primary_angle * 95 + secondary_angle * 5)
+        midday = (hour >= 10) & (hour <= 15)
+        sun_intensity = np.where(midday, np.minimum(100, sun_intensity * uniform(0, 1.1, 1.3)), sun_intensity)
+        sun_intensity = np.where(daylight, sun_intensity, uniform(1, 0, 2))
+        
+        # Weather factor
+        sun_intensity = np.clip(sun_intensity * uniform(2, 0.7, 1.0) + uniform(3, -5, 5), 0, 100)
+        solar_power = (sun_intensity / 100) * uniform(4, 9500, 10500) * solar_efficiency
+        
+        # Wind generation
+        wind_speed = np.maximum(0, uniform(5, 4, 12) + uniform(6, -2, 2))
+        wind_power = np.select(
+            [wind_speed < 3, wind_speed > 25, wind_speed > 14],
+            [uniform(7, 0, 50), uniform(7, 0, 100), uniform(7, 7500, 8200)],
+            8000 * (np.clip(wind_speed - 3, 0, None) / 11) ** 2.8
+        ) * wind_efficiency
+        
+        # Consumption based on time of day
+        consumption = np.select(
+            [((hour >= 6) & (hour <= 9)) | ((hour >= 17) & (hour <= 22)), (hour >= 23) | (hour <= 5)],
+            [uniform(8, 4500, 7500), uniform(8, 1500, 2800)],
+            uniform(8, 2800, 4500)
+        )
+        
+        total_generation = solar_power + wind_power
+        net_power = total_generation - consumption
+        storage_percentage = uniform(9, 20, 90)
+        
+        return {
+            'timestamp': timestamps,
+            'sun_intensity': np.round(sun_intensity, 1),
+            'solar_power': np.round(solar_power, 2),
+            'wind_speed': np.round(wind_speed, 1),
+            'wind_power': np.round(wind_power, 2),
+            'consumption': np.round(consumption, 2),
+            'storage_kwh': np.round((storage_percentage / 100) * 50, 1),
+            'storage_percentage': np.round(storage_percentage, 1),
+            'grid_export': np.round(np.maximum(0, net_power / 1000), 3),
+            'grid_import': np.round(np.maximum(0, -net_power / 1000), 3),
+            'net_power': np.round(net_power, 2),
+            'total_generation': np.round(total_generation, 2)
+        }
     
     def generate_historical_point(self, timestamp):
         """Generate a single historical data point for a specific timestamp"""
@@ -437,11 +887,11 @@ class RenewableEnergyDataGenerator:
 
 # Utility function to get current data
 def get_current_data():
-    """Get current renewable energy data"""
-    generator = RenewableEnergyDataGenerator()
-    return generator.generate_complete_dataset(hours_back=1)[-1]  # Last minute data
+    """Get the latest renewable energy reading from the shared time-series store"""
+    from utils.timeseries_store import timeseries_store  # Imported here, the store module imports this one
+    return timeseries_store.latest()
 
 def get_historical_data(hours=24):
-    """Get historical renewable energy data"""
-    generator = RenewableEnergyDataGenerator()
-    return generator.generate_complete_dataset(hours_back=hours)
+    """Get historical renewable energy data (oldest first) from the shared time-series store"""
+    from utils.timeseries_store import timeseries_store  # Imported here, the store module imports this one
+    return timeseries_store.get_records(hours)
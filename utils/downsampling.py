@@ -0,0 +1,92 @@
+import numpy as np
+
+# Points kept per chart frame, whatever the requested time range
+DEFAULT_POINT_BUDGET = 500
+
+def _as_float(values):
+    """Numeric view of a column; datetimes become nanoseconds relative to the first one"""
+    values = np.asarray(values)
+    if np.issubdtype(values.dtype, np.datetime64):
+        values = values.astype('datetime64[ns]').astype(np.int64)
+        values = values - (values[0] if len(values) else 0)
+    return values.astype(float)
+
+def lttb_indices(x, y, threshold):
+    """Indices kept by Largest-Triangle-Three-Buckets downsampling.
+
+    The first and last points are always kept; each bucket in between keeps the point
+    forming the largest triangle with the previous pick and the next bucket's average,
+    which preserves peaks and dips that a fixed stride would skip.
+    """
+    n = len(y)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+
+    x = _as_float(x)
+    y = _as_float(y)
+    every = (n - 2) / (threshold - 2)
+    indices = np.empty(threshold, dtype=np.int64)
+    indices[0] = 0
+    indices[-1] = n - 1
+
+    selected = 0
+    for bucket in range(threshold - 2):
+        start = int(bucket * every) + 1
+        end = int((bucket + 1) * every) + 1
+        next_end = min(int((bucket + 2) * every) + 1, n)
+
+        avg_x = x[end:next_end].mean()
+        avg_y = y[end:next_end].mean()
+        area = np.abs(
+            (x[selected] - avg_x) * (y[start:end] - y[selected]) -
+            (x[selected] - x[start:end]) * (avg_y - y[selected])
+        )
+        selected = start + int(np.argmax(area))
+        indices[bucket + 1] = selected
+
+    return indices
+
+def minmax_indices(y, threshold):
+    """Indices of the minimum and maximum of each bucket (a min/max envelope)"""
+    n = len(y)
+    if threshold >= n or threshold < 2:
+        return np.arange(n)
+
+    y = _as_float(y)
+    edges = np.linspace(0, n, threshold // 2 + 1).astype(np.int64)
+    picks = []
+    for start, end in zip(edges[:-1], edges[1:]):
+        if end > start:
+            bucket = y[start:end]
+            picks.append(start + int(np.argmin(bucket)))
+            picks.append(start + int(np.argmax(bucket)))
+    return np.unique(picks)
+
+def downsample_indices(x, columns, max_points=DEFAULT_POINT_BUDGET, method='lttb'):
+    """Row indices to keep so that every column's extremes survive within max_points.
+
+    The budget is split across the columns and the per-column picks are merged,
+    so traces drawn from the same rows stay aligned on a shared x axis.
+    """
+    n = len(x)
+    if n <= max_points or not columns:
+        return np.arange(n)
+
+    per_column = max(3, max_points // len(columns))
+    picks = []
+    for y in columns:
+        if method == 'minmax':
+            picks.append(minmax_indices(y, per_column))
+        else:
+            picks.append(lttb_indices(x, y, per_column))
+    return np.unique(np.concatenate(picks))
+
+def downsample_frame(df, x_column, y_columns, max_points=DEFAULT_POINT_BUDGET, method='lttb'):
+    """Downsample a DataFrame's rows for plotting, keeping the extremes of y_columns"""
+    indices = downsample_indices(
+        df[x_column].values,
+        [df[column].values for column in y_columns],
+        max_points=max_points,
+        method=method
+    )
+    return df.iloc[indices]
@@ -0,0 +1,73 @@
+import re
+import threading
+from collections import Counter, namedtuple
+
+# Words (with inner apostrophes, e.g. "what's") and single symbols
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+(?:'[a-z]+)?|[^\sa-z0-9]")
+
+IntentMatch = namedtuple('IntentMatch', ['intent', 'keyword', 'priority'])
+
+def tokenize(text):
+    return TOKEN_PATTERN.findall(text.lower())
+
+class IntentRouter:
+    """Classifies a question into one intent in a single pass over its tokens.
+
+    Intents are given in priority order as (name, keywords) pairs. Every keyword,
+    including multi-word phrases, is compiled once into a token index that maps the
+    phrase to the highest-priority intent using it, so a question is tokenized once
+    and each of its word n-grams is a dictionary lookup. Keywords only match whole
+    words ("hi" does not match "this"); a trailing plural "s" is ignored. Optional
+    regex patterns cover intents that keywords cannot express, such as arithmetic.
+    """
+
+    def __init__(self, intents, patterns=None, default='general'):
+        self.default = default
+        self.priorities = {name: priority for priority, (name, _) in enumerate(intents)}
+        self.index = {}
+        for name, keywords in intents:
+            for keyword in keywords:
+                phrase = ' '.join(tokenize(keyword))
+                if phrase not in self.index:  # Earlier intents win shared keywords
+                    self.index[phrase] = name
+        self.max_words = max((phrase.count(' ') + 1 for phrase in self.index), default=1)
+        # First words of multi-word phrases; longer n-grams are only tried after these
+        self.phrase_starts = {phrase.split(' ', 1)[0] for phrase in self.index if ' ' in phrase}
+        self.patterns = [(name, re.compile(pattern)) for name, pattern in (patterns or {}).items()]
+        self.counts = Counter()
+        self._lock = threading.Lock()
+
+    def _lookup(self, phrase):
+        intent = self.index.get(phrase)
+        if intent is None and len(phrase) > 3 and phrase.endswith('s') and ' ' not in phrase:
+            phrase = phrase[:-1]
+            intent = self.index.get(phrase)
+        return intent, phrase
+
+    def match(self, text):
+        """Best IntentMatch for a text, or None when no keyword or pattern matches"""
+        best = None
+        tokens = tokenize(text)
+        for start in range(len(tokens)):
+            longest = min(self.max_words, len(tokens) - start) if tokens[start] in self.phrase_starts else 1
+            for length in range(1, longest + 1):
+                intent, phrase = self._lookup(' '.join(tokens[start:start + length]))
+                if intent is not None and (best is None or self.priorities[intent] < best.priority):
+                    best = IntentMatch(intent, phrase, self.priorities[intent])
+        for intent, pattern in self.patterns:
+            if best is None or self.priorities[intent] < best.priority:
+                found = pattern.search(text)
+                if found:
+                    best = IntentMatch(intent, found.group(0), self.priorities[intent])
+        return best
+
+    def classify(self, text):
+        """IntentMatch for a text, falling back to the default intent; counted for stats()"""
+        best = self.match(text) or IntentMatch(self.default, None, len(self.priorities))
+        with self._lock:
+            self.counts[best.intent] += 1
+        return best
+
+    def stats(self):
+        with self._lock:
+            return dict(self.counts)
@@ -0,0 +1,76 @@
+import threading
+import time
+
+class _Slot:
+    """Result handle for one queued item"""
+
+    def __init__(self, item):
+        self.item = item
+        self.value = None
+        self.error = None
+        self.done = threading.Event()
+
+class MicroBatcher:
+    """Coalesces concurrent single predictions into one batched call.
+
+    The first caller to find the queue empty becomes the flusher: it waits up to
+    max_wait_seconds for other requests to queue their items, then runs
+    predict_batch on up to max_batch_size items at a time and hands each caller
+    its own result. Under gevent the wait and the events are cooperative, so
+    requests handled by other greenlets join the same batch.
+    """
+
+    def __init__(self, predict_batch, max_batch_size=256, max_wait_seconds=0.001):
+        self.predict_batch = predict_batch
+        self.max_batch_size = max_batch_size
+        self.max_wait_seconds = max_wait_seconds
+        self._pending = []
+        self._lock = threading.Lock()
+        self.batches = 0
+        self.items = 0
+        self.largest_batch = 0
+
+    def predict(self, item):
+        """Prediction for one item, computed together with any concurrent items"""
+        slot = _Slot(item)
+        with self._lock:
+            self._pending.append(slot)
+            is_flusher = len(self._pending) == 1
+
+        if is_flusher:
+            if self.max_wait_seconds > 0:
+                time.sleep(self.max_wait_seconds)
+            self._flush()
+        slot.done.wait()
+
+        if slot.error is not None:
+            raise slot.error
+        return slot.value
+
+    def _flush(self):
+        while True:
+            with self._lock:
+                batch = self._pending[:self.max_batch_size]
+                del self._pending[:self.max_batch_size]
+            if not batch:
+                return
+            try:
+                values = self.predict_batch([slot.item for slot in batch])
+                for slot, value in zip(batch, values):
+                    slot.value = float(value)
+            except Exception as e:
+                for slot in batch:
+                    slot.error = e
+            self.batches += 1
+            self.items += len(batch)
+            self.largest_batch = max(self.largest_batch, len(batch))
+            for slot in batch:
+                slot.done.set()
+
+    def stats(self):
+        return {
+            'batches': self.batches,
+            'items': self.items,
+            'largest_batch': self.largest_batch,
+            'average_batch': self.items / self.batches if self.batches else 0.0
+        }
@@ -0,0 +1,88 @@
+import os
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+try:
+    from gevent.monkey import get_original
+    # Counters are touched from native worker threads, so use an unpatched lock
+    _native_lock = get_original('_thread', 'allocate_lock')
+except ImportError:
+    _native_lock = threading.Lock
+
+def _gevent_patched():
+    """True when running under a monkey-patched gevent hub (the gunicorn gevent worker)"""
+    if 'gevent.monkey' not in sys.modules:
+        return False
+    from gevent.monkey import is_module_patched
+    return is_module_patched('threading')
+
+class BlockingPool:
+    """Bounded pool of native threads for CPU-bound calls that release the GIL.
+
+    Under gevent the work goes to a gevent ThreadPool, so only the calling greenlet
+    waits while the hub keeps serving requests and Socket.IO pushes. Without gevent
+    a regular ThreadPoolExecutor is used. Calls beyond max_workers queue up, and
+    the queue depth is reported by stats().
+    """
+
+    def __init__(self, name, max_workers=4):
+        self.name = name
+        self.max_workers = max_workers
+        self._pool = None
+        self._pool_lock = threading.Lock()
+        self._counter_lock = _native_lock()
+        self.queued = 0
+        self.active = 0
+        self.completed = 0
+        self.peak_queued = 0
+
+    def _get_pool(self):
+        # Created lazily so the pool belongs to the worker process, after forking and patching
+        if self._pool is None:
+            with self._pool_lock:
+                if self._pool is None:
+                    if _gevent_patched():
+                        from gevent.threadpool import ThreadPool
+                        self._pool = ThreadPool(self.max_workers)
+                    else:
+                        self._pool = ThreadPoolExecutor(
+                            max_workers=self.max_workers,
+                            thread_name_prefix=self.name
+                        )
+        return self._pool
+
+    def _run(self, func, args, kwargs):
+        with self._counter_lock:
+            self.queued -= 1
+            self.active += 1
+        try:
+            return func(*args, **kwargs)
+        finally:
+            with self._counter_lock:
+                self.active -= 1
+                self.completed += 1
+
+    def call(self, func, *args, **kwargs):
+        """Run func(*args, **kwargs) on a pool thread and wait for its result"""
+        pool = self._get_pool()
+        with self._counter_lock:
+            self.queued += 1
+            self.peak_queued = max(self.peak_queued, self.queued)
+        if isinstance(pool, ThreadPoolExecutor):
+            return pool.submit(self._run, func, args, kwargs).result()
+        return pool.spawn(self._run, func, args, kwargs).get()
+
+    def stats(self):
+        with self._counter_lock:
+            return {
+                'name': self.name,
+                'max_workers': self.max_workers,
+                'queued': self.queued,
+                'active': self.active,
+                'completed': self.completed,
+                'peak_queued': self.peak_queued
+            }
+
+# Global pool for bcrypt hashing and verification
+password_pool = BlockingPool('bcrypt', max_workers=int(os.environ.get('PASSWORD_HASH_THREADS', 4)))
@@ -0,0 +1,100 @@
+import threading
+import time
+from collections import OrderedDict
+
+class ResponseCache:
+    """TTL cache for computed responses, with one computation per key at a time.
+
+    Entries expire ttl_seconds after they were stored and are swept oldest first
+    whenever the cache is written, so stale minute buckets do not linger. When
+    several requests miss the same key together, the first computes the value and
+    the others wait for it instead of repeating the work.
+    """
+
+    def __init__(self, ttl_seconds=60, max_entries=1024):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._entries = OrderedDict()   # key -> (expires_at, value), oldest first
+        self._inflight = {}             # key -> Event set once the leader has finished
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.expired = 0
+
+    def current_bucket(self, bucket_seconds=60, now=None):
+        """Index of the time bucket containing `now`, for keys that should change every bucket"""
+        return int((now if now is not None else time.time()) // bucket_seconds)
+
+    def _get_locked(self, key, now):
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if entry[0] <= now:
+            del self._entries[key]
+            self.expired += 1
+            return None
+        return entry[1]
+
+    def get(self, key):
+        with self._lock:
+            value = self._get_locked(key, time.monotonic())
+            if value is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+            return value
+
+    def put(self, key, value):
+        now = time.monotonic()
+        with self._lock:
+            self._entries.pop(key, None)
+            self._entries[key] = (now + self.ttl_seconds, value)
+            # Constant TTL, so insertion order is expiry order
+            while self._entries:
+                oldest_key, (expires_at, _) = next(iter(self._entries.items()))
+                if expires_at > now and len(self._entries) <= self.max_entries:
+                    break
+                del self._entries[oldest_key]
+                if expires_at <= now:
+                    self.expired += 1
+
+    def get_or_compute(self, key, compute):
+        """Cached value for key, or compute() once for all concurrent callers and cache it"""
+        with self._lock:
+            value = self._get_locked(key, time.monotonic())
+            if value is not None:
+                self.hits += 1
+                return value
+            event = self._inflight.get(key)
+            is_leader = event is None
+            if is_leader:
+                event = self._inflight[key] = threading.Event()
+                self.misses += 1
+            else:
+                self.coalesced += 1
+
+        if not is_leader:
+            event.wait()
+            value = self.get(key)
+            # The leader failed; compute independently so its error is not shared
+            return value if value is not None else compute()
+
+        try:
+            value = compute()
+            self.put(key, value)
+            return value
+        finally:
+            with self._lock:
+                del self._inflight[key]
+            event.set()
+
+    def stats(self):
+        with self._lock:
+            return {
+                'entries': len(self._entries),
+                'hits': self.hits,
+                'misses': self.misses,
+                'coalesced': self.coalesced,
+                'expired': self.expired
+            }
@@ -0,0 +1,332 @@
+import threading
+
+import numpy as np
+
+from utils.timeseries_store import VALUE_COLUMNS, timeseries_store
+
+# Rollup levels, finest first: (name, minutes per bucket, buckets kept)
+LEVELS = (
+    ('15min', 15, 90 * 96),
+    ('hourly', 60, 2 * 365 * 24),
+    ('daily', 1440, 10 * 365)
+)
+
+# Per-minute ratios whose averages the analytics report; a mean of ratios cannot be
+# recovered from the signals' sums, so they are rolled up as signals of their own
+DERIVED_SIGNALS = {
+    'solar_efficiency': lambda c: c['solar_power'] / (c['sun_intensity'] * 100 + 1e-8),
+    'wind_efficiency': lambda c: c['wind_power'] / (c['wind_speed'] ** 3 + 1e-8),
+    'overall_efficiency': lambda c: c['total_generation'] / (c['consumption'] + 1e-8),
+    'net_energy': lambda c: c['total_generation'] - c['consumption']
+}
+
+SIGNALS = VALUE_COLUMNS + tuple(DERIVED_SIGNALS)
+
+# Stat rows are dicts of equal-length arrays: 'start' (minutes since the epoch),
+# 'count', and per signal '<signal>_<stat>' for each of these. Any set of rows can be
+# combined exactly into one, so every level is built the same way from the minutes.
+STATS = ('sum', 'sumsq', 'min', 'max', 'first', 'last', 'max_at')
+
+def to_minute(value):
+    """Minutes since the epoch for a datetime, datetime64, ISO string or int"""
+    if isinstance(value, (int, np.integer)):
+        return int(value)
+    return int(np.datetime64(value, 'm').astype(np.int64))
+
+def as_columns(data):
+    """Columnar arrays for a list of reading dicts; columnar input is returned as is"""
+    if not isinstance(data, (list, tuple)):
+        return data
+    columns = {'timestamp': np.array([record['timestamp'] for record in data], dtype='datetime64[m]')}
+    for column in VALUE_COLUMNS:
+        if data and column in data[0]:
+            columns[column] = np.array([record[column] for record in data], dtype=float)
+    return columns
+
+def minute_stats(data):
+    """One stat row per reading"""
+    columns = as_columns(data)
+    minutes = np.asarray(columns['timestamp']).astype('datetime64[m]').astype(np.int64)
+    values = {column: np.asarray(columns[column], dtype=float) for column in VALUE_COLUMNS if column in columns}
+    for signal, derive in DERIVED_SIGNALS.items():
+        try:
+            values[signal] = derive(values)
+        except KeyError:
+            pass
+
+    stats = {'start': minutes, 'count': np.ones(len(minutes), dtype=np.int64)}
+    for signal, signal_values in values.items():
+        stats[f'{signal}_sum'] = signal_values
+        stats[f'{signal}_sumsq'] = signal_values * signal_values
+        stats[f'{signal}_min'] = signal_values
+        stats[f'{signal}_max'] = signal_values
+        stats[f'{signal}_first'] = signal_values
+        stats[f'{signal}_last'] = signal_values
+        stats[f'{signal}_max_at'] = minutes
+    return stats
+
+def signals_of(stats):
+    return [key[:-4] for key in stats if key.endswith('_sum')]
+
+def row_count(stats):
+    return len(stats['count'])
+
+def concat(parts):
+    parts = [part for part in parts if part is not None and row_count(part)]
+    if not parts:
+        return None
+    return {key: np.concatenate([part[key] for part in parts]) for key in parts[0]}
+
+def combine(stats, starts):
+    """Merge time-ordered rows into one row per group; groups begin at the `starts` indices"""
+    n = row_count(stats)
+    lengths = np.diff(np.append(starts, n))
+    ends = starts + lengths - 1
+    combined = {'start': stats['start'][starts], 'count': np.add.reduceat(stats['count'], starts)}
+    positions = np.arange(n)
+    for signal in signals_of(stats):
+        maxima = np.maximum.reduceat(stats[f'{signal}_max'], starts)
+        is_max = stats[f'{signal}_max'] == np.repeat(maxima, lengths)
+        first_max = np.minimum.reduceat(np.where(is_max, positions, n), starts)
+        combined[f'{signal}_sum'] = np.add.reduceat(stats[f'{signal}_sum'], starts)
+        combined[f'{signal}_sumsq'] = np.add.reduceat(stats[f'{signal}_sumsq'], starts)
+        combined[f'{signal}_min'] = np.minimum.reduceat(stats[f'{signal}_min'], starts)
+        combined[f'{signal}_max'] = maxima
+        combined[f'{signal}_first'] = stats[f'{signal}_first'][starts]
+        combined[f'{signal}_last'] = stats[f'{signal}_last'][ends]
+        combined[f'{signal}_max_at'] = stats[f'{signal}_max_at'][first_max]
+    return combined
+
+def group_stats(stats, keys):
+    """Merge rows sharing a key (e.g. hour of day); the result's 'start' holds the keys"""
+    if stats is None or not row_count(stats):
+        return None
+    order = np.argsort(keys, kind='stable')
+    ordered = {key: values[order] for key, values in stats.items()}
+    sorted_keys = keys[order]
+    starts = np.flatnonzero(np.r_[True, sorted_keys[1:] != sorted_keys[:-1]])
+    grouped = combine(ordered, starts)
+    grouped['start'] = sorted_keys[starts]
+    return grouped
+
+def summarize(stats):
+    """All rows merged into a single row"""
+    if stats is None or not row_count(stats):
+        return None
+    return combine(stats, np.array([0]))
+
+def finalize(stats, keyed=False):
+    """Readable columns: mean, std (sample), sum, min, max, first, last and max_at per signal.
+
+    Rows are labelled 'timestamp' (bucket start as datetime64[m]) or, for grouped
+    stats, 'key'.
+    """
+    if stats is None:
+        return None
+    count = stats['count']
+    result = {'key': stats['start']} if keyed else {'timestamp': stats['start'].astype('datetime64[m]')}
+    result['count'] = count
+    for signal in signals_of(stats):
+        total = stats[f'{signal}_sum']
+        variance = (stats[f'{signal}_sumsq'] - total * total / count) / np.maximum(count - 1, 1)
+        result[f'{signal}_mean'] = total / count
+        result[f'{signal}_std'] = np.where(count > 1, np.sqrt(np.maximum(variance, 0.0)), 0.0)
+        result[f'{signal}_sum'] = total
+        for stat in ('min', 'max', 'first', 'last'):
+            result[f'{signal}_{stat}'] = stats[f'{signal}_{stat}']
+        result[f'{signal}_max_at'] = stats[f'{signal}_max_at'].astype('datetime64[m]')
+    return result
+
+def daily_averages(days):
+    """Finalized date groups as the dashboard's daily averages (means, grid totals summed)"""
+    if days is None:
+        return []
+    return [{
+        'date': np.datetime64(int(day), 'D').astype(object),
+        'solar_power': float(days['solar_power_mean'][i]),
+        'wind_power': float(days['wind_power_mean'][i]),
+        'total_generation': float(days['total_generation_mean'][i]),
+        'consumption': float(days['consumption_mean'][i]),
+        'storage_percentage': float(days['storage_percentage_mean'][i]),
+        'sun_intensity': float(days['sun_intensity_mean'][i]),
+        'grid_export': float(days['grid_export_sum'][i]),
+        'grid_import': float(days['grid_import_sum'][i])
+    } for i, day in enumerate(days['key'])]
+
+class RollupLevel:
+    """Stat rows for fixed-size buckets, ascending, in arrays that grow by doubling"""
+
+    def __init__(self, name, minutes, retention):
+        self.name = name
+        self.minutes = minutes
+        self.retention = retention
+        self.rows = None
+        self.size = 0
+
+    def _append(self, new):
+        if row_count(new) > self.retention:
+            # The new buckets alone fill the level; older ones would leave a gap
+            new = {key: values[-self.retention:] for key, values in new.items()}
+            self.size = 0
+        count = row_count(new)
+        if self.rows is None:
+            capacity = min(2 * self.retention, max(1024, count))
+            self.rows = {key: np.empty(capacity, dtype=values.dtype) for key, values in new.items()}
+        capacity = len(self.rows['start'])
+        if self.size + count > capacity:
+            # Keep at most `retention` buckets, growing until twice that is allocated
+            keep = min(self.size, max(0, self.retention - count))
+            capacity = max(capacity, min(2 * self.retention, 2 * (keep + count)), keep + count)
+            rows = {key: np.empty(capacity, dtype=values.dtype) for key, values in self.rows.items()}
+            for key, values in self.rows.items():
+                rows[key][:keep] = values[self.size - keep:self.size]
+            self.rows = rows
+            self.size = keep
+        for key, values in new.items():
+            self.rows[key][self.size:self.size + count] = values
+        self.size += count
+
+    def add(self, minutes):
+        """Fold minute rows (newer than anything added before) into their buckets"""
+        buckets = minutes['start'] // self.minutes * self.minutes
+        starts = np.flatnonzero(np.r_[True, buckets[1:] != buckets[:-1]])
+        new = combine(minutes, starts)
+        new['start'] = buckets[starts]
+
+        if self.size and self.rows['start'][self.size - 1] == new['start'][0]:
+            # The newest bucket was still filling; merge the first new bucket into it
+            last = {key: values[self.size - 1:self.size] for key, values in self.rows.items()}
+            merged = combine(concat([last, {key: values[:1] for key, values in new.items()}]), np.array([0]))
+            for key, values in merged.items():
+                self.rows[key][self.size - 1] = values[0]
+            new = {key: values[1:] for key, values in new.items()}
+        if row_count(new):
+            self._append(new)
+
+    def between(self, start, stop):
+        """Rows for buckets starting in [start, stop)"""
+        if not self.size:
+            return None
+        starts = self.rows['start'][:self.size]
+        first, last = np.searchsorted(starts, [start, stop])
+        return {key: values[first:last].copy() for key, values in self.rows.items()}
+
+class RollupStore:
+    """15-minute, hourly and daily rollups of the time-series store, kept incrementally.
+
+    Every read folds in only the minutes the store gained since the previous read.
+    Window queries tile the range with the coarsest complete buckets and use finer
+    levels, down to raw minutes, only at the edges, so their results match an
+    aggregation over the raw minutes while a month-long window reads a few dozen rows.
+    """
+
+    def __init__(self, store, levels=LEVELS):
+        self.store = store
+        self.levels = [RollupLevel(*level) for level in levels]
+        self._last_minute = None
+        self._lock = threading.RLock()
+
+    def update(self):
+        with self._lock:
+            start = None if self._last_minute is None else np.datetime64(self._last_minute + 1, 'm')
+            arrays = self.store.slice(start=start)
+            if not len(arrays['timestamp']):
+                return 0
+            minutes = minute_stats(arrays)
+            for level in self.levels:
+                level.add(minutes)
+            self._last_minute = int(minutes['start'][-1])
+            return row_count(minutes)
+
+    @property
+    def newest_minute(self):
+        """Newest minute folded into the rollups (minutes since the epoch)"""
+        return self._last_minute
+
+    def recent(self, hours):
+        """(start, stop) minutes of the last `hours`, the same rows as store.last(hours * 60)"""
+        self.update()
+        stop = self._last_minute + 1
+        return stop - int(hours * 60), stop
+
+    def _raw(self, start, stop):
+        if start >= stop:
+            return None
+        arrays = self.store.slice(start=np.datetime64(start, 'm'), end=np.datetime64(stop - 1, 'm'))
+        return minute_stats(arrays) if len(arrays['timestamp']) else None
+
+    def _tile(self, start, stop, levels):
+        if start >= stop:
+            return []
+        if not levels:
+            return [self._raw(start, stop)]
+        level = levels[-1]
+        if not level.size:
+            return self._tile(start, stop, levels[:-1])
+        # Buckets older than the level's retention are read from finer levels
+        first = max(-(-start // level.minutes) * level.minutes, int(level.rows['start'][0]))
+        last = stop // level.minutes * level.minutes
+        if first >= last:
+            return self._tile(start, stop, levels[:-1])
+        return (self._tile(start, first, levels[:-1]) + [level.between(first, last)] +
+                self._tile(last, stop, levels[:-1]))
+
+    def window(self, start, stop, max_minutes=1440):
+        """Time-ordered stat rows covering exactly [start, stop), from buckets of at most max_minutes"""
+        self.update()
+        with self._lock:
+            levels = [level for level in self.levels if level.minutes <= max_minutes]
+            return concat(self._tile(to_minute(start), to_minute(stop), levels))
+
+    def summary(self, start, stop):
+        """One finalized row aggregating every minute in [start, stop)"""
+        return finalize(summarize(self.window(start, stop)))
+
+    def group(self, start, stop, by):
+        """Finalized stats per 'hour' of day or per 'date' (days since the epoch) over [start, stop)"""
+        size = 60 if by == 'hour' else 1440
+        stats = self.window(start, stop, max_minutes=size)
+        if stats is None:
+            return None
+        keys = stats['start'] // size
+        return finalize(group_stats(stats, keys % 24 if by == 'hour' else keys), keyed=True)
+
+    def daily_averages(self, start, stop):
+        """The dashboard's daily averages over [start, stop)"""
+        return daily_averages(self.group(start, stop, 'date'))
+
+    def query(self, start, end, resolution_minutes):
+        """Buckets from the coarsest level no coarser than resolution_minutes, for [start, end].
+
+        Below the finest level the raw minutes are returned in the same finalized form,
+        with the level reported as 'minute'.
+        """
+        self.update()
+        start, stop = to_minute(start), to_minute(end) + 1
+        with self._lock:
+            levels = [level for level in self.levels if level.minutes <= resolution_minutes]
+            if not levels:
+                return 'minute', finalize(self._raw(start, stop))
+            level = levels[-1]
+            rows = level.between(start // level.minutes * level.minutes, stop)
+            return level.name, finalize(rows if rows is not None and row_count(rows) else None)
+
+    def day(self, day):
+        """Finalized daily bucket for a date, or None when no minutes of it are stored"""
+        return self.day_with_newest(day)[0]
+
+    def day_with_newest(self, day):
+        """(day(day), newest_minute) read together, so the bucket's count matches the newest minute"""
+        self.update()
+        minute = to_minute(np.datetime64(day, 'D'))
+        with self._lock:
+            rows = self.levels[-1].between(minute, minute + 1)
+            newest = self._last_minute
+        return (finalize(rows) if rows is not None and row_count(rows) else None), newest
+
+    def stats(self):
+        with self._lock:
+            return {level.name: level.size for level in self.levels}
+
+# Global rollups over the shared time-series store
+rollup_store = RollupStore(timeseries_store)
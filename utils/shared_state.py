@@ -0,0 +1,274 @@
+import json
+import os
+import time
+import uuid
+from functools import wraps
+
+import numpy as np
+import socketio
+
+from utils.offload import BlockingPool
+from utils.processes import pid_alive
+from utils.sqlite_db import SQLITE_PATH, SQLiteDatabase
+
+SHARED_STATE_PATH = os.environ.get('SHARED_STATE_PATH', SQLITE_PATH)
+
+# State only needs to leave the process when gunicorn runs several workers
+MULTI_WORKER = int(os.environ.get('WEB_CONCURRENCY', 1)) > 1
+
+def _off_hub(method):
+    """Run a blocking SQLite method on the object's own native thread.
+
+    sqlite3 calls (and busy_timeout waits) would otherwise block the gevent hub and
+    with it every request on the worker. One thread per database keeps the calls
+    serialized, so public methods wrapped with this must not call each other.
+    """
+    @wraps(method)
+    def wrapper(self, *args, **kwargs):
+        return self._pool.call(method, self, *args, **kwargs)
+    return wrapper
+
+class LocalState:
+    """In-process SharedState for a single worker: same interface, no SQLite"""
+
+    def __init__(self):
+        self._values = {}
+        self._clients = {}
+
+    def get(self, key, default=None):
+        # A fresh copy per read, so callers can change it like a SharedState value
+        value = self._values.get(key)
+        return json.loads(value) if value is not None else default
+
+    def set(self, key, value):
+        # Stored as JSON so callers see the same types as with SharedState
+        self._values[key] = json.dumps(value, default=str)
+
+    def try_acquire_lease(self, name, ttl_seconds):
+        return True
+
+    def add_client(self, sid, grid_id, user_id):
+        self._clients[sid] = (grid_id, user_id)
+
+    def remove_client(self, sid):
+        self._clients.pop(sid, None)
+
+    def clients(self):
+        return list(self._clients.values())
+
+    def has_clients(self):
+        return bool(self._clients)
+
+class SharedState:
+    """Small key-value store shared by every worker process on this host.
+
+    Values are JSON documents in a local SQLite file, so grid connection state, the
+    last reading, the latest broadcast payload and the set of connected Socket.IO
+    clients look the same from whichever gunicorn worker handles a request. Leases
+    let exactly one worker run periodic jobs such as the real-time broadcast.
+
+    Only used with several workers, together with SharedSeries for the time-series
+    history itself.
+    """
+
+    SCHEMA = '''
+        CREATE TABLE IF NOT EXISTS shared_state (
+            key TEXT PRIMARY KEY,
+            value TEXT NOT NULL,
+            updated_at REAL NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS socket_clients (
+            sid TEXT PRIMARY KEY,
+            pid INTEGER NOT NULL,
+            grid_id TEXT,
+            user_id TEXT,
+            connected_at REAL NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS idx_socket_clients_pid ON socket_clients(pid);
+    '''
+
+    def __init__(self, path=SHARED_STATE_PATH):
+        # A dedicated connection, so these small commits never flush another component's batch
+        self.db = SQLiteDatabase(path)
+        self.db.executescript(self.SCHEMA)
+        self._pool = BlockingPool('shared-state', max_workers=1)
+        self._pid = None
+        self._claim_process()
+
+    def _claim_process(self):
+        """Forget clients registered by an earlier process with this pid (after a fork or restart)"""
+        if self._pid != os.getpid():
+            self._pid = os.getpid()
+            self.owner_id = f'{self._pid}:{uuid.uuid4().hex[:8]}'
+            self.db.execute('DELETE FROM socket_clients WHERE pid = ?', (self._pid,))
+            self.db.commit()
+
+    @_off_hub
+    def get(self, key, default=None):
+        row = self.db.query_one('SELECT value FROM shared_state WHERE key = ?', (key,))
+        return json.loads(row['value']) if row else default
+
+    @_off_hub
+    def set(self, key, value):
+        self.db.execute(
+            '''INSERT INTO shared_state (key, value, updated_at) VALUES (?, ?, ?)
+               ON CONFLICT(key) DO UPDATE SET value = excluded.value, updated_at = excluded.updated_at''',
+            (key, json.dumps(value, default=str), time.time())
+        )
+        self.db.commit()
+
+    @_off_hub
+    def try_acquire_lease(self, name, ttl_seconds):
+        """Take or renew a named lease; True while this process holds it"""
+        self._claim_process()
+        now = time.time()
+        acquired = self.db.execute(
+            '''INSERT INTO shared_state (key, value, updated_at) VALUES (?, ?, ?)
+               ON CONFLICT(key) DO UPDATE SET value = excluded.value, updated_at = excluded.updated_at
+               WHERE shared_state.value = excluded.value OR shared_state.updated_at < ?''',
+            (f'lease:{name}', json.dumps(self.owner_id), now, now - ttl_seconds)
+        ).rowcount
+        self.db.commit()
+        return acquired > 0
+
+    @_off_hub
+    def add_client(self, sid, grid_id, user_id):
+        self._claim_process()
+        self.db.execute(
+            'INSERT OR REPLACE INTO socket_clients (sid, pid, grid_id, user_id, connected_at) VALUES (?, ?, ?, ?, ?)',
+            (sid, self._pid, grid_id, user_id, time.time())
+        )
+        self.db.commit()
+
+    @_off_hub
+    def remove_client(self, sid):
+        self.db.execute('DELETE FROM socket_clients WHERE sid = ?', (sid,))
+        self.db.commit()
+
+    @_off_hub
+    def clients(self):
+        """(grid_id, user_id) for every connected client on any live worker"""
+        rows = self.db.query('SELECT pid, grid_id, user_id FROM socket_clients')
+        dead = {row['pid'] for row in rows if not pid_alive(row['pid'])}
+        if dead:
+            self.db.executemany('DELETE FROM socket_clients WHERE pid = ?', [(pid,) for pid in dead])
+            self.db.commit()
+        return [(row['grid_id'], row['user_id']) for row in rows if row['pid'] not in dead]
+
+    @_off_hub
+    def has_clients(self):
+        return self.db.query_one('SELECT 1 FROM socket_clients LIMIT 1') is not None
+
+class SharedSeries:
+    """Minute samples shared by every worker: one leased producer writes, all of them read.
+
+    Rows are keyed by minute since the epoch. The worker holding the producer lease
+    simulates the minutes missing from the table and inserts them; every worker copies
+    rows it has not seen into its own ring buffer, so all of them serve one history.
+    If the producer dies, another worker takes the lease once it expires.
+    """
+
+    def __init__(self, columns, state, path=SHARED_STATE_PATH, lease_seconds=180):
+        self.columns = tuple(columns)
+        self.state = state
+        self.lease_seconds = lease_seconds
+        self.db = SQLiteDatabase(path)
+        self.db.executescript(
+            'CREATE TABLE IF NOT EXISTS timeseries (minute INTEGER PRIMARY KEY, '
+            + ', '.join(f'{column} REAL NOT NULL' for column in self.columns) + ')'
+        )
+        self._pool = BlockingPool('shared-series', max_workers=1)
+
+    def is_producer(self):
+        """Take or renew the producer lease; True while this process holds it"""
+        return self.state.try_acquire_lease('timeseries-producer', self.lease_seconds)
+
+    @_off_hub
+    def newest_minute(self):
+        row = self.db.query_one('SELECT MAX(minute) AS minute FROM timeseries')
+        return row['minute']
+
+    @_off_hub
+    def read(self, after, limit):
+        """Columnar arrays of the newest `limit` rows after a minute, ascending"""
+        rows = self.db.query(
+            f'SELECT minute, {", ".join(self.columns)} FROM timeseries WHERE minute > ? ORDER BY minute DESC LIMIT ?',
+            (after, limit)
+        )
+        values = np.array(rows[::-1], dtype=float).reshape(len(rows), len(self.columns) + 1)
+        arrays = {'timestamp': values[:, 0].astype(np.int64).astype('datetime64[m]')}
+        for i, column in enumerate(self.columns, start=1):
+            arrays[column] = values[:, i]
+        return arrays
+
+    @_off_hub
+    def write(self, arrays, keep_minutes):
+        """Insert consecutive minute samples and drop rows older than keep_minutes"""
+        minutes = arrays['timestamp'].astype('datetime64[m]').astype(np.int64)
+        rows = zip(minutes.tolist(), *(np.asarray(arrays[column], dtype=float).tolist() for column in self.columns))
+        with self.db.transaction():
+            self.db.executemany(
+                f'INSERT OR IGNORE INTO timeseries (minute, {", ".join(self.columns)}) '
+                f'VALUES ({", ".join("?" * (len(self.columns) + 1))})',
+                rows
+            )
+            self.db.execute('DELETE FROM timeseries WHERE minute <= ?', (int(minutes[-1]) - keep_minutes,))
+
+class SQLitePubSubManager(socketio.PubSubManager):
+    """Socket.IO client manager that relays emits between workers through SQLite.
+
+    A local stand-in for the Redis/Kombu message queues: each emit is appended to a
+    table and every worker polls for rows newer than the last one it has seen, so a
+    broadcast to a room reaches clients connected to any worker on this host.
+    """
+    name = 'sqlite'
+
+    def __init__(self, path=SHARED_STATE_PATH, channel='flask-socketio', write_only=False,
+                 logger=None, json=None, poll_interval=0.1, retention_seconds=60):
+        super().__init__(channel=channel, write_only=write_only, logger=logger, json=json)
+        self.db = SQLiteDatabase(path)
+        self.db.executescript('''
+            CREATE TABLE IF NOT EXISTS socketio_messages (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                channel TEXT NOT NULL,
+                payload TEXT NOT NULL,
+                created_at REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_socketio_messages_created ON socketio_messages(created_at);
+        ''')
+        self.poll_interval = poll_interval
+        self.retention_seconds = retention_seconds
+        self._last_prune = 0
+        self._pool = BlockingPool('socketio-queue', max_workers=1)
+
+    @_off_hub
+    def _publish(self, data):
+        now = time.time()
+        self.db.execute(
+            'INSERT INTO socketio_messages (channel, payload, created_at) VALUES (?, ?, ?)',
+            (self.channel, self.json.dumps(data), now)
+        )
+        if now - self._last_prune > self.retention_seconds:
+            self.db.execute('DELETE FROM socketio_messages WHERE created_at < ?', (now - self.retention_seconds,))
+            self._last_prune = now
+        self.db.commit()
+
+    @_off_hub
+    def _query(self, sql, params=()):
+        return self.db.query(sql, params)
+
+    def _listen(self):
+        last_id = self._query('SELECT MAX(id) AS last_id FROM socketio_messages')[0]['last_id'] or 0
+        while True:
+            rows = self._query(
+                'SELECT id, payload FROM socketio_messages WHERE id > ? AND channel = ? ORDER BY id',
+                (last_id, self.channel)
+            )
+            for row in rows:
+                last_id = row['id']
+                yield row['payload']
+            if not rows:
+                self.server.sleep(self.poll_interval)
+
+# Global shared state instance; in-process unless gunicorn runs several workers
+shared_state = SharedState() if MULTI_WORKER else LocalState()
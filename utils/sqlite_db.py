@@ -0,0 +1,82 @@
+import os
+import sqlite3
+import threading
+from contextlib import contextmanager
+
+# 'json' keeps the file-based managers; 'sqlite' shares one database across workers
+STORAGE_BACKEND = os.environ.get('STORAGE_BACKEND', 'json').lower()
+SQLITE_PATH = os.environ.get('SQLITE_PATH', 'ecoshakti.db')
+
+class SQLiteDatabase:
+    """One WAL-mode SQLite connection per process, serialized by a lock.
+
+    WAL lets several gunicorn workers read while one writes, and busy_timeout makes
+    writers wait for each other instead of failing. Statements are parameterized, so
+    sqlite3's statement cache reuses the compiled form. Writes go through transaction()
+    blocks, which commit or roll back everything written in them at once.
+    """
+
+    def __init__(self, path=SQLITE_PATH, busy_timeout_ms=5000):
+        self.path = path
+        self._lock = threading.RLock()
+        self._connection = sqlite3.connect(path, check_same_thread=False, cached_statements=256)
+        self._connection.row_factory = sqlite3.Row
+        self._connection.execute('PRAGMA journal_mode=WAL')
+        self._connection.execute('PRAGMA synchronous=NORMAL')
+        self._connection.execute(f'PRAGMA busy_timeout={int(busy_timeout_ms)}')
+
+    def execute(self, sql, params=()):
+        with self._lock:
+            return self._connection.execute(sql, params)
+
+    def executemany(self, sql, rows):
+        with self._lock:
+            return self._connection.executemany(sql, rows)
+
+    def executescript(self, script):
+        with self._lock:
+            self._connection.executescript(script)
+
+    def query(self, sql, params=()):
+        with self._lock:
+            return self._connection.execute(sql, params).fetchall()
+
+    def query_one(self, sql, params=()):
+        with self._lock:
+            return self._connection.execute(sql, params).fetchone()
+
+    def commit(self):
+        with self._lock:
+            self._connection.commit()
+
+    def rollback(self):
+        with self._lock:
+            self._connection.rollback()
+
+    @contextmanager
+    def transaction(self):
+        """Commit everything written in the block at once, or roll it all back.
+
+        The connection is shared by every greenlet in the process, so the lock is held
+        for the whole block; otherwise another caller's commit or rollback would land
+        in the middle of it. Blocks must not yield (no sleeps or pool calls) inside.
+        """
+        with self._lock:
+            try:
+                yield self
+            except Exception:
+                self._connection.rollback()
+                raise
+            else:
+                self._connection.commit()
+
+_databases = {}
+_databases_lock = threading.Lock()
+
+def get_database(path=None):
+    """Shared SQLiteDatabase for a path (SQLITE_PATH by default)"""
+    path = path or SQLITE_PATH
+    with _databases_lock:
+        if path not in _databases:
+            _databases[path] = SQLiteDatabase(path)
+        return _databases[path]
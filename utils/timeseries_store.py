@@ -0,0 +1,191 @@
+import threading
+import time
+from datetime import datetime
+
+import numpy as np
+
+from utils.data_generator import RenewableEnergyDataGenerator, DATASET_COLUMNS
+from utils.shared_state import MULTI_WORKER, SharedSeries, shared_state
+
+MINUTE = np.timedelta64(1, 'm')
+VALUE_COLUMNS = tuple(column for column in DATASET_COLUMNS if column != 'timestamp')
+
+class TimeSeriesStore:
+    """Process-wide columnar ring buffer of minute samples, keyed by timestamp.
+
+    Every minute between the oldest and newest sample is present, so a time range
+    maps straight to ring offsets. Routes slice this buffer instead of regenerating
+    history, which keeps every chart and API looking at the same data. With a
+    SharedSeries the minutes come from the worker holding the producer lease, so
+    every worker holds the same history.
+    """
+
+    def __init__(self, capacity_minutes=30 * 24 * 60, generator=None, shared=None):
+        self.capacity = capacity_minutes
+        self.generator = generator or RenewableEnergyDataGenerator()
+        self.shared = shared
+        self._timestamps = np.zeros(capacity_minutes, dtype='datetime64[m]')
+        self._columns = {column: np.zeros(capacity_minutes) for column in VALUE_COLUMNS}
+        self._head = 0   # Physical index of the oldest sample
+        self._size = 0
+        self._lock = threading.RLock()
+        self._producer_running = False
+
+    @property
+    def newest_timestamp(self):
+        """Minute key of the newest sample, or None while the buffer is empty"""
+        if not self._size:
+            return None
+        return self._timestamps[(self._head + self._size - 1) % self.capacity]
+
+    @property
+    def oldest_timestamp(self):
+        """Minute key of the oldest sample, or None while the buffer is empty"""
+        return self._timestamps[self._head] if self._size else None
+
+    def __len__(self):
+        return self._size
+
+    def append_arrays(self, arrays):
+        """Append consecutive minute samples (ascending timestamps) to the ring"""
+        with self._lock:
+            count = len(arrays['timestamp'])
+            if count >= self.capacity:
+                arrays = {key: values[-self.capacity:] for key, values in arrays.items()}
+                count = self.capacity
+
+            tail = (self._head + self._size) % self.capacity
+            positions = (tail + np.arange(count)) % self.capacity
+            self._timestamps[positions] = arrays['timestamp'].astype('datetime64[m]')
+            for column in VALUE_COLUMNS:
+                self._columns[column][positions] = arrays[column]
+
+            overflow = max(0, self._size + count - self.capacity)
+            self._head = (self._head + overflow) % self.capacity
+            self._size = min(self.capacity, self._size + count)
+
+    def extend_to(self, now=None):
+        """Generate any minutes missing between the newest sample and `now`"""
+        current_minute = np.datetime64(now or datetime.now(), 'm')
+        with self._lock:
+            newest = self.newest_timestamp
+            if newest is not None and newest >= current_minute:
+                return 0
+            if self.shared is not None:
+                return self._extend_from_shared(current_minute)
+
+            if newest is None or current_minute - newest > self.capacity * MINUTE:
+                first = current_minute - (self.capacity - 1) * MINUTE
+            else:
+                first = newest + MINUTE
+
+            # The generator's live tick carries weather, wind and battery state across calls
+            timestamps = np.arange(first, current_minute + MINUTE, MINUTE)
+            self.append_arrays(self.generator.advance_live(timestamps))
+            return len(timestamps)
+
+    def _extend_from_shared(self, current_minute):
+        shared = self.shared
+        if shared.is_producer():
+            newest = shared.newest_minute()
+            first = current_minute - (self.capacity - 1) * MINUTE
+            earlier_net_power = None
+            if newest is not None and np.datetime64(newest, 'm') >= first - MINUTE:
+                first = np.datetime64(newest, 'm') + MINUTE
+                # Continue the battery from the minutes before, whoever produced them
+                earlier_net_power = shared.read(newest - self.generator.LIVE_BATTERY_WINDOW, self.capacity)['net_power']
+            if first <= current_minute:
+                timestamps = np.arange(first, current_minute + MINUTE, MINUTE)
+                shared.write(self.generator.advance_live(timestamps, earlier_net_power), self.capacity)
+
+        newest = self.newest_timestamp
+        after = int(newest.astype(np.int64)) if newest is not None else -1
+        arrays = shared.read(after, self.capacity)
+        count = len(arrays['timestamp'])
+        if not count:
+            return 0
+        if newest is None or arrays['timestamp'][0] != newest + MINUTE:
+            # The shared history moved on by more than the ring holds; start over from it
+            self._head = self._size = 0
+        self.append_arrays(arrays)
+        return count
+
+    def _physical_range(self, start_offset, stop_offset):
+        """Physical ring indices for logical offsets [start_offset, stop_offset)"""
+        return (self._head + np.arange(start_offset, stop_offset)) % self.capacity
+
+    def slice(self, start=None, end=None):
+        """Columnar copy of all samples with start <= timestamp <= end (ascending)"""
+        self.extend_to()
+        with self._lock:
+            oldest = self.oldest_timestamp
+            start_offset = 0
+            stop_offset = self._size
+            if start is not None:
+                start_minute = np.datetime64(start, 'm')
+                start_offset = int(np.clip((start_minute - oldest) // MINUTE, 0, self._size))
+            if end is not None:
+                end_minute = np.datetime64(end, 'm')
+                stop_offset = int(np.clip((end_minute - oldest) // MINUTE + 1, start_offset, self._size))
+
+            positions = self._physical_range(start_offset, stop_offset)
+            arrays = {'timestamp': self._timestamps[positions]}
+            for column in VALUE_COLUMNS:
+                arrays[column] = self._columns[column][positions]
+            return arrays
+
+    def last(self, minutes):
+        """Columnar copy of the most recent `minutes` samples (ascending)"""
+        self.extend_to()
+        with self._lock:
+            minutes = max(0, min(int(minutes), self._size))
+            positions = self._physical_range(self._size - minutes, self._size)
+            arrays = {'timestamp': self._timestamps[positions]}
+            for column in VALUE_COLUMNS:
+                arrays[column] = self._columns[column][positions]
+            return arrays
+
+    def latest(self):
+        """Newest sample as a record dict; constant time once the current minute exists"""
+        self.extend_to()
+        with self._lock:
+            position = (self._head + self._size - 1) % self.capacity
+            record = {'timestamp': self._timestamps[position].astype('datetime64[us]').item()}
+            for column in VALUE_COLUMNS:
+                record[column] = float(self._columns[column][position])
+            return record
+
+    def get_records(self, hours=24):
+        """Most recent `hours` of samples as the list-of-dicts shape the routes use"""
+        arrays = self.last(hours * 60)
+        arrays['timestamp'] = arrays['timestamp'].astype('datetime64[us]')
+        return RenewableEnergyDataGenerator.arrays_to_records(arrays)
+
+    def run_producer(self, sleep=time.sleep):
+        """Extend the buffer once per wall-clock minute; meant for a background task"""
+        self._producer_running = True
+        try:
+            while self._producer_running:
+                try:
+                    self.extend_to()
+                except Exception as e:
+                    print(f"Time-series producer error: {e}")
+                sleep(60 - datetime.now().second + 0.05)
+        finally:
+            self._producer_running = False
+
+    def start_producer(self, start_background_task, sleep=time.sleep):
+        """Start run_producer once using the caller's background task launcher"""
+        with self._lock:
+            if self._producer_running:
+                return False
+            self._producer_running = True
+        start_background_task(self.run_producer, sleep)
+        return True
+
+    def stop_producer(self):
+        """Ask a running producer loop to exit after its current sleep"""
+        self._producer_running = False
+
+# Global time-series store instance; several workers share one history through SQLite
+timeseries_store = TimeSeriesStore(shared=SharedSeries(VALUE_COLUMNS, shared_state) if MULTI_WORKER else None)